@@ -0,0 +1,46 @@
+"""Widen document and photo columns to hold storage URLs
+
+Revision ID: 3a6d2f8c41b9
+Revises: e1f7b3d95a20
+Create Date: 2026-10-19 14:02:47.118342
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3a6d2f8c41b9'
+down_revision = 'e1f7b3d95a20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.alter_column('t_applications', 'dob_image',
+               existing_type=sa.String(length=50),
+               type_=sa.String(length=255),
+               existing_nullable=True)
+    op.alter_column('t_applications', 'marksheet_image',
+               existing_type=sa.String(length=50),
+               type_=sa.String(length=255),
+               existing_nullable=True)
+    op.alter_column('m_applicant', 'profile_photo',
+               existing_type=sa.String(length=100),
+               type_=sa.String(length=255),
+               existing_nullable=True)
+
+
+def downgrade() -> None:
+    op.alter_column('m_applicant', 'profile_photo',
+               existing_type=sa.String(length=255),
+               type_=sa.String(length=100),
+               existing_nullable=True)
+    op.alter_column('t_applications', 'marksheet_image',
+               existing_type=sa.String(length=255),
+               type_=sa.String(length=50),
+               existing_nullable=True)
+    op.alter_column('t_applications', 'dob_image',
+               existing_type=sa.String(length=255),
+               type_=sa.String(length=50),
+               existing_nullable=True)
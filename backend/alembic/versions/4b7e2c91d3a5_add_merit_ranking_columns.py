@@ -0,0 +1,49 @@
+"""Add normalised marks and merit ranks to applications
+
+Revision ID: 4b7e2c91d3a5
+Revises: 27181c008f8d
+Create Date: 2026-10-19 10:12:41.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4b7e2c91d3a5'
+down_revision = '27181c008f8d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('t_applications', sa.Column('marks_numeric', sa.Float(), nullable=True))
+    op.add_column('t_applications', sa.Column('merit_rank', sa.Integer(), nullable=True))
+    op.add_column('t_applications', sa.Column('category_rank', sa.Integer(), nullable=True))
+    op.create_index('ix_t_applications_session_marks', 't_applications', ['session_id', 'marks_numeric'], unique=False)
+
+    # Backfill with the same rules as app.services.marks.normalise_marks on
+    # the percent scale: values up to 10 without a % sign may be a CGPA
+    op.execute("""
+        UPDATE t_applications SET marks_numeric = CASE
+            WHEN v.value IS NULL OR v.value > 100 THEN NULL
+            WHEN v.value <= 10 AND NOT v.percent THEN NULL
+            ELSE round(v.value, 2)
+        END
+        FROM (
+            SELECT application_id,
+                   CASE WHEN btrim(rtrim(btrim(marks), '%')) ~ '^[0-9]+(\\.[0-9]*)?$'
+                        THEN btrim(rtrim(btrim(marks), '%'))::numeric
+                   END AS value,
+                   btrim(marks) LIKE '%\\%' AS percent
+            FROM t_applications
+        ) AS v
+        WHERE t_applications.application_id = v.application_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_t_applications_session_marks', table_name='t_applications')
+    op.drop_column('t_applications', 'category_rank')
+    op.drop_column('t_applications', 'merit_rank')
+    op.drop_column('t_applications', 'marks_numeric')
@@ -0,0 +1,45 @@
+"""Add session capacity, application preferences and waitlist positions
+
+Revision ID: 8d3f61a0c2e7
+Revises: 4b7e2c91d3a5
+Create Date: 2026-10-19 11:03:27.540912
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d3f61a0c2e7'
+down_revision = '4b7e2c91d3a5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('m_session', sa.Column('seat_capacity', sa.Integer(), nullable=True))
+    op.add_column('t_applications', sa.Column('preference', sa.Integer(), nullable=True))
+    op.add_column('t_applications', sa.Column('waitlist_position', sa.Integer(), nullable=True))
+
+    # Existing applications keep their submission order as preference order
+    op.execute("""
+        UPDATE t_applications SET preference = v.preference
+        FROM (
+            SELECT application_id,
+                   row_number() OVER (PARTITION BY applicant_id ORDER BY application_id) AS preference
+            FROM t_applications
+        ) AS v
+        WHERE t_applications.application_id = v.application_id
+    """)
+    op.alter_column('t_applications', 'preference', existing_type=sa.Integer(), nullable=False)
+
+    op.create_index('ix_t_applications_applicant_pref', 't_applications', ['applicant_id', 'preference'], unique=False)
+    op.create_index('ix_t_applications_session_waitlist', 't_applications', ['session_id', 'enrollment_status', 'waitlist_position'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_t_applications_session_waitlist', table_name='t_applications')
+    op.drop_index('ix_t_applications_applicant_pref', table_name='t_applications')
+    op.drop_column('t_applications', 'waitlist_position')
+    op.drop_column('t_applications', 'preference')
+    op.drop_column('m_session', 'seat_capacity')
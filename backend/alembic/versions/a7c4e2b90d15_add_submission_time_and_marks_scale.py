@@ -0,0 +1,29 @@
+"""Add submission time and marks scale to applications
+
+Revision ID: a7c4e2b90d15
+Revises: d3e9a4c1f6b7
+Create Date: 2026-10-19 17:20:36.845120
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c4e2b90d15'
+down_revision = 'd3e9a4c1f6b7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('t_applications', sa.Column('marks_scale', sa.String(length=7), server_default='percent', nullable=False))
+    op.add_column('t_applications', sa.Column('submitted_date', sa.DateTime(), nullable=True))
+    # No submission time was recorded before; the last update is the closest one
+    op.execute("UPDATE t_applications SET submitted_date = updated_date")
+    op.alter_column('t_applications', 'submitted_date', nullable=False)
+
+
+def downgrade() -> None:
+    op.drop_column('t_applications', 'submitted_date')
+    op.drop_column('t_applications', 'marks_scale')
@@ -0,0 +1,35 @@
+"""Add waiting room state shared by all workers
+
+Revision ID: b6d1f0e27c4a
+Revises: f2a8c6d41e93
+Create Date: 2026-10-19 16:02:41.118305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6d1f0e27c4a'
+down_revision = 'f2a8c6d41e93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(sa.schema.CreateSequence(sa.Sequence('waiting_room_ticket_seq')))
+    op.create_table(
+        't_waiting_room',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('admitted', sa.Float(), nullable=False),
+        sa.Column('rate', sa.Float(), nullable=False),
+        sa.Column('healthy', sa.Boolean(), nullable=False),
+        sa.Column('advanced_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('adjusted_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('t_waiting_room')
+    op.execute(sa.schema.DropSequence(sa.Sequence('waiting_room_ticket_seq')))
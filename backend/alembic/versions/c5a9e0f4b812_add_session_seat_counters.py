@@ -0,0 +1,39 @@
+"""Add reserved and confirmed seat counters to sessions
+
+Revision ID: c5a9e0f4b812
+Revises: 8d3f61a0c2e7
+Create Date: 2026-10-19 11:48:02.664310
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5a9e0f4b812'
+down_revision = '8d3f61a0c2e7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('m_session', sa.Column('seats_reserved', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('m_session', sa.Column('seats_confirmed', sa.Integer(), server_default='0', nullable=False))
+
+    op.execute("""
+        UPDATE m_session SET seats_reserved = c.reserved, seats_confirmed = c.confirmed
+        FROM (
+            SELECT session_id,
+                   count(*) FILTER (WHERE payment_status <> 'Y') AS reserved,
+                   count(*) FILTER (WHERE payment_status = 'Y') AS confirmed
+            FROM t_applications
+            WHERE enrollment_status = 'Y'
+            GROUP BY session_id
+        ) AS c
+        WHERE m_session.session_id = c.session_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_column('m_session', 'seats_confirmed')
+    op.drop_column('m_session', 'seats_reserved')
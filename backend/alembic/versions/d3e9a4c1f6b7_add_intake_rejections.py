@@ -0,0 +1,32 @@
+"""Record rejected write-behind submissions
+
+Revision ID: d3e9a4c1f6b7
+Revises: b6d1f0e27c4a
+Create Date: 2026-10-19 16:48:13.502917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3e9a4c1f6b7'
+down_revision = 'b6d1f0e27c4a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        't_intake_rejections',
+        sa.Column('intake_ticket', sa.String(length=64), nullable=False),
+        sa.Column('applicant_id', sa.Integer(), nullable=False),
+        sa.Column('detail', sa.String(length=255), nullable=False),
+        sa.Column('rejected_date', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['applicant_id'], ['m_applicant.applicant_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('intake_ticket')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('t_intake_rejections')
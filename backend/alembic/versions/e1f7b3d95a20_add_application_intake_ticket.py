@@ -0,0 +1,26 @@
+"""Add intake ticket to applications for write-behind submissions
+
+Revision ID: e1f7b3d95a20
+Revises: c5a9e0f4b812
+Create Date: 2026-10-19 12:31:55.208477
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e1f7b3d95a20'
+down_revision = 'c5a9e0f4b812'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('t_applications', sa.Column('intake_ticket', sa.String(length=64), nullable=True))
+    op.create_unique_constraint('t_applications_intake_ticket_key', 't_applications', ['intake_ticket'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('t_applications_intake_ticket_key', 't_applications', type_='unique')
+    op.drop_column('t_applications', 'intake_ticket')
@@ -0,0 +1,107 @@
+"""Add cache invalidation triggers
+
+Revision ID: f2a8c6d41e93
+Revises: 3a6d2f8c41b9
+Create Date: 2026-10-19 16:05:31.218904
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2a8c6d41e93'
+down_revision = '3a6d2f8c41b9'
+branch_labels = None
+depends_on = None
+
+# table -> (invalidation bus key, id column or None for the whole kind)
+CACHED_TABLES = {
+    't_news': ('news', None),
+    'm_news_category': ('news', None),
+    'm_state': ('master', None),
+    'm_district': ('master', None),
+    'm_college': ('master', None),
+    'm_caste': ('master', None),
+    'm_qualification': ('master', None),
+    'm_stream': ('master', None),
+    'm_applicant': ('applicant', 'applicant_id'),
+    't_applications': ('application', 'applicant_id'),
+}
+
+# One notification per statement. With an id column the changed ids are
+# sent as `key:1,2,3`, or the bare key when the list would not fit in a
+# notification payload. The payload starts with the writer's app.origin
+# (set by the app on each pooled connection; '-' for other clients).
+NOTIFY_FUNCTION = """
+CREATE OR REPLACE FUNCTION notify_cache_invalidation() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    bus_key text := TG_ARGV[0];
+    id_column text := TG_ARGV[1];
+    origin text := coalesce(nullif(current_setting('app.origin', true), ''), '-');
+    ids text;
+BEGIN
+    IF id_column IS NOT NULL THEN
+        IF TG_OP = 'INSERT' THEN
+            EXECUTE format('SELECT string_agg(DISTINCT %I::text, '','') FROM new_rows', id_column) INTO ids;
+        ELSIF TG_OP = 'DELETE' THEN
+            EXECUTE format('SELECT string_agg(DISTINCT %I::text, '','') FROM old_rows', id_column) INTO ids;
+        ELSE
+            EXECUTE format(
+                'SELECT string_agg(DISTINCT id::text, '','') FROM '
+                '(SELECT %1$I AS id FROM old_rows UNION SELECT %1$I FROM new_rows) AS changed',
+                id_column
+            ) INTO ids;
+        END IF;
+        IF ids IS NULL THEN
+            RETURN NULL;
+        END IF;
+        IF length(ids) <= 7000 THEN
+            bus_key := bus_key || ':' || ids;
+        END IF;
+    END IF;
+    PERFORM pg_notify('cache_invalidation', origin || ' ' || bus_key);
+    RETURN NULL;
+END
+$$;
+"""
+
+
+def _triggers(table: str, bus_key: str, id_column):
+    if id_column is None:
+        yield (
+            f"CREATE TRIGGER {table}_invalidate AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table} "
+            f"FOR EACH STATEMENT EXECUTE FUNCTION notify_cache_invalidation('{bus_key}')"
+        )
+        return
+    # Transition tables allow a single event per trigger
+    for operation, referencing in (
+        ('INSERT', 'NEW TABLE AS new_rows'),
+        ('UPDATE', 'OLD TABLE AS old_rows NEW TABLE AS new_rows'),
+        ('DELETE', 'OLD TABLE AS old_rows'),
+    ):
+        yield (
+            f"CREATE TRIGGER {table}_invalidate_{operation.lower()} AFTER {operation} ON {table} "
+            f"REFERENCING {referencing} FOR EACH STATEMENT "
+            f"EXECUTE FUNCTION notify_cache_invalidation('{bus_key}', '{id_column}')"
+        )
+
+
+def _trigger_names(table: str, id_column):
+    if id_column is None:
+        return [f"{table}_invalidate"]
+    return [f"{table}_invalidate_{operation}" for operation in ('insert', 'update', 'delete')]
+
+
+def upgrade() -> None:
+    op.execute(NOTIFY_FUNCTION)
+    for table, (bus_key, id_column) in CACHED_TABLES.items():
+        for statement in _triggers(table, bus_key, id_column):
+            op.execute(statement)
+
+
+def downgrade() -> None:
+    for table, (_, id_column) in CACHED_TABLES.items():
+        for name in _trigger_names(table, id_column):
+            op.execute(f"DROP TRIGGER IF EXISTS {name} ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS notify_cache_invalidation()")
@@ -0,0 +1,293 @@
+"""
+Virtual waiting room for enrollment openings
+
+When the API is healthy requests pass straight through. Once admitted
+requests get slow or the connection pool fills up, new arrivals receive a
+signed queue ticket and are admitted first-come-first-served at a rate
+that adapts to pool occupancy and the p95 latency of admitted requests
+(additive increase, multiplicative decrease).
+
+The queue is shared by every worker: ticket numbers come from a Postgres
+sequence and the admitted watermark and rate live in one row of
+t_waiting_room. Each worker keeps a dedicated asyncpg connection (outside
+the pool) to take ticket numbers and, every WAITING_ROOM_SYNC_INTERVAL,
+to report its health and read the state back; in between the watermark
+is extrapolated locally, so tickets are checked without touching the
+database. Without that connection requests pass ungated.
+
+Tickets and admission passes are bound to the user of the bearer token
+they were issued for (a hash of its subject), so a pass cannot be shared.
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from collections import deque
+from typing import Optional, Tuple
+import asyncpg
+from fastapi import HTTPException, Request, Response, status
+from jose import JWTError, jwt
+from sqlalchemy.engine import make_url
+from app.core.config import settings
+from app.db.session import pool_stats
+
+logger = logging.getLogger(__name__)
+
+TICKET_HEADER = "X-Queue-Ticket"
+
+# Advances the shared watermark by the time since anyone last advanced it.
+# The rate is adjusted once a second, backing off if any worker reported
+# unhealthy during that second.
+_SYNC = """
+WITH seq AS (
+    SELECT CASE WHEN is_called THEN last_value ELSE 0 END AS issued FROM waiting_room_ticket_seq
+)
+UPDATE t_waiting_room SET
+    admitted = GREATEST(admitted, LEAST(
+        (SELECT issued FROM seq), admitted + rate * GREATEST(EXTRACT(EPOCH FROM now() - advanced_at), 0)
+    )),
+    advanced_at = GREATEST(advanced_at, now()),
+    rate = CASE
+        WHEN now() - adjusted_at < interval '1 second' THEN rate
+        WHEN healthy AND $1 THEN LEAST($3, rate + $2)
+        ELSE GREATEST($2, rate * 0.7)
+    END,
+    healthy = CASE WHEN now() - adjusted_at < interval '1 second' THEN healthy AND $1 ELSE true END,
+    adjusted_at = CASE WHEN now() - adjusted_at < interval '1 second' THEN adjusted_at ELSE now() END
+WHERE id = 1
+RETURNING (SELECT issued FROM seq) AS issued, admitted, rate
+"""
+
+
+class QueueUnavailable(Exception):
+    """The shared queue state cannot be reached from this worker"""
+
+
+class AdmissionController:
+    """FCFS admission watermark shared through Postgres, advanced at an adaptive rate"""
+
+    def __init__(
+        self,
+        min_rate: float,
+        max_rate: float,
+        target_latency: float,
+        target_occupancy: float,
+        admission_ttl: int,
+        sync_interval: float,
+    ):
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.target_latency = target_latency
+        self.target_occupancy = target_occupancy
+        self.admission_ttl = admission_ttl
+        self.sync_interval = sync_interval
+        self.rate = max_rate
+        self.issued = 0  # highest ticket number known to be handed out
+        self.admitted = 0.0  # tickets up to this number may enter, as of the last sync
+        self._latencies = deque(maxlen=500)
+        self._healthy = True
+        self._synced = time.monotonic()
+        self._connection = None
+        self._lock = asyncio.Lock()
+        self._syncer: Optional[asyncio.Task] = None
+
+    def _p95(self) -> float:
+        if not self._latencies:
+            return 0.0
+        ordered = sorted(self._latencies)
+        return ordered[int(len(ordered) * 0.95)]
+
+    def _watermark(self) -> float:
+        """The shared watermark extrapolated from the last sync"""
+        return min(float(self.issued), self.admitted + self.rate * (time.monotonic() - self._synced))
+
+    @property
+    def connected(self) -> bool:
+        return self._connection is not None
+
+    def is_open(self) -> bool:
+        """No queue and no pressure: requests without a ticket may pass"""
+        return not self.connected or (self._watermark() >= self.issued and self._healthy)
+
+    async def issue(self, holder: Optional[str]) -> str:
+        """Queue ticket for the user identified by `holder` (see `ticket_holder`)"""
+        connection = self._connection
+        if connection is None:
+            raise QueueUnavailable()
+        try:
+            # One operation at a time on an asyncpg connection
+            async with self._lock:
+                seq = await connection.fetchval("SELECT nextval('waiting_room_ticket_seq')")
+        except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError) as exc:
+            raise QueueUnavailable() from exc
+        self.issued = max(self.issued, seq)
+        return self._encode({"seq": seq, "holder": holder})
+
+    def admission_pass(self, seq: int, holder: Optional[str]) -> str:
+        return self._encode({"seq": seq, "adm": int(time.time()), "holder": holder})
+
+    def check(self, ticket: str, holder: Optional[str]) -> Tuple[bool, int, Optional[dict]]:
+        """Return (admitted, position, payload); payload is None for an invalid, expired or someone else's ticket"""
+        try:
+            payload = jwt.decode(ticket, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        except JWTError:
+            return False, 0, None
+        if payload.get("type") != "queue" or not isinstance(payload.get("seq"), int):
+            return False, 0, None
+        if payload.get("holder") != holder:
+            return False, 0, None
+        if "adm" in payload and time.time() - payload["adm"] > self.admission_ttl:
+            return False, 0, None
+        # A ticket taken from another worker since the last sync is simply not admitted yet
+        seq = payload["seq"]
+        admitted = self._watermark()
+        return seq <= admitted, max(seq - int(admitted), 0), payload
+
+    def retry_after(self, position: int) -> int:
+        return max(1, int(position / self.rate) + 1)
+
+    def record_latency(self, seconds: float) -> None:
+        self._latencies.append(seconds)
+
+    def _encode(self, claims: dict) -> str:
+        claims = {**claims, "type": "queue"}
+        return jwt.encode(claims, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+    async def sync(self) -> None:
+        """Report this worker's health and read the shared state back"""
+        self._healthy = (
+            self._p95() <= self.target_latency
+            and pool_stats()["occupancy"] <= self.target_occupancy
+        )
+        async with self._lock:
+            row = await self._connection.fetchrow(_SYNC, self._healthy, self.min_rate, self.max_rate)
+        self.issued, self.admitted, self.rate = max(self.issued, row["issued"]), row["admitted"], row["rate"]
+        self._synced = time.monotonic()
+
+    async def start(self) -> None:
+        if settings.WAITING_ROOM_ENABLED and self._syncer is None:
+            self._syncer = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._syncer is not None:
+            self._syncer.cancel()
+            try:
+                await self._syncer
+            except asyncio.CancelledError:
+                pass
+            self._syncer = None
+
+    async def connect(self) -> None:
+        dsn = make_url(settings.DATABASE_URL).set(drivername="postgresql").render_as_string(hide_password=False)
+        connection = await asyncpg.connect(dsn)
+        try:
+            await connection.execute(
+                "INSERT INTO t_waiting_room (id, admitted, rate, healthy) VALUES (1, 0, $1, true) "
+                "ON CONFLICT (id) DO NOTHING",
+                self.max_rate,
+            )
+        except BaseException:
+            await connection.close()
+            raise
+        self._connection = connection
+        await self.sync()
+
+    async def close(self) -> None:
+        connection, self._connection = self._connection, None
+        if connection is not None and not connection.is_closed():
+            await connection.close()
+
+    async def _run(self) -> None:
+        """Keep the shared state connection open and synced, reconnecting with backoff"""
+        delay = 1.0
+        while True:
+            try:
+                await self.connect()
+            except Exception:
+                logger.warning("Waiting room could not reach its shared state; retrying in %.0fs", delay, exc_info=True)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+                continue
+
+            delay = 1.0
+            try:
+                while True:
+                    await asyncio.sleep(self.sync_interval)
+                    await self.sync()
+            except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError):
+                logger.warning("Waiting room lost its shared state connection; reconnecting", exc_info=True)
+            finally:
+                await self.close()
+
+
+admission = AdmissionController(
+    min_rate=settings.WAITING_ROOM_MIN_RATE,
+    max_rate=settings.WAITING_ROOM_MAX_RATE,
+    target_latency=settings.WAITING_ROOM_TARGET_LATENCY_MS / 1000,
+    target_occupancy=settings.WAITING_ROOM_TARGET_POOL_OCCUPANCY,
+    admission_ttl=settings.WAITING_ROOM_ADMISSION_TTL,
+    sync_interval=settings.WAITING_ROOM_SYNC_INTERVAL,
+)
+
+
+def ticket_holder(authorization: Optional[str]) -> Optional[str]:
+    """Hash of the subject of a valid bearer token, or None"""
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
+    if payload.get("type") != "access" or payload.get("sub") is None:
+        return None
+    return hashlib.sha256(f"{settings.SECRET_KEY}:{payload['sub']}".encode()).hexdigest()[:16]
+
+
+def _queued(ticket: str, position: int) -> HTTPException:
+    retry_after = admission.retry_after(position)
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail={
+            "message": "High demand: you are in the waiting room",
+            "ticket": ticket,
+            "position": position,
+            "status_url": "/waiting-room/status",
+        },
+        headers={TICKET_HEADER: ticket, "Retry-After": str(retry_after)},
+    )
+
+
+async def admission_gate(request: Request, response: Response):
+    """Router dependency that queues requests while the API is under pressure"""
+    if not settings.WAITING_ROOM_ENABLED:
+        yield
+        return
+
+    holder = ticket_holder(request.headers.get("Authorization"))
+    ticket = request.headers.get(TICKET_HEADER)
+    if ticket:
+        admitted, position, payload = admission.check(ticket, holder)
+        if payload is None:
+            ticket = None
+        elif not admitted:
+            raise _queued(ticket, position)
+        elif "adm" not in payload:
+            # First pass through the gate starts the admission TTL
+            response.headers[TICKET_HEADER] = admission.admission_pass(payload["seq"], holder)
+
+    if not ticket and not admission.is_open():
+        try:
+            ticket = await admission.issue(holder)
+        except QueueUnavailable:
+            logger.warning("Waiting room unavailable; letting the request through")
+        else:
+            _, position, _ = admission.check(ticket, holder)
+            raise _queued(ticket, position)
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        admission.record_latency(time.perf_counter() - start)
@@ -10,6 +10,7 @@ from app.db.session import get_db
 from app.models.user import User
 from app.models.role import RoleEnum
 from app.core.security import decode_token
+from app.core.timing import measure
 from sqlalchemy import select
 
 security = HTTPBearer()
@@ -26,7 +27,8 @@ async def get_current_user(
     token = credentials.credentials
     logger.debug(f"Attempting to decode token (length: {len(token) if token else 0})")
     
-    payload = decode_token(token)
+    with measure("auth"):
+        payload = decode_token(token)
     
     if payload is None:
         from jose import jwt, JWTError
@@ -75,7 +77,8 @@ async def get_current_user(
             detail="Invalid token payload: subject must be a valid user ID",
         )
     
-    result = await db.execute(select(User).where(User.id == user_id))
+    with measure("auth"):
+        result = await db.execute(select(User).where(User.id == user_id))
     user = result.scalar_one_or_none()
     
     if user is None or not user.is_active:
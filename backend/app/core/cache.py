@@ -0,0 +1,148 @@
+"""
+Bounded in-process cache
+
+Entries expire after a TTL and the least recently used ones are evicted
+once either the entry count or the memory budget is exceeded. Sizes come
+from a `sizeof` function given to the cache, so the budget is an estimate
+of payload size rather than exact Python heap use.
+
+A miss is filled with `fill()`: if the key is invalidated while the value
+is being loaded, the loaded value is returned to the caller but not
+stored, so a read racing a write cannot put stale data back. Concurrent
+misses of the same key in `get_or_load()` share one load (single-flight),
+but a miss after an invalidation never joins a load started before it.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+from app.core.singleflight import SingleFlight
+
+_caches: Dict[str, "TTLCache"] = {}
+
+
+class TTLCache:
+    """LRU cache with per-entry expiry, an entry cap and a memory cap"""
+
+    def __init__(
+        self,
+        ttl: float,
+        max_entries: int,
+        max_bytes: int,
+        sizeof: Callable[[Any], int],
+        name: str,
+    ):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        # key -> (expires_at, size, value), least recently used first
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._bytes = 0
+        # Loads in progress per key and invalidations seen while they ran
+        self._loading: Dict[Hashable, int] = {}
+        self._invalidated: Dict[Hashable, int] = {}
+        self._clears = 0
+        self._flight = SingleFlight(name)
+        self.stats = {"hits": 0, "misses": 0, "fills": 0, "stale_fills": 0, "evictions": 0, "expirations": 0}
+        _caches[name] = self
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Cached value or None (values are never None)"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry[2]
+            self._remove(key)
+            self.stats["expirations"] += 1
+        self.stats["misses"] += 1
+        return None
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting least recently used entries to stay within the caps"""
+        size = self.sizeof(value)
+        self._remove(key)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, size, value)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.stats["evictions"] += 1
+
+    async def fill(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+        """Load a missing value and store it unless the key was invalidated meanwhile"""
+        clears = self._clears
+        seen = self._invalidated.get(key, 0)
+        self._loading[key] = self._loading.get(key, 0) + 1
+        try:
+            value = await load()
+            if value is not None:
+                if self._clears == clears and self._invalidated.get(key, 0) == seen:
+                    self.set(key, value)
+                    self.stats["fills"] += 1
+                else:
+                    self.stats["stale_fills"] += 1
+            return value
+        finally:
+            remaining = self._loading[key] - 1
+            if remaining:
+                self._loading[key] = remaining
+            else:
+                del self._loading[key]
+                self._invalidated.pop(key, None)
+
+    async def get_or_load(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+        value = self.get(key)
+        if value is None:
+            # Loads started before an invalidation of the key are not shared
+            # with callers arriving after it, which must see the write
+            generation = (key, self._clears, self._invalidated.get(key, 0))
+            value = await self._flight.do(generation, lambda: self.fill(key, load))
+        return value
+
+    def invalidate(self, key: Hashable) -> None:
+        self._remove(key)
+        if key in self._loading:
+            self._invalidated[key] = self._invalidated.get(key, 0) + 1
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]) -> None:
+        """Invalidate every cached or loading key matching `predicate`"""
+        for key in [k for k in self._entries if predicate(k)]:
+            self._remove(key)
+        for key in [k for k in self._loading if predicate(k)]:
+            self._invalidated[key] = self._invalidated.get(key, 0) + 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+        self._clears += 1
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+    def snapshot(self) -> dict:
+        """Counters plus current occupancy and hit rate"""
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate": self.stats["hits"] / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+        }
+
+
+def cache_stats() -> List[dict]:
+    """Counters of every TTL cache in this worker"""
+    return [{"name": cache.name, **cache.snapshot()} for cache in _caches.values()]
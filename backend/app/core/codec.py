@@ -0,0 +1,155 @@
+"""
+Shared response codec
+
+Status code labels used by every application listing, and a fast JSON
+path for large lists built from trusted database rows. A `RowCodec`
+serializes plain dicts shaped like a response model with a precompiled
+pydantic-core serializer: no model instance per row, and returning the
+bytes as a Response also skips FastAPI's second validation against
+`response_model`, which is then only used for the OpenAPI schema.
+
+Only use it for rows the code builds itself; input from clients still
+goes through model validation.
+
+Sparse fieldsets (`?fields=a,b`) are handled by a `Projection`: each
+response field names the SQL columns it is built from, so only the
+columns of requested fields are selected and only those fields encoded.
+"""
+
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Type, Union
+from fastapi import HTTPException, Query, Response, status
+from pydantic import BaseModel, TypeAdapter
+from typing_extensions import TypedDict
+
+APPLICATION_STATUS = {"Y": "Selected", "N": "Submitted", "R": "Rejected", "P": "Pending", "W": "Waitlisted", "D": "Declined"}
+PAYMENT_STATUS = {"Y": "Paid", "N": "Unpaid", "P": "Pending"}
+CERTIFICATE_STATUS = {"Y": "Issued", "N": "Not Issued", "P": "Pending"}
+
+Fields = Tuple[str, ...]
+
+
+def application_status(code: str) -> str:
+    return APPLICATION_STATUS.get(code, "Pending")
+
+
+def payment_status(code: str) -> str:
+    return PAYMENT_STATUS.get(code, "Pending")
+
+
+def certificate_status(code: str) -> str:
+    return CERTIFICATE_STATUS.get(code, "Not Issued")
+
+
+class RowCodec:
+    """Precompiled JSON serializer for lists of dict rows shaped like `model`"""
+
+    def __init__(self, model: Type[BaseModel], fields: Optional[Fields] = None):
+        # Same field types as the model; serializing a TypedDict needs no instances
+        annotations: Dict[str, Any] = {
+            name: field.annotation
+            for name, field in model.model_fields.items()
+            if fields is None or name in fields
+        }
+        self.model = model
+        self._adapter = TypeAdapter(List[TypedDict(f"{model.__name__}Row", annotations)])
+
+    def dump(self, rows: Iterable[Mapping[str, Any]]) -> bytes:
+        return self._adapter.dump_json(rows if isinstance(rows, list) else list(rows))
+
+    def response(self, rows: Iterable[Mapping[str, Any]], status_code: int = 200) -> Response:
+        return Response(content=self.dump(rows), status_code=status_code, media_type="application/json")
+
+
+def field_selection(model: Type[BaseModel]) -> Callable[..., Optional[Fields]]:
+    """
+    Dependency parsing `?fields=a,b` against the fields of `model`.
+
+    Yields the selected names in model order, or None for all fields.
+    """
+    names = tuple(model.model_fields)
+
+    def dependency(
+        fields: Optional[str] = Query(
+            None,
+            description=f"Comma-separated subset of: {', '.join(names)}"
+        ),
+    ) -> Optional[Fields]:
+        if not fields:
+            return None
+        requested = {name.strip() for name in fields.split(",") if name.strip()}
+        unknown = sorted(requested.difference(names))
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(unknown)}"
+            )
+        return tuple(name for name in names if name in requested) or None
+
+    return dependency
+
+
+def _row_builder(builders) -> Callable[[Sequence[Any]], dict]:
+    """One function building a response dict from a row"""
+    # A copied field has a single column; a built one passes its columns to `build`
+    steps = tuple((name, tuple(indexes), build) for name, indexes, build in builders)
+
+    def build_row(row: Sequence[Any]) -> dict:
+        return {
+            name: row[indexes[0]] if build is None else build(*[row[i] for i in indexes])
+            for name, indexes, build in steps
+        }
+
+    return build_row
+
+
+# A response field is either a column copied as is, or the columns it is
+# built from plus the function building it
+Source = Union[Any, Tuple[Sequence[Any], Callable[..., Any]]]
+
+
+class Projection:
+    """Response fields of `model` mapped to SQL columns and row builders"""
+
+    def __init__(self, model: Type[BaseModel], sources: Dict[str, Source]):
+        missing = set(model.model_fields).difference(sources)
+        if missing:
+            raise ValueError(f"{model.__name__} fields without a source: {', '.join(sorted(missing))}")
+        self.model = model
+        self._sources = {}
+        for name in model.model_fields:
+            source = sources[name]
+            if isinstance(source, tuple):
+                self._sources[name] = (tuple(source[0]), source[1])
+            else:
+                self._sources[name] = ((source,), None)
+        self._plans = lru_cache(maxsize=64)(self._plan)
+
+    def _plan(self, fields: Optional[Fields]):
+        names = fields or tuple(self._sources)
+        columns: List[Any] = []
+        positions: Dict[int, int] = {}
+        builders = []
+        for name in names:
+            sources, build = self._sources[name]
+            indexes = []
+            for column in sources:
+                # Columns overload ==, so deduplicate by identity
+                if id(column) not in positions:
+                    positions[id(column)] = len(columns)
+                    columns.append(column)
+                indexes.append(positions[id(column)])
+            builders.append((name, indexes, build))
+        return tuple(columns), _row_builder(builders), RowCodec(self.model, fields)
+
+    def columns(self, fields: Optional[Fields] = None) -> Tuple[Any, ...]:
+        """Columns to select for `fields` (None: all fields)"""
+        return self._plans(fields)[0]
+
+    def rows(self, result_rows: Iterable[Sequence[Any]], fields: Optional[Fields] = None) -> List[dict]:
+        """Dicts of the requested fields from rows selected with `columns(fields)`"""
+        build_row = self._plans(fields)[1]
+        return [build_row(row) for row in result_rows]
+
+    def codec(self, fields: Optional[Fields] = None) -> RowCodec:
+        return self._plans(fields)[2]
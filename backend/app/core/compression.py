@@ -0,0 +1,199 @@
+"""
+Response compression
+
+`CompressionMiddleware` negotiates brotli or gzip from Accept-Encoding and
+compresses textual responses of at least COMPRESSION_MINIMUM_SIZE bytes,
+streaming responses included. Responses that already carry a
+Content-Encoding pass through untouched.
+
+Hot payloads that are reused across requests (news feeds, master data)
+are wrapped in `Precompressed`, which compresses each encoding once and
+keeps the result, so serving them costs no compression CPU per request.
+
+Brotli is used when the `brotli` package is installed; gzip otherwise.
+"""
+
+import gzip
+import zlib
+from typing import Dict, Optional
+from fastapi import Request, Response
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.conditional import content_validators
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+    "text/",
+)
+
+
+def available_encodings() -> tuple:
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Best encoding the client accepts (q > 0), preferring brotli"""
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip()] = quality
+    wildcard = accepted.get("*", 0.0)
+    for encoding in available_encodings():
+        if accepted.get(encoding, wildcard) > 0:
+            return encoding
+    return None
+
+
+# Precompressed payloads are compressed once and served many times, so
+# they can afford levels too slow for per-response compression
+PRECOMPRESSED_LEVELS = {"br": 9, "gzip": 9}
+
+
+def compress(body: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    if encoding == "br":
+        quality = settings.COMPRESSION_BROTLI_QUALITY if level is None else level
+        return brotli.compress(body, quality=quality)
+    level = settings.COMPRESSION_GZIP_LEVEL if level is None else level
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+def _compressor(encoding: str):
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+        return compressor.process, compressor.finish
+    compressor = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+    return compressor.compress, compressor.flush
+
+
+def _compressible(headers: Headers) -> bool:
+    content_type = headers.get("content-type", "").lower()
+    return (
+        content_type.startswith(COMPRESSIBLE_TYPES)
+        # Event streams must reach the client event by event
+        and not content_type.startswith("text/event-stream")
+        and "content-encoding" not in headers
+    )
+
+
+class Precompressed:
+    """An encoded payload with its compressed variants kept alongside"""
+
+    def __init__(self, body: bytes, media_type: str = "application/json"):
+        self.body = body
+        self.media_type = media_type
+        self.validators = content_validators(body)
+        self._encoded: Dict[str, bytes] = {}
+
+    def __len__(self) -> int:
+        return len(self.body)
+
+    @property
+    def nbytes(self) -> int:
+        """Body plus every variant compressed so far"""
+        return len(self.body) + sum(len(data) for data in self._encoded.values())
+
+    def encoded(self, encoding: str) -> bytes:
+        data = self._encoded.get(encoding)
+        if data is None:
+            data = self._encoded[encoding] = compress(self.body, encoding, PRECOMPRESSED_LEVELS[encoding])
+        return data
+
+    def response(self, request: Request, headers: Optional[dict] = None) -> Response:
+        """The body in the best encoding the request accepts"""
+        headers = dict(headers or {})
+        body = self.body
+        if len(body) >= settings.COMPRESSION_MINIMUM_SIZE:
+            headers["Vary"] = "Accept-Encoding"
+            encoding = choose_encoding(request.headers.get("accept-encoding", ""))
+            if encoding is not None:
+                body = self.encoded(encoding)
+                headers["Content-Encoding"] = encoding
+        return Response(content=body, media_type=self.media_type, headers=headers)
+
+
+class CompressionMiddleware:
+    """Pure ASGI gzip/brotli compression with a minimum size"""
+
+    def __init__(self, app: ASGIApp, minimum_size: Optional[int] = None):
+        self.app = app
+        self.minimum_size = settings.COMPRESSION_MINIMUM_SIZE if minimum_size is None else minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, _CompressingSend(send, encoding, self.minimum_size))
+
+
+class _CompressingSend:
+    """Send wrapper deciding on the first body message whether to compress"""
+
+    def __init__(self, send: Send, encoding: str, minimum_size: int):
+        self.send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.start: Optional[Message] = None
+        self.process = None
+        self.finish = None
+        self.passthrough = False
+
+    async def __call__(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.process is None:
+            headers = MutableHeaders(raw=self.start["headers"])
+            if not _compressible(headers) or self.start["status"] in (204, 304):
+                self.passthrough = True
+            elif not more_body and len(body) < self.minimum_size:
+                headers.add_vary_header("Accept-Encoding")
+                self.passthrough = True
+            if self.passthrough:
+                await self.send(self.start)
+                await self.send(message)
+                return
+
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if not more_body:
+                # Whole body in one message: compress it in one go
+                body = compress(body, self.encoding)
+                headers["Content-Length"] = str(len(body))
+                await self.send(self.start)
+                await self.send({"type": "http.response.body", "body": body})
+                return
+            del headers["Content-Length"]
+            self.process, self.finish = _compressor(self.encoding)
+            await self.send(self.start)
+
+        chunk = self.process(body)
+        if not more_body:
+            chunk += self.finish()
+        if chunk or not more_body:
+            await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
@@ -0,0 +1,96 @@
+"""
+Conditional GET
+
+List endpoints derive validators from a one-row aggregate query (row
+count, highest primary key and latest `updated_date` of every table the
+response reads) or from an already encoded payload. A client presenting a
+matching `If-None-Match` or a fresh enough `If-Modified-Since` gets a 304
+before any rows are loaded or serialized.
+
+The ETag is authoritative: counts and keys catch deletes and inserts that
+leave `updated_date` alone. `If-Modified-Since` is only consulted when the
+request has no `If-None-Match`, as RFC 9110 requires.
+"""
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, NamedTuple, Optional
+from fastapi import Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Browsers keep the body but revalidate on every poll
+CACHE_CONTROL = "private, no-cache"
+
+
+class Validators(NamedTuple):
+    etag: str
+    last_modified: Optional[datetime]  # UTC, naive
+
+
+def _utc(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def make_validators(*parts: Any) -> Validators:
+    """Weak ETag over `parts`; Last-Modified is the latest datetime among them"""
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+    moments = [_utc(part) for part in parts if isinstance(part, datetime)]
+    return Validators(f'W/"{digest}"', max(moments) if moments else None)
+
+
+def content_validators(body: bytes) -> Validators:
+    """Validators for a payload that is already encoded"""
+    return Validators(f'W/"{hashlib.blake2b(body, digest_size=12).hexdigest()}"', None)
+
+
+async def query_validators(db: AsyncSession, statement, *parts: Any) -> Validators:
+    """Validators from a one-row aggregate statement plus `parts` (owner, field selection)"""
+    row = (await db.execute(statement)).one()
+    return make_validators(*row, *parts)
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def is_not_modified(request: Request, validators: Validators) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        # Weak comparison: a W/ prefix on either side does not matter for GET
+        current = _opaque(validators.etag)
+        return any(_opaque(tag) == current for tag in if_none_match.split(","))
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and validators.last_modified is not None:
+        try:
+            since = _utc(parsedate_to_datetime(if_modified_since))
+        except (TypeError, ValueError):
+            return False
+        # HTTP dates have whole-second resolution
+        return validators.last_modified.replace(microsecond=0) <= since
+    return False
+
+
+def validator_headers(validators: Validators) -> dict:
+    headers = {"ETag": validators.etag, "Cache-Control": CACHE_CONTROL}
+    if validators.last_modified is not None:
+        headers["Last-Modified"] = format_datetime(validators.last_modified.replace(tzinfo=timezone.utc), usegmt=True)
+    return headers
+
+
+def not_modified(request: Request, validators: Validators) -> Optional[Response]:
+    """A 304 response when the client's copy is current, else None"""
+    if is_not_modified(request, validators):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=validator_headers(validators))
+    return None
+
+
+def with_validators(response: Response, validators: Validators) -> Response:
+    response.headers.update(validator_headers(validators))
+    return response
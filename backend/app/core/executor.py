@@ -0,0 +1,39 @@
+"""
+Process pool for CPU-bound batch jobs (merit ranking, seat allocation)
+"""
+
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Optional
+from app.core.config import settings
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Create the shared worker pool on first use"""
+    global _pool
+    if _pool is None:
+        # spawn keeps the event loop, pool connections and threads of the
+        # API worker out of the child processes
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.PROCESS_POOL_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+async def run_in_process(fn, *args, **kwargs):
+    """Run a picklable function in the worker pool without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_process_pool(), partial(fn, *args, **kwargs))
+
+
+def shutdown_process_pool() -> None:
+    """Stop the worker pool (called on application shutdown)"""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
@@ -0,0 +1,195 @@
+"""
+Cache invalidation bus
+
+In-process caches subscribe to key prefixes; a change to a key is
+delivered to every subscriber whose prefix it falls under, in every
+worker. A key names what changed, `<kind>` or `<kind>:<ids>`, e.g.
+`news`, `master:m_state` or `application:12,97`. A subscriber of prefix
+`application` receives both `application:12` and the bare `application`
+(every applicant); the empty key reaches every subscriber.
+
+- Writes in this worker are delivered locally (`deliver()`) by the
+  caches' own ORM hooks as soon as they commit.
+- Every worker keeps one dedicated asyncpg connection (outside the pool)
+  that LISTENs on CHANNEL. Statement-level triggers on the cached tables
+  send the changed keys with `pg_notify`, which covers other workers,
+  other containers and writes from outside the app. Notifications start
+  with the origin of the pooled connection that wrote them (set on
+  connect), so a worker skips its own writes, which it already delivered.
+- `publish()` sends keys that no trigger covers.
+- Whenever the listener (re)connects, notifications may have been missed,
+  so every subscriber gets the empty key: a full invalidation.
+
+With the bus running, caches can keep long TTLs; the TTL only bounds
+staleness if the listener is down or the triggers are not installed.
+"""
+
+import asyncio
+import logging
+import uuid
+from typing import Callable, Iterable, List, Optional, Set, Tuple
+import asyncpg
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from app.core.config import settings
+from app.db.session import engine
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "cache_invalidation"  # also named by the triggers' migration
+ORIGIN = uuid.uuid4().hex[:12]
+# pg_notify payloads must stay below 8000 bytes
+_PAYLOAD_LIMIT = 7000
+_KEEPALIVE = 30.0  # seconds between checks of the listener connection
+
+Subscriber = Callable[[str], None]
+
+
+def expand(key: str) -> List[str]:
+    """`kind:1,2` -> [`kind:1`, `kind:2`]"""
+    kind, separator, ids = key.rpartition(":")
+    if not separator or "," not in ids:
+        return [key]
+    return [f"{kind}:{i}" for i in ids.split(",") if i]
+
+
+def key_id(key: str) -> Optional[int]:
+    """The id in `kind:<id>`, None for a key naming the whole kind"""
+    _, separator, tail = key.rpartition(":")
+    return int(tail) if separator and tail.isdigit() else None
+
+
+class InvalidationBus:
+    """Prefix subscriptions fed locally and by LISTEN/NOTIFY"""
+
+    def __init__(self, channel: str, origin: str):
+        self.channel = channel
+        self.origin = origin
+        self._subscribers: List[Tuple[str, Subscriber]] = []
+        self._connection = None
+        self._lock = asyncio.Lock()
+        self._listener: Optional[asyncio.Task] = None
+        self._sending: Set[asyncio.Task] = set()
+        self.stats = {"delivered": 0, "notified": 0, "received": 0, "connects": 0}
+
+    def subscribe(self, prefix: str, subscriber: Subscriber) -> None:
+        self._subscribers.append((prefix, subscriber))
+
+    def deliver(self, keys: Iterable[str]) -> None:
+        """Pass keys to the subscribers in this worker"""
+        for packed in keys:
+            for key in expand(packed):
+                for prefix, subscriber in self._subscribers:
+                    if key.startswith(prefix) or prefix.startswith(key):
+                        try:
+                            subscriber(key)
+                        except Exception:
+                            logger.exception("Invalidation subscriber failed for %r", key)
+                self.stats["delivered"] += 1
+
+    def publish(self, *keys: str) -> None:
+        """Deliver keys here and notify the other workers (for changes no trigger reports)"""
+        self.deliver(keys)
+        if self._connection is None:
+            return
+        for payload in self._payloads(keys):
+            task = asyncio.get_running_loop().create_task(self._notify(payload))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+
+    def _payloads(self, keys: Iterable[str]) -> List[str]:
+        payloads = []
+        for key in keys:
+            kind, _, ids = key.rpartition(":") if "," in key else ("", "", "")
+            if not kind or len(key) <= _PAYLOAD_LIMIT:
+                payloads.append(f"{self.origin} {key}")
+                continue
+            # Split long id lists over several notifications
+            chunk: List[str] = []
+            size = 0
+            for i in ids.split(","):
+                if chunk and size + len(i) + 1 > _PAYLOAD_LIMIT:
+                    payloads.append(f"{self.origin} {kind}:{','.join(chunk)}")
+                    chunk, size = [], 0
+                chunk.append(i)
+                size += len(i) + 1
+            payloads.append(f"{self.origin} {kind}:{','.join(chunk)}")
+        return payloads
+
+    async def _notify(self, payload: str) -> None:
+        connection = self._connection
+        if connection is None:
+            return
+        try:
+            # One operation at a time on an asyncpg connection
+            async with self._lock:
+                await connection.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+            self.stats["notified"] += 1
+        except Exception:
+            logger.warning("Could not notify other workers of %r", payload, exc_info=True)
+
+    def _received(self, connection, pid, channel, payload: str) -> None:
+        origin, _, key = payload.partition(" ")
+        if origin == self.origin:
+            return
+        self.stats["received"] += 1
+        self.deliver((key,))
+
+    async def start(self) -> None:
+        if settings.INVALIDATION_BUS_ENABLED and self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+    async def _listen(self) -> None:
+        """Keep a LISTEN connection open, reconnecting with backoff"""
+        dsn = make_url(settings.DATABASE_URL).set(drivername="postgresql").render_as_string(hide_password=False)
+        delay = 1.0
+        while True:
+            lost = asyncio.Event()
+            try:
+                connection = await asyncpg.connect(dsn)
+                connection.add_termination_listener(lambda _: lost.set())
+                await connection.add_listener(self.channel, self._received)
+            except Exception:
+                logger.warning("Invalidation listener could not connect; retrying in %.0fs", delay, exc_info=True)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+                continue
+
+            self._connection = connection
+            self.stats["connects"] += 1
+            # Changes made while not listening were missed
+            self.deliver(("",))
+            delay = 1.0
+            try:
+                while not lost.is_set():
+                    try:
+                        await asyncio.wait_for(lost.wait(), _KEEPALIVE)
+                    except asyncio.TimeoutError:
+                        # A silently dropped connection only shows up on use
+                        async with self._lock:
+                            await connection.fetchval("SELECT 1")
+                logger.warning("Invalidation listener connection lost; reconnecting")
+            except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError):
+                logger.warning("Invalidation listener connection lost; reconnecting", exc_info=True)
+            finally:
+                self._connection = None
+                if not connection.is_closed():
+                    await connection.close()
+
+
+invalidation_bus = InvalidationBus(CHANNEL, ORIGIN)
+
+
+@event.listens_for(engine.sync_engine, "connect")
+def _tag_connection(dbapi_connection, connection_record):
+    """Name this worker in trigger notifications caused by its own writes"""
+    dbapi_connection.run_async(lambda connection: connection.execute(f"SET app.origin = '{ORIGIN}'"))
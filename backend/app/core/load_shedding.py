@@ -0,0 +1,165 @@
+"""
+Load shedding
+
+Once the connection pool is exhausted, every further request waits up to
+DB_POOL_TIMEOUT for a connection and then fails anyway, while new ones
+keep arriving: latency collapses for everyone. `LoadSheddingMiddleware`
+refuses work it cannot serve in time with an immediate 503 and a
+`Retry-After`, before the request touches the database.
+
+Requests are classified by route into priorities:
+
+- critical: signing in and submitting applications
+- normal: other writes (document uploads included), and ticket polling
+  after a submission
+- low: reads (dashboards, lists, master data)
+
+Each priority has a limit on requests in flight in this worker and on
+callers waiting for a pooled connection; lower priorities hit theirs
+first, so under overload dashboards are turned away while logins and
+submissions still get connections. Health checks, metrics, the waiting
+room, static files and event streams are never shed.
+
+The waiting room (see `app.core.admission`) queues applicants fairly
+while the API is under pressure; shedding is the backstop that keeps
+tail latency bounded when load rises faster than the queue adapts.
+"""
+
+import json
+import math
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.core.config import settings
+from app.db.session import pool_stats
+
+CRITICAL = "critical"
+NORMAL = "normal"
+LOW = "low"
+EXEMPT = "exempt"
+PRIORITIES = (CRITICAL, NORMAL, LOW)
+
+# (method or None for any, path prefix, class); the first match wins
+ROUTE_CLASSES: Tuple[Tuple[Optional[str], str, str], ...] = (
+    (None, "/health", EXEMPT),
+    (None, "/metrics", EXEMPT),
+    (None, "/waiting-room", EXEMPT),
+    (None, "/uploads", EXEMPT),
+    (None, "/docs", EXEMPT),
+    (None, "/redoc", EXEMPT),
+    (None, "/openapi.json", EXEMPT),
+    ("GET", "/applicant/events", EXEMPT),
+    (None, "/auth/", CRITICAL),
+    ("GET", "/applicant/applications/intake/", NORMAL),
+    # Only the final submission itself; declines and document uploads are
+    # ordinary writes, and a slow upload must not hold a critical slot
+    ("POST", "/applicant/applications/intake", CRITICAL),
+    ("POST", "/applicant/applications/", NORMAL),
+    ("POST", "/applicant/applications", CRITICAL),
+)
+
+
+class Limits(NamedTuple):
+    in_flight: int  # requests of this priority being served
+    waiting: int  # callers waiting for a pooled connection
+
+
+def route_class(method: str, path: str) -> str:
+    if path == "/":
+        return EXEMPT
+    for rule_method, prefix, cls in ROUTE_CLASSES:
+        if (rule_method is None or rule_method == method) and path.startswith(prefix):
+            return cls
+    return LOW if method in ("GET", "HEAD") else NORMAL
+
+
+def default_limits() -> Dict[str, Limits]:
+    return {
+        CRITICAL: Limits(settings.SHED_CRITICAL_MAX_IN_FLIGHT, settings.SHED_CRITICAL_MAX_WAITING),
+        NORMAL: Limits(settings.SHED_NORMAL_MAX_IN_FLIGHT, settings.SHED_NORMAL_MAX_WAITING),
+        LOW: Limits(settings.SHED_LOW_MAX_IN_FLIGHT, settings.SHED_LOW_MAX_WAITING),
+    }
+
+
+class LoadShedder:
+    """In-flight counts per priority and the decision to shed"""
+
+    def __init__(self, limits: Dict[str, Limits], pressure: Callable[[], dict] = pool_stats):
+        self.limits = limits
+        self.pressure = pressure
+        self.in_flight = {priority: 0 for priority in PRIORITIES}
+        self.stats = {priority: {"admitted": 0, "shed": 0, "peak_in_flight": 0} for priority in PRIORITIES}
+
+    def admit(self, priority: str) -> Optional[int]:
+        """Count the request in and return None, or return Retry-After seconds to shed it"""
+        limits = self.limits[priority]
+        pool = self.pressure()
+        if self.in_flight[priority] >= limits.in_flight or pool["waiting"] > limits.waiting:
+            self.stats[priority]["shed"] += 1
+            # Roughly the time for the current waiters to be served
+            return max(1, math.ceil(pool["waiting"] / max(pool["capacity"], 1)))
+        self.in_flight[priority] += 1
+        stats = self.stats[priority]
+        stats["admitted"] += 1
+        stats["peak_in_flight"] = max(stats["peak_in_flight"], self.in_flight[priority])
+        return None
+
+    def release(self, priority: str) -> None:
+        self.in_flight[priority] -= 1
+
+    def snapshot(self) -> dict:
+        pool = self.pressure()
+        return {
+            "enabled": settings.LOAD_SHEDDING_ENABLED,
+            "pool_waiting": pool["waiting"],
+            "pool_timeouts": pool["timeouts"],
+            "priorities": [
+                {
+                    "priority": priority,
+                    **self.stats[priority],
+                    "in_flight": self.in_flight[priority],
+                    "max_in_flight": self.limits[priority].in_flight,
+                    "max_waiting": self.limits[priority].waiting,
+                }
+                for priority in PRIORITIES
+            ],
+        }
+
+
+shedder = LoadShedder(default_limits())
+
+_BUSY = json.dumps({"detail": "Server is busy, please retry shortly"}).encode()
+
+
+class LoadSheddingMiddleware:
+    """Pure ASGI middleware answering 503 + Retry-After when a priority is over its limits"""
+
+    def __init__(self, app: ASGIApp, load_shedder: Optional[LoadShedder] = None):
+        self.app = app
+        self.shedder = load_shedder or shedder
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.LOAD_SHEDDING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        priority = route_class(scope["method"], scope["path"])
+        if priority == EXEMPT:
+            await self.app(scope, receive, send)
+            return
+
+        retry_after = self.shedder.admit(priority)
+        if retry_after is not None:
+            await send({
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(_BUSY)).encode()),
+                    (b"retry-after", str(retry_after).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": _BUSY})
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.shedder.release(priority)
@@ -0,0 +1,264 @@
+"""
+Metrics in the Prometheus text format
+
+`GET /metrics` renders every metric of this worker (scrape each worker, or
+aggregate them in Prometheus). Recording is kept off the hot path's
+critical cost:
+
+- Series are plain lists and dicts updated from the event loop thread, so
+  no locks are taken; a histogram's buckets are preallocated when its
+  label values are first seen and an observation is a bisect and two
+  additions.
+- Route labels use the route template, such as
+  `/applicant/applications/{application_id}`, never the raw path, so the
+  number of series stays bounded.
+- Values that already exist elsewhere (pool usage, cache and single-flight
+  counters, load shedding) are read by collectors at scrape time instead of
+  being recorded per request.
+
+`python benchmarks/bench_metrics.py` measures the cost per request.
+"""
+
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.cache import cache_stats
+from app.core.config import settings
+from app.core.load_shedding import shedder
+from app.core.singleflight import singleflight_stats
+from app.db.events import track_queries
+from app.db.session import pool_stats
+from app.services.news_feed import news_feed
+
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# A collector returns (name, type, help, [(label pairs, value)]) families
+Family = Tuple[str, str, str, List[Tuple[Tuple[Tuple[str, str], ...], float]]]
+
+_metrics: List["_Metric"] = []
+_collectors: List[Callable[[], Iterable[Family]]] = []
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(pairs: Iterable[Tuple[str, str]]) -> str:
+    text = ",".join(f'{name}="{_escape(str(value))}"' for name, value in pairs)
+    return "{" + text + "}" if text else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        # label values -> value(s)
+        self._series: Dict[tuple, object] = {}
+        if not self.labelnames and self.kind != "histogram":
+            self._series[()] = 0
+        _metrics.append(self)
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.kind}"
+        for values, value in self._series.items():
+            yield from self._render_series(tuple(zip(self.labelnames, values)), value)
+
+    def _render_series(self, pairs, value) -> Iterable[str]:
+        yield f"{self.name}{_labels(pairs)} {_number(value)}"
+
+
+class Counter(_Metric):
+    """Monotonic count per label values"""
+
+    kind = "counter"
+
+    def inc(self, labels: tuple = (), amount: float = 1) -> None:
+        series = self._series
+        series[labels] = series.get(labels, 0) + amount
+
+
+class Gauge(_Metric):
+    """Current value per label values"""
+
+    kind = "gauge"
+
+    def inc(self, labels: tuple = (), amount: float = 1) -> None:
+        series = self._series
+        series[labels] = series.get(labels, 0) + amount
+
+    def dec(self, labels: tuple = (), amount: float = 1) -> None:
+        series = self._series
+        series[labels] = series.get(labels, 0) - amount
+
+
+class Histogram(_Metric):
+    """Observations per label values in fixed buckets, plus their sum"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, labels: tuple = ()) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            # One count per bucket, one for +Inf, then the sum
+            series = self._series[labels] = [0] * (len(self.buckets) + 2)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def _render_series(self, pairs, series) -> Iterable[str]:
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), series):
+            cumulative += count
+            yield f"{self.name}_bucket{_labels(pairs + (('le', _number(float(bound))),))} {cumulative}"
+        yield f"{self.name}_sum{_labels(pairs)} {_number(series[-1])}"
+        yield f"{self.name}_count{_labels(pairs)} {cumulative}"
+
+
+def collector(fn: Callable[[], Iterable[Family]]) -> Callable[[], Iterable[Family]]:
+    """Register a function returning metric families read at scrape time"""
+    _collectors.append(fn)
+    return fn
+
+
+def render_metrics() -> str:
+    """Every metric of this worker in the Prometheus text format"""
+    lines: List[str] = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    for collect in _collectors:
+        for name, kind, documentation, samples in collect():
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(f"{name}{_labels(pairs)} {_number(value)}" for pairs, value in samples)
+    lines.append("")
+    return "\n".join(lines)
+
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Time to serve a request, by route template", ("method", "route")
+)
+REQUESTS = Counter(
+    "http_requests_total", "Requests served, by route template and status", ("method", "route", "status")
+)
+IN_FLIGHT = Gauge("http_requests_in_flight", "Requests being served")
+REQUEST_QUERIES = Histogram(
+    "http_request_queries", "SQL statements executed per request", ("method", "route"), buckets=QUERY_BUCKETS
+)
+QUERY_SECONDS = Counter("db_query_seconds_total", "Time spent executing SQL statements in requests")
+PASSWORD_HASH_SECONDS = Histogram(
+    "password_hash_seconds", "Time to hash or verify a password with argon2", ("operation",)
+)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording latency, status and queries per route"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        status = [500]
+
+        async def send_status(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        IN_FLIGHT.inc()
+        start = time.perf_counter()
+        with track_queries() as queries:
+            try:
+                await self.app(scope, receive, send_status)
+            finally:
+                elapsed = time.perf_counter() - start
+                IN_FLIGHT.dec()
+                # Set by the router on the shared scope once a route matched
+                route = scope.get("route")
+                template = getattr(route, "path_format", None) or "unmatched"
+                labels = (scope["method"], template)
+                REQUEST_SECONDS.observe(elapsed, labels)
+                REQUEST_QUERIES.observe(queries.count, labels)
+                REQUESTS.inc(labels + (status[0],))
+                if queries.count:
+                    QUERY_SECONDS.inc(amount=queries.seconds)
+
+
+@collector
+def _pool() -> Iterable[Family]:
+    stats = pool_stats()
+    yield "db_pool_checked_out", "gauge", "Pooled connections in use", [((), stats["checked_out"])]
+    yield "db_pool_overflow", "gauge", "Connections open beyond the pool size", [((), stats["overflow"])]
+    yield "db_pool_capacity", "gauge", "Pool size plus overflow", [((), stats["capacity"])]
+    yield "db_pool_waiting", "gauge", "Callers waiting for a pooled connection", [((), stats["waiting"])]
+    yield "db_pool_timeouts_total", "counter", "Checkouts that timed out", [((), stats["timeouts"])]
+
+
+@collector
+def _caches() -> Iterable[Family]:
+    caches = cache_stats()
+    yield "cache_bytes", "gauge", "Estimated size of cached values", [
+        ((("cache", cache["name"]),), cache["bytes"]) for cache in caches
+    ]
+    # The news feed reloads as a whole when stale; a reload is its miss
+    feed = news_feed.stats
+    lookups = feed["hits"] + feed["reloads"]
+    caches.append({
+        "name": "news_feed",
+        "hits": feed["hits"],
+        "misses": feed["reloads"],
+        "hit_rate": feed["hits"] / lookups if lookups else 0.0,
+    })
+    yield "cache_lookups_total", "counter", "Cache lookups by result", [
+        ((("cache", cache["name"]), ("result", result)), cache[key])
+        for cache in caches
+        for result, key in (("hit", "hits"), ("miss", "misses"))
+    ]
+    yield "cache_hit_ratio", "gauge", "Hits per lookup since start", [
+        ((("cache", cache["name"]),), cache["hit_rate"]) for cache in caches
+    ]
+    flights = singleflight_stats()
+    yield "singleflight_calls_total", "counter", "Coalescable calls by outcome", [
+        ((("group", flight["name"]), ("outcome", outcome)), flight[outcome])
+        for flight in flights
+        for outcome in ("executions", "coalesced")
+    ]
+
+
+@collector
+def _load_shedding() -> Iterable[Family]:
+    priorities = shedder.snapshot()["priorities"]
+    yield "load_shedding_requests_total", "counter", "Requests admitted or shed, by priority", [
+        ((("priority", load["priority"]), ("outcome", outcome)), load[outcome])
+        for load in priorities
+        for outcome in ("admitted", "shed")
+    ]
+    yield "load_shedding_in_flight", "gauge", "Admitted requests being served, by priority", [
+        ((("priority", load["priority"]),), load["in_flight"]) for load in priorities
+    ]
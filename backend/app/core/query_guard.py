@@ -0,0 +1,101 @@
+"""
+Query budgets and N+1 detection
+
+For development and tests. With QUERY_GUARD set to "log" or "raise", every
+request counts its SQL statements and their shapes (see
+`app.db.events.statement_shape`), and is a violation when it
+
+- runs more statements than the budget its endpoint declares with
+  `@query_budget(n)`, or
+- runs the same statement shape QUERY_REPEAT_THRESHOLD times or more:
+  a query in a loop (N+1).
+
+"log" writes a warning; "raise" raises `QueryBudgetExceeded` once the
+request has finished, which fails the test client that sent it. Tests can
+also put a budget around any block with `expect_queries()`:
+
+    with expect_queries(at_most=3):
+        await client.get("/center/applications", headers=auth)
+
+Event streams are not checked; they reload by design.
+"""
+
+import logging
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import settings
+from app.db.events import QueryStats, track_queries
+
+logger = logging.getLogger("query_guard")
+
+
+class QueryBudgetExceeded(Exception):
+    """A request ran more statements than allowed, or one statement in a loop"""
+
+
+def query_budget(max_queries: int) -> Callable:
+    """Declare the most statements an endpoint may run, authentication included"""
+    def declare(endpoint: Callable) -> Callable:
+        endpoint.query_budget = max_queries
+        return endpoint
+    return declare
+
+
+def violations(stats: QueryStats, at_most: Optional[int] = None, repeats: Optional[int] = None) -> List[str]:
+    """Descriptions of what the statements in `stats` exceeded"""
+    repeats = repeats or settings.QUERY_REPEAT_THRESHOLD
+    found = []
+    if at_most is not None and stats.count > at_most:
+        found.append(f"{stats.count} statements, budget {at_most}")
+    for shape, count in (stats.shapes or {}).items():
+        if count >= repeats:
+            found.append(f"{count} executions of: {shape}")
+    return found
+
+
+@contextmanager
+def expect_queries(at_most: Optional[int] = None, repeats: Optional[int] = None) -> Iterator[QueryStats]:
+    """Raise QueryBudgetExceeded if the block exceeds `at_most` statements or repeats one"""
+    with track_queries(shapes=True) as stats:
+        yield stats
+    found = violations(stats, at_most, repeats)
+    if found:
+        raise QueryBudgetExceeded("; ".join(found))
+
+
+class QueryGuardMiddleware:
+    """Pure ASGI middleware checking each request against its endpoint's query budget"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or settings.QUERY_GUARD == "off":
+            await self.app(scope, receive, send)
+            return
+
+        response: Dict[str, bool] = {"stream": False}
+
+        async def send_checked(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                response["stream"] = any(
+                    name == b"content-type" and value.startswith(b"text/event-stream")
+                    for name, value in message.get("headers", [])
+                )
+            await send(message)
+
+        with track_queries(shapes=True) as stats:
+            await self.app(scope, receive, send_checked)
+        if response["stream"]:
+            return
+
+        route = scope.get("route")
+        found = violations(stats, getattr(getattr(route, "endpoint", None), "query_budget", None))
+        if not found:
+            return
+        template = getattr(route, "path_format", None) or scope["path"]
+        message = f"{scope['method']} {template}: " + "; ".join(found)
+        if settings.QUERY_GUARD == "raise":
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
@@ -2,11 +2,13 @@
 Security utilities for password hashing and JWT token management
 """
 
+import time
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.core.config import settings
+from app.core.metrics import PASSWORD_HASH_SECONDS
 
 try:
     from passlib.hash import argon2  
@@ -24,14 +26,22 @@ pwd_context = CryptContext(
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash using argon2."""
-    return pwd_context.verify(plain_password, hashed_password)
+    start = time.perf_counter()
+    try:
+        return pwd_context.verify(plain_password, hashed_password)
+    finally:
+        PASSWORD_HASH_SECONDS.observe(time.perf_counter() - start, ("verify",))
 
 
 def get_password_hash(password: str) -> str:
     """Hash a password using argon2 (no 72-byte limit for user input)."""
     if not isinstance(password, str):
         password = str(password)
-    return pwd_context.hash(password)
+    start = time.perf_counter()
+    try:
+        return pwd_context.hash(password)
+    finally:
+        PASSWORD_HASH_SECONDS.observe(time.perf_counter() - start, ("hash",))
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -62,6 +72,27 @@ def create_refresh_token(data: dict) -> str:
     return encoded_jwt
 
 
+def create_upload_token(data: dict) -> str:
+    """Create a short-lived JWT authorising one direct upload"""
+    to_encode = data.copy()
+    if "sub" in to_encode:
+        to_encode["sub"] = str(to_encode["sub"])
+    
+    expire = datetime.utcnow() + timedelta(seconds=settings.UPLOAD_TOKEN_EXPIRE_SECONDS)
+    to_encode.update({"exp": expire, "type": "upload"})
+    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    return encoded_jwt
+
+
+def create_upload_receipt(data: dict) -> str:
+    """Create a JWT the upload server hands back for a stored file"""
+    to_encode = data.copy()
+    expire = datetime.utcnow() + timedelta(seconds=settings.UPLOAD_TOKEN_EXPIRE_SECONDS)
+    to_encode.update({"exp": expire, "type": "upload_receipt"})
+    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    return encoded_jwt
+
+
 def decode_token(token: str) -> Optional[dict]:
     """Decode and verify a JWT token"""
     try:
@@ -0,0 +1,94 @@
+"""
+Request coalescing (single-flight)
+
+Concurrent callers asking for the same key share one execution: the first
+caller runs the computation, the others await its result. At enrollment
+opening hundreds of identical reads arrive together; with coalescing they
+cost one query instead of one each, and the followers never take a
+pooled connection.
+
+Keys must include everything the result depends on: route, parameters and
+the authorization scope (for example the applicant or centre id when the
+result is per user). The result object is shared, so callers must not
+mutate it; bytes, payloads and validators are the natural things to share.
+
+If the leading caller is cancelled, its followers do not fail with it:
+one of them retries as the new leader.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, List
+from app.core.config import settings
+
+_groups: Dict[str, "SingleFlight"] = {}
+
+
+class _LeaderCancelled(Exception):
+    """The caller running the computation was cancelled"""
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with equal keys"""
+
+    def __init__(self, name: str):
+        self.name = name
+        # key -> (result future, callers sharing it)
+        self._calls: Dict[Hashable, list] = {}
+        self.stats = {"calls": 0, "executions": 0, "coalesced": 0, "errors": 0, "retries": 0, "max_shared": 0}
+        _groups[name] = self
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Result of `fn()`, shared with concurrent callers of the same key"""
+        self.stats["calls"] += 1
+        if not settings.SINGLEFLIGHT_ENABLED:
+            self.stats["executions"] += 1
+            return await fn()
+
+        while True:
+            call = self._calls.get(key)
+            if call is None:
+                break
+            call[1] += 1
+            self.stats["coalesced"] += 1
+            self.stats["max_shared"] = max(self.stats["max_shared"], call[1])
+            try:
+                # Shielded: a follower giving up must not cancel the leader
+                return await asyncio.shield(call[0])
+            except _LeaderCancelled:
+                self.stats["coalesced"] -= 1
+                self.stats["retries"] += 1
+                continue
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = [future, 1]
+        self.stats["executions"] += 1
+        try:
+            result = await fn()
+        except Exception as exc:
+            self.stats["errors"] += 1
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
+            if not future.done():
+                # Cancelled: a follower takes over
+                future.set_exception(_LeaderCancelled())
+            # Retrieved here so that a failure nobody shared is not logged as unhandled
+            future.exception()
+
+    def snapshot(self) -> dict:
+        calls = self.stats["calls"]
+        return {
+            "name": self.name,
+            **self.stats,
+            "in_flight": len(self._calls),
+            "coalesced_rate": self.stats["coalesced"] / calls if calls else 0.0,
+        }
+
+
+def singleflight_stats() -> List[dict]:
+    """Counters of every single-flight group in this worker"""
+    return [group.snapshot() for group in _groups.values()]
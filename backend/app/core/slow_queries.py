@@ -0,0 +1,174 @@
+"""
+Slow-query log with plans
+
+Statements slower than SLOW_QUERY_SECONDS, in requests or background jobs,
+are kept in a ring buffer of the last SLOW_QUERY_LOG_SIZE, readable at
+GET /admin/slow-queries. An entry holds:
+
+- the normalised SQL (see `app.db.events.statement_shape`)
+- the shape of the bound parameters: types and list lengths, never values
+- the route that ran it (None for background work)
+- the plan, captured in the background
+
+Plans are captured on one dedicated asyncpg connection outside the pool,
+so capturing never holds up the request or takes a pooled connection.
+SELECTs get `EXPLAIN (ANALYZE, BUFFERS)` in a read-only transaction that
+is rolled back, under a statement timeout; writes get a plain `EXPLAIN`,
+as ANALYZE would run them again. Each statement shape is explained at
+most once per SLOW_QUERY_EXPLAIN_INTERVAL, and statements waiting for a
+plan are dropped beyond a small queue rather than piling up.
+
+A plan can show parameter values in its conditions, hence the admin-only
+endpoint.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+import asyncpg
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from app.core.config import settings
+from app.core.timing import current_route
+from app.db.events import statement_shape
+from app.db.session import engine
+
+logger = logging.getLogger("slow_queries")
+
+_QUEUE_SIZE = 32
+
+
+def _value_shape(value: Any) -> str:
+    if isinstance(value, (list, tuple)):
+        return f"{type(value).__name__}[{len(value)}]"
+    return type(value).__name__
+
+
+def parameter_shape(parameters: Any, executemany: bool = False) -> str:
+    """Types (and list lengths) of bound parameters, without their values"""
+    if executemany:
+        rows = list(parameters or ())
+        return f"{len(rows)} rows of ({parameter_shape(rows[0])})" if rows else "0 rows"
+    if not parameters:
+        return ""
+    if isinstance(parameters, dict):
+        return ", ".join(f"{name}: {_value_shape(value)}" for name, value in parameters.items())
+    return ", ".join(_value_shape(value) for value in parameters)
+
+
+class SlowQueryLog:
+    """Ring buffer of slow statements, explained by a background task"""
+
+    def __init__(self, size: int):
+        self.entries: Deque[dict] = deque(maxlen=size)
+        self._pending: asyncio.Queue = asyncio.Queue(_QUEUE_SIZE)
+        # Statement shape -> when its plan was last queued (monotonic)
+        self._explained: Dict[str, float] = {}
+        self._worker: Optional[asyncio.Task] = None
+        self.stats = {"captured": 0, "explained": 0, "explain_failures": 0, "dropped": 0}
+
+    def record(self, statement: str, parameters: Any, executemany: bool, seconds: float) -> None:
+        """Keep a slow statement and queue it for EXPLAIN"""
+        shape = statement_shape(statement)
+        entry = {
+            "captured_at": datetime.utcnow(),
+            "route": current_route(),
+            "duration_ms": seconds * 1000,
+            "statement": shape,
+            "parameters": parameter_shape(parameters, executemany),
+            "plan": None,
+            "plan_status": "pending",
+        }
+        self.entries.append(entry)
+        self.stats["captured"] += 1
+        logger.warning(f"Slow query ({entry['route'] or 'background'}) took {seconds * 1000:.0f} ms: {shape}")
+
+        if self._worker is None:
+            entry["plan_status"] = "not captured"
+            return
+        now = time.monotonic()
+        last = self._explained.get(shape)
+        if last is not None and now - last < settings.SLOW_QUERY_EXPLAIN_INTERVAL:
+            entry["plan_status"] = "explained recently"
+            return
+        if executemany:
+            parameters = next(iter(parameters or ()), ())
+        try:
+            self._pending.put_nowait((entry, statement, tuple(parameters or ())))
+        except asyncio.QueueFull:
+            entry["plan_status"] = "dropped"
+            self.stats["dropped"] += 1
+            return
+        if len(self._explained) >= 10_000:
+            self._explained.clear()
+        self._explained[shape] = now
+
+    def recent(self, limit: int) -> List[dict]:
+        """Newest entries first"""
+        return list(self.entries)[::-1][:limit]
+
+    async def start(self) -> None:
+        if settings.SLOW_QUERY_SECONDS and settings.SLOW_QUERY_EXPLAIN and self._worker is None:
+            self._worker = asyncio.create_task(self._explain_pending())
+
+    async def stop(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def _explain_pending(self) -> None:
+        dsn = make_url(settings.DATABASE_URL).set(drivername="postgresql").render_as_string(hide_password=False)
+        connection = None
+        try:
+            while True:
+                entry, statement, parameters = await self._pending.get()
+                try:
+                    if connection is None or connection.is_closed():
+                        connection = await asyncpg.connect(dsn)
+                    entry["plan"] = await self._explain(connection, statement, parameters)
+                    entry["plan_status"] = "captured"
+                    self.stats["explained"] += 1
+                except Exception as exc:
+                    entry["plan_status"] = f"failed: {exc}"
+                    self.stats["explain_failures"] += 1
+                    # Let the next slow execution try again
+                    self._explained.pop(entry["statement"], None)
+        finally:
+            if connection is not None and not connection.is_closed():
+                await connection.close()
+
+    async def _explain(self, connection, statement: str, parameters: tuple) -> str:
+        words = statement.split(None, 1)
+        # WITH may hide a write; the read-only transaction refuses to run it
+        analyze = bool(words) and words[0].upper() in ("SELECT", "WITH")
+        options = "(ANALYZE, BUFFERS) " if analyze else ""
+        transaction = connection.transaction(readonly=True)
+        await transaction.start()
+        try:
+            timeout_ms = int(settings.SLOW_QUERY_EXPLAIN_TIMEOUT * 1000)
+            await connection.execute(f"SET LOCAL statement_timeout = {timeout_ms}")
+            rows = await connection.fetch(f"EXPLAIN {options}{statement}", *parameters)
+        finally:
+            await transaction.rollback()
+        return "\n".join(row[0] for row in rows)
+
+
+slow_queries = SlowQueryLog(settings.SLOW_QUERY_LOG_SIZE)
+
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _statement_finished(conn, cursor, statement, parameters, context, executemany):
+    threshold = settings.SLOW_QUERY_SECONDS
+    started = getattr(context, "_query_started", None)
+    if not threshold or started is None:
+        return
+    seconds = time.perf_counter() - started
+    if seconds >= threshold:
+        slow_queries.record(statement, parameters, executemany, seconds)
@@ -0,0 +1,224 @@
+"""
+Server-Timing breakdown and slow-request log
+
+Responses can carry a `Server-Timing` header splitting the time spent on
+them:
+
+- auth: decoding the JWT and loading the user
+- deps: resolving every dependency, auth and body parsing included
+- app: the endpoint itself
+- serialize: validating and encoding the returned value
+- db: SQL statements (count and time), overlapping the phases above
+- total: until the response started
+
+Browsers show it in the network panel. As it tells any client how the
+server spends its time, no response gets it by default: set
+SERVER_TIMING_SAMPLE_RATE to the share that should, 1.0 while debugging.
+
+`TimedRoute`, the route class of every router, records deps, app and
+serialize; `measure(name)` times any other block of a request. Requests
+slower than SLOW_REQUEST_SECONDS are logged with the same breakdown and
+their SQL statements (without parameters), sampled or not.
+"""
+
+import asyncio
+import functools
+import logging
+import random
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional
+from fastapi.routing import APIRoute
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import settings
+from app.db.events import QueryStats, current_query_stats, track_queries
+
+logger = logging.getLogger("slow_requests")
+
+PHASES = ("auth", "deps", "app", "serialize")
+
+
+class RequestTiming:
+    """Time per phase of one request, in seconds"""
+
+    __slots__ = ("spans", "handler_started", "endpoint_started", "endpoint_finished")
+
+    def __init__(self):
+        self.spans: Dict[str, float] = {}
+        self.handler_started = 0.0
+        self.endpoint_started = 0.0
+        self.endpoint_finished = 0.0
+
+
+_current: ContextVar[Optional[RequestTiming]] = ContextVar("request_timing", default=None)
+_route: ContextVar[Optional[str]] = ContextVar("route", default=None)
+
+
+def current_route() -> Optional[str]:
+    """Method and path template of the route being served, or None outside one"""
+    return _route.get()
+
+
+class _Span:
+    __slots__ = ("name", "timing", "started")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.timing = _current.get()
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc_info) -> None:
+        if self.timing is not None:
+            spans = self.timing.spans
+            spans[self.name] = spans.get(self.name, 0.0) + time.perf_counter() - self.started
+
+
+def measure(name: str) -> _Span:
+    """Context manager adding the time spent in the block to a span of the current request"""
+    return _Span(name)
+
+
+def _timed_call(call: Callable) -> Callable:
+    """Wrap an endpoint to record when it starts and returns, keeping it sync or async"""
+    if asyncio.iscoroutinefunction(call):
+        @functools.wraps(call)
+        async def timed(*args, **kwargs):
+            timing = _current.get()
+            if timing is None:
+                return await call(*args, **kwargs)
+            timing.endpoint_started = time.perf_counter()
+            try:
+                return await call(*args, **kwargs)
+            finally:
+                timing.endpoint_finished = time.perf_counter()
+    else:
+        @functools.wraps(call)
+        def timed(*args, **kwargs):
+            # Runs in the thread pool, which copies the request's context
+            timing = _current.get()
+            if timing is None:
+                return call(*args, **kwargs)
+            timing.endpoint_started = time.perf_counter()
+            try:
+                return call(*args, **kwargs)
+            finally:
+                timing.endpoint_finished = time.perf_counter()
+    return timed
+
+
+class TimedRoute(APIRoute):
+    """Route recording dependency resolution, endpoint and serialization time
+
+    Also names itself in `current_route()` while its handler runs.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # The request handler looks the endpoint up on the dependant per call
+        self.dependant.call = _timed_call(self.dependant.call)
+        self.route_name = f"{','.join(sorted(self.methods))} {self.path_format}"
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def timed_handler(request: Request) -> Response:
+            token = _route.set(self.route_name)
+            timing = _current.get()
+            if timing is not None:
+                timing.handler_started = time.perf_counter()
+            try:
+                return await handler(request)
+            finally:
+                _route.reset(token)
+                if timing is not None:
+                    _record_phases(timing)
+
+        return timed_handler
+
+
+def _record_phases(timing: RequestTiming) -> None:
+    spans = timing.spans
+    if not timing.endpoint_started:
+        # A dependency failed, e.g. with a 401
+        spans["deps"] = time.perf_counter() - timing.handler_started
+        return
+    spans["deps"] = timing.endpoint_started - timing.handler_started
+    if timing.endpoint_finished:
+        spans["app"] = timing.endpoint_finished - timing.endpoint_started
+        spans["serialize"] = time.perf_counter() - timing.endpoint_finished
+
+
+def server_timing(timing: RequestTiming, queries: QueryStats, total: float) -> str:
+    """Header value for the phases recorded so far"""
+    entries: List[str] = [
+        f"{name};dur={timing.spans[name] * 1000:.1f}" for name in PHASES if name in timing.spans
+    ]
+    entries.append(f"db;count={queries.count};dur={queries.seconds * 1000:.1f}")
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+def _log_slow(scope: Scope, status: int, timing: RequestTiming, queries: QueryStats, total: float) -> None:
+    route = scope.get("route")
+    template = getattr(route, "path_format", None) or scope["path"]
+    lines = [
+        f"Slow request {scope['method']} {template} -> {status} in {total * 1000:.0f} ms "
+        f"({server_timing(timing, queries, total)})"
+    ]
+    lines += [
+        f"  {seconds * 1000:8.1f} ms  {' '.join(statement.split())}" for statement, seconds in queries.statements
+    ]
+    if queries.count > len(queries.statements):
+        lines.append(f"  ... {queries.count - len(queries.statements)} more statements")
+    logger.warning("\n".join(lines))
+
+
+class ServerTimingMiddleware:
+    """Pure ASGI middleware adding Server-Timing and logging slow requests"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.SERVER_TIMING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        # Reuse the statement count of the metrics middleware when it runs
+        queries = current_query_stats()
+        if queries is None:
+            with track_queries() as queries:
+                await self._timed(scope, receive, send, queries)
+        else:
+            await self._timed(scope, receive, send, queries)
+
+    async def _timed(self, scope: Scope, receive: Receive, send: Send, queries: QueryStats) -> None:
+        timing = RequestTiming()
+        token = _current.set(timing)
+        start = time.perf_counter()
+        sampled = random.random() < settings.SERVER_TIMING_SAMPLE_RATE
+        response = {"status": 500, "stream": False}
+
+        async def send_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                headers = message.get("headers", [])
+                response["stream"] = any(
+                    name == b"content-type" and value.startswith(b"text/event-stream") for name, value in headers
+                )
+                if sampled:
+                    value = server_timing(timing, queries, time.perf_counter() - start)
+                    message["headers"] = list(headers) + [(b"server-timing", value.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_timing)
+        finally:
+            _current.reset(token)
+            total = time.perf_counter() - start
+            # Event streams stay open by design
+            if total >= settings.SLOW_REQUEST_SECONDS and not response["stream"]:
+                _log_slow(scope, response["status"], timing, queries, total)
@@ -7,11 +7,12 @@ from sqlalchemy.orm import declarative_base
 
 
 
-def get_async_engine(database_url: str, echo: bool = False):
+def get_async_engine(database_url: str, echo: bool = False, **pool_options):
     return create_async_engine(
         database_url,
         echo=echo,
         future=True,
+        **pool_options,
     )
 
 
@@ -0,0 +1,40 @@
+"""
+Bulk write helpers for large batch jobs
+"""
+
+from typing import Dict, Sequence
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+async def bulk_update(
+    db: AsyncSession,
+    model,
+    key: str,
+    values: Dict[str, Sequence],
+    chunk_size: int = 50_000,
+) -> int:
+    """
+    Update many rows in one round trip per chunk using UPDATE ... FROM unnest().
+
+    `values` maps column names to equally long sequences; `values[key]`
+    holds the primary keys of the rows to update.
+    """
+    table = model.__table__
+    dialect = db.get_bind().dialect
+    columns = [key] + [name for name in values if name != key]
+    casts = ", ".join(
+        f"CAST(:{name} AS {table.c[name].type.compile(dialect=dialect)}[])" for name in columns
+    )
+    assignments = ", ".join(f"{name} = v.{name}" for name in columns if name != key)
+    statement = text(
+        f"UPDATE {table.name} AS t SET {assignments} "
+        f"FROM unnest({casts}) AS v({', '.join(columns)}) "
+        f"WHERE t.{key} = v.{key}"
+    )
+
+    total = len(values[key])
+    for start in range(0, total, chunk_size):
+        params = {name: list(values[name][start:start + chunk_size]) for name in columns}
+        await db.execute(statement, params)
+    return total
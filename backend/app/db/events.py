@@ -0,0 +1,95 @@
+"""
+Per-request query statistics
+
+`with track_queries() as stats:` counts the statements of the current
+request: engine events add every statement executed while it is active,
+with its time. The stats live in a context variable, so concurrent
+requests never mix, and the greenlet SQLAlchemy runs the driver in sees
+the same context. Blocks may nest (a test counting around a request the
+middleware also counts); each level sees every statement.
+
+With `shapes=True` executions are also counted per statement shape, the
+SQL with its parameter lists collapsed, to find the same statement run in
+a loop (N+1).
+"""
+
+import re
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import event
+from app.db.session import engine
+
+MAX_STATEMENTS = 50
+
+_PARAMETER_LISTS = re.compile(r"\$\d+(?:\s*,\s*\$\d+)*")
+
+
+class QueryStats:
+    """Statements executed in one request and the time spent in them
+
+    A context manager tracking the statements executed inside the block;
+    a class rather than a generator, as it wraps every request.
+    """
+
+    __slots__ = ("count", "seconds", "statements", "shapes", "_parent", "_token")
+
+    def __init__(self, shapes: bool = False):
+        self.count = 0
+        self.seconds = 0.0
+        # (SQL, seconds) of the first MAX_STATEMENTS, for the slow-request log
+        self.statements: List[Tuple[str, float]] = []
+        # Statement shape -> executions
+        self.shapes: Optional[Dict[str, int]] = {} if shapes else None
+
+    def __enter__(self) -> "QueryStats":
+        self._parent = _current.get()
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        _current.reset(self._token)
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    """Stats of the request being served, or None outside one"""
+    return _current.get()
+
+
+track_queries = QueryStats
+
+
+def statement_shape(statement: str) -> str:
+    """The SQL with whitespace normalised and `$1, $2, ...` lists collapsed to `?`"""
+    return _PARAMETER_LISTS.sub("?", " ".join(statement.split()))
+
+
+# The start time is kept on the statement's execution context, which is
+# dropped with it even when the statement fails. Stamped on every
+# statement, as the slow-query log times those outside requests too.
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _statement_started(conn, cursor, statement, parameters, context, executemany):
+    context._query_started = time.perf_counter()
+
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _statement_finished(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    started = getattr(context, "_query_started", None)
+    if stats is None or started is None:
+        return
+    seconds = time.perf_counter() - started
+    shape = None
+    while stats is not None:
+        stats.count += 1
+        stats.seconds += seconds
+        if len(stats.statements) < MAX_STATEMENTS:
+            stats.statements.append((statement, seconds))
+        if stats.shapes is not None:
+            if shape is None:
+                shape = statement_shape(statement)
+            stats.shapes[shape] = stats.shapes.get(shape, 0) + 1
+        stats = stats._parent
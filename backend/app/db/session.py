@@ -2,13 +2,59 @@
 Database session dependency
 """
 
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.db.base import get_async_engine, get_async_session_local
 from app.core.config import settings
 
 
-engine = get_async_engine(settings.DATABASE_URL)
+class MonitoredPool(AsyncAdaptedQueuePool):
+    """Queue pool that counts checkouts in progress, i.e. callers waiting for a connection"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.waiting = 0
+        self.timeouts = 0
+
+    def _do_get(self):
+        # A free connection is handed out without yielding to the event loop,
+        # so other tasks only see callers waiting for one (or for a new
+        # overflow connection to open)
+        self.waiting += 1
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            self.waiting -= 1
+
+
+engine = get_async_engine(
+    settings.DATABASE_URL,
+    poolclass=MonitoredPool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+)
 AsyncSessionLocal = get_async_session_local(engine)
 
+
+def pool_stats() -> dict:
+    """Connection pool usage of this worker"""
+    pool = engine.sync_engine.pool
+    capacity = settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+    checked_out = pool.checkedout()
+    return {
+        "size": pool.size(),
+        "checked_out": checked_out,
+        "overflow": max(pool.overflow(), 0),
+        "capacity": capacity,
+        "occupancy": checked_out / capacity if capacity else 0.0,
+        "waiting": pool.waiting,
+        "timeouts": pool.timeouts,
+    }
+
 async def get_db():
     """Dependency for getting database session"""
     async with AsyncSessionLocal() as session:
@@ -3,17 +3,68 @@ Training & Enrollment Management System - FastAPI Application
 Main entry point for the backend API
 """
 
-from fastapi import FastAPI
+import hmac
+from contextlib import asynccontextmanager
+from typing import Optional
+from fastapi import Depends, FastAPI, Header, HTTPException, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.staticfiles import StaticFiles
 from app.core.config import settings
-from app.routers import auth, applicant, master_data, center
+from app.core.admission import admission, admission_gate
+from app.core.compression import CompressionMiddleware
+from app.core.load_shedding import LoadSheddingMiddleware
+from app.core.query_guard import QueryGuardMiddleware
+from app.core.timing import ServerTimingMiddleware
+from app.core.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, render_metrics
+from app.core.invalidation import invalidation_bus
+from app.core.slow_queries import slow_queries
+from app.core.executor import shutdown_process_pool
+from app.services.intake import intake_service
+from app.services.status_events import status_events
+from app.services.storage import storage, LocalStorage, LOCAL_URL_PREFIX
+from app.routers import auth, applicant, master_data, center, admin, waiting_room, media
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop background resources"""
+    await intake_service.start()
+    await invalidation_bus.start()
+    await admission.start()
+    await slow_queries.start()
+    yield
+    status_events.close()
+    await invalidation_bus.stop()
+    await admission.stop()
+    await slow_queries.stop()
+    await intake_service.stop()
+    storage.close()
+    shutdown_process_pool()
+
 
 app = FastAPI(
     title="Training & Enrollment Management System",
     description="MIS Portal API for Training & Enrollment Management",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
+# Compress JSON responses; precompressed payloads pass through as they are
+app.add_middleware(CompressionMiddleware)
+
+# Query budgets and N+1 detection, when QUERY_GUARD is set
+app.add_middleware(QueryGuardMiddleware)
+
+# Server-Timing breakdown per response, and the slow-request log
+app.add_middleware(ServerTimingMiddleware)
+
+# Latency, status and query counts per route, for GET /metrics
+app.add_middleware(MetricsMiddleware)
+
+# Turn requests away with a fast 503 when the connection pool is saturated,
+# lowest priority first; inside CORS so that browsers can read the 503
+app.add_middleware(LoadSheddingMiddleware)
+
 # CORS middleware - must be added before other middleware
 app.add_middleware(
     CORSMiddleware,
@@ -26,9 +77,22 @@ app.add_middleware(
 
 # Include routers
 app.include_router(auth.router, prefix="/auth", tags=["Authentication"])
-app.include_router(applicant.router, prefix="/applicant", tags=["Applicant"])
+app.include_router(
+    applicant.router,
+    prefix="/applicant",
+    tags=["Applicant"],
+    dependencies=[Depends(admission_gate)],
+)
+app.include_router(applicant.events_router, prefix="/applicant", tags=["Applicant"])
 app.include_router(center.router, prefix="/center", tags=["Center"])
 app.include_router(master_data.router, prefix="/master", tags=["Master Data"])
+app.include_router(admin.router, prefix="/admin", tags=["Admin"])
+app.include_router(waiting_room.router, prefix="/waiting-room", tags=["Waiting Room"])
+app.include_router(media.router, prefix="/media", tags=["Media"])
+
+if isinstance(storage, LocalStorage):
+    storage.root.mkdir(parents=True, exist_ok=True)
+    app.mount(LOCAL_URL_PREFIX, StaticFiles(directory=storage.root), name="uploads")
 
 
 @app.get("/")
@@ -46,3 +110,12 @@ async def health_check():
     """Health check endpoint"""
     return {"status": "healthy"}
 
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics(authorization: Optional[str] = Header(None)):
+    """Prometheus metrics of this worker, for scrapers sending METRICS_TOKEN as a bearer token"""
+    expected = f"Bearer {settings.METRICS_TOKEN}".encode()
+    if not settings.METRICS_TOKEN or not hmac.compare_digest((authorization or "").encode(), expected):
+        # Not served at all without the token
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    return Response(render_metrics(), media_type=METRICS_CONTENT_TYPE)
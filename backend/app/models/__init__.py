@@ -16,6 +16,7 @@ from app.models.qualification import Qualification
 from app.models.stream import Stream
 from app.models.enrollment_news import EnrollmentNews
 from app.models.application import Application
+from app.models.intake_rejection import IntakeRejection
 from app.models.gallery_category import GalleryCategory
 from app.models.gallery import Gallery
 from app.models.news_category import NewsCategory
@@ -23,6 +24,7 @@ from app.models.news import News
 from app.models.training_calendar import TrainingCalendar
 from app.models.user_otp_track import UserOTPTrack
 from app.models.role_master import Role
+from app.models.waiting_room import WaitingRoom
 
 __all__ = [
     "User",
@@ -40,11 +42,13 @@ __all__ = [
     "Stream",
     "EnrollmentNews",
     "Application",
+    "IntakeRejection",
     "GalleryCategory",
     "Gallery",
     "NewsCategory",
     "News",
     "TrainingCalendar",
     "UserOTPTrack",
+    "WaitingRoom",
 ]
 
@@ -21,8 +21,8 @@ class Applicant(Base):
     other_college = Column(String(60), nullable=True)
     email_id = Column(String(100), nullable=False, unique=True, index=True)
     mobile_no = Column(String(10), nullable=False)
-    profile_photo = Column(String(100), nullable=True)
-    updated_date = Column(DateTime, nullable=False, default=datetime.utcnow)
+    profile_photo = Column(String(255), nullable=True)
+    updated_date = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
     password_legacy = Column("pass", String(255), nullable=True)
     active_status = Column(String(1), nullable=False, default="N")
     caste = relationship("Caste", back_populates="applicants")
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.db.base import Base
 
@@ -19,17 +19,25 @@ class Application(Base):
     qualification_id = Column(Integer, ForeignKey("m_qualification.qualification_id"), nullable=False)
     stream_id = Column(Integer, ForeignKey("m_stream.stream_id"), nullable=False)
     marks = Column(String(5), nullable=False)
-    dob_image = Column(String(50), nullable=True)
-    marksheet_image = Column(String(50), nullable=True)
+    marks_scale = Column(String(7), nullable=False, default="percent")  # scale `marks` was given in
+    marks_numeric = Column(Float, nullable=True)  # marks normalised to a percentage
+    merit_rank = Column(Integer, nullable=True)
+    category_rank = Column(Integer, nullable=True)
+    preference = Column(Integer, nullable=False, default=1)  # applicant's choice order, 1 = first
+    waitlist_position = Column(Integer, nullable=True)
+    dob_image = Column(String(255), nullable=True)  # storage URL
+    marksheet_image = Column(String(255), nullable=True)
     role_id = Column(Integer, ForeignKey("m_role.role_id"), nullable=False, default=4)
-    enrollment_status = Column(String(1), nullable=False, default="N")  # Y/N
+    enrollment_status = Column(String(1), nullable=False, default="N")  # Y/N/R/P/W/D
     payment_status = Column(String(1), nullable=False, default="N")  # Y/N
     cert_status = Column(String(1), nullable=False, default="N")  # Y/N
+    submitted_date = Column(DateTime, nullable=False, default=datetime.utcnow)
     updated_date = Column(DateTime, nullable=False, default=datetime.utcnow)
     sel_by = Column(Integer, ForeignKey("m_employee.employee_id"), nullable=True)
     sel_date = Column(DateTime, nullable=True)
     transac_det = Column(String(20), nullable=True)
     transac_det_time = Column(DateTime, nullable=True)
+    intake_ticket = Column(String(64), nullable=True, unique=True)  # set for write-behind submissions
     
     # Relationships
     applicant = relationship("Applicant", back_populates="applications")
@@ -39,4 +47,10 @@ class Application(Base):
     qualification = relationship("Qualification", back_populates="applications")
     stream = relationship("Stream", back_populates="applications")
     role_ref = relationship("Role", back_populates="applications", foreign_keys=[role_id])
+    
+    __table_args__ = (
+        Index("ix_t_applications_session_marks", "session_id", "marks_numeric"),
+        Index("ix_t_applications_applicant_pref", "applicant_id", "preference"),
+        Index("ix_t_applications_session_waitlist", "session_id", "enrollment_status", "waitlist_position"),
+    )
 
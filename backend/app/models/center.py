@@ -19,7 +19,7 @@ class Center(Base):
     center_pay_link = Column(String(255), nullable=True)
     center_venue = Column(String(100), nullable=True)
     updated_by = Column(Integer, nullable=True)  # Foreign key to m_employee.employee_id (circular dependency handled separately)
-    updated_date = Column(DateTime, nullable=True)
+    updated_date = Column(DateTime, nullable=True, onupdate=datetime.utcnow)
     
     state = relationship("State", back_populates="centers")
     district = relationship("District", back_populates="centers")
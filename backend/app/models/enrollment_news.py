@@ -16,7 +16,7 @@ class EnrollmentNews(Base):
     center_id = Column(Integer, ForeignKey("m_center.center_id"), nullable=False)
     session_id = Column(Integer, ForeignKey("m_session.session_id"), nullable=False)
     updated_by = Column(Integer, ForeignKey("m_employee.employee_id"), nullable=False)
-    updated_date = Column(DateTime, nullable=False, default=datetime.utcnow)
+    updated_date = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
     active_status = Column(String(1), nullable=False, default="Y")  # Y/N
     
     # Relationships
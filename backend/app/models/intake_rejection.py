@@ -0,0 +1,13 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from app.db.base import Base
+
+
+class IntakeRejection(Base):
+    """Outcome of a write-behind submission that was not inserted"""
+    __tablename__ = "t_intake_rejections"
+    
+    intake_ticket = Column(String(64), primary_key=True)
+    applicant_id = Column(Integer, ForeignKey("m_applicant.applicant_id", ondelete="CASCADE"), nullable=False)
+    detail = Column(String(255), nullable=False)
+    rejected_date = Column(DateTime, nullable=False, default=datetime.utcnow)
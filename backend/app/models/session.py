@@ -15,8 +15,11 @@ class Session(Base):
     end_date = Column(DateTime(timezone=True), nullable=False)
     center_id = Column(Integer, ForeignKey("m_center.center_id"), nullable=False)
     active_status = Column(String(1), nullable=False, default="N")  # Y/N
+    seat_capacity = Column(Integer, nullable=True)  # None = unlimited
+    seats_reserved = Column(Integer, nullable=False, default=0, server_default="0")  # selected, not yet paid
+    seats_confirmed = Column(Integer, nullable=False, default=0, server_default="0")  # selected and paid
     updated_by = Column(Integer, ForeignKey("m_employee.employee_id"), nullable=True)
-    updated_date = Column(DateTime(timezone=True), nullable=True)
+    updated_date = Column(DateTime(timezone=True), nullable=True, onupdate=datetime.utcnow)
     
     center = relationship("Center", back_populates="sessions")
     enrollments = relationship("EnrollmentNews", back_populates="session")
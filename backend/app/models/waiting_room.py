@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, Float, Boolean, DateTime, Sequence, func
+from app.db.base import Base
+
+# Ticket numbers, shared by every worker
+TICKET_SEQUENCE = Sequence("waiting_room_ticket_seq", metadata=Base.metadata)
+
+
+class WaitingRoom(Base):
+    """Waiting room admission state shared by the workers (a single row)"""
+    __tablename__ = "t_waiting_room"
+    
+    id = Column(Integer, primary_key=True)
+    admitted = Column(Float, nullable=False, default=0.0)  # tickets up to this number may enter
+    rate = Column(Float, nullable=False)  # admissions per second
+    healthy = Column(Boolean, nullable=False, default=True)  # every report this second was healthy
+    advanced_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    adjusted_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
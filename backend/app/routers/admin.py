@@ -0,0 +1,66 @@
+"""
+Admin router
+"""
+
+from typing import List
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import get_db
+from app.models.user import User
+from app.models.role import RoleEnum
+from app.schemas.allocation import AllocationSummary
+from app.schemas.cache import CacheStats, LoadSheddingStats, SingleFlightStats
+from app.schemas.diagnostics import SlowQuery
+from app.core.auth import require_role
+from app.core.load_shedding import shedder
+from app.core.singleflight import singleflight_stats
+from app.core.slow_queries import slow_queries
+from app.core.timing import TimedRoute
+from app.services.allocation import run_allocation
+from app.services.applicant_cache import applicant_cache
+
+router = APIRouter(route_class=TimedRoute)
+
+
+@router.post("/allocation/run", response_model=AllocationSummary)
+async def run_seat_allocation(
+    current_user: User = Depends(require_role(RoleEnum.ADMIN)),
+    db: AsyncSession = Depends(get_db)
+):
+    """Allocate seats across all centres from applicant preferences and session capacities"""
+    summary = await run_allocation(db)
+    await db.commit()
+    return AllocationSummary(**summary)
+
+
+@router.get("/cache/applicants", response_model=CacheStats)
+async def get_applicant_cache_stats(
+    current_user: User = Depends(require_role(RoleEnum.ADMIN))
+):
+    """Hit rate and memory use of this worker's applicant profile/application cache"""
+    return CacheStats(**applicant_cache.snapshot())
+
+
+@router.get("/singleflight", response_model=List[SingleFlightStats])
+async def get_singleflight_stats(
+    current_user: User = Depends(require_role(RoleEnum.ADMIN))
+):
+    """How many identical concurrent reads this worker coalesced, per group"""
+    return [SingleFlightStats(**stats) for stats in singleflight_stats()]
+
+
+@router.get("/load-shedding", response_model=LoadSheddingStats)
+async def get_load_shedding_stats(
+    current_user: User = Depends(require_role(RoleEnum.ADMIN))
+):
+    """Requests this worker admitted and shed per priority, and callers waiting for a connection"""
+    return LoadSheddingStats(**shedder.snapshot())
+
+
+@router.get("/slow-queries", response_model=List[SlowQuery])
+async def get_slow_queries(
+    limit: int = Query(50, ge=1, le=1000),
+    current_user: User = Depends(require_role(RoleEnum.ADMIN))
+):
+    """This worker's recent statements slower than SLOW_QUERY_SECONDS, newest first, with their plans"""
+    return [SlowQuery(**entry) for entry in slow_queries.recent(limit)]
@@ -2,46 +2,64 @@
 Applicant router
 """
 
+import asyncio
+import hashlib
+import logging
+import random
 from datetime import datetime
-from typing import List
-from io import BytesIO
-import cloudinary
-import cloudinary.uploader
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from typing import List, Literal, Optional
+from uuid import uuid4
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_
+from sqlalchemy import select, and_, or_, func, true
 from sqlalchemy.orm import selectinload
-from app.db.session import get_db
+from app.db.session import get_db, AsyncSessionLocal
 from app.models.user import User
 from app.models.applicant import Applicant
 from app.models.application import Application
-from app.models.news import News
+from app.models.intake_rejection import IntakeRejection
 from app.models.center import Center
 from app.models.session import Session
+from app.models.enrollment_news import EnrollmentNews
 from app.schemas.session import SessionResponse
-from app.schemas.application import ApplicationCreate, ApplicationResponse as ApplicationResponseSchema
+from app.schemas.news import NewsResponse
+from app.schemas.application import (
+    ApplicationCreate, ApplicationResponse as ApplicationResponseSchema, DeclineResponse, IntakeStatus,
+    DocumentUpload, ResumableUploadCreate, ResumableUploadStatus,
+    DirectUploadRequest, DirectUploadTicket, DirectUploadComplete, DirectUploadResult,
+)
 from app.models.role import RoleEnum
 from app.schemas.applicant import ApplicantCreate, ApplicantUpdate, ApplicantResponse
 from app.core.auth import get_current_user, require_role
+from app.core.security import create_upload_token, decode_token
 from app.core.config import settings
+from app.core.conditional import not_modified, query_validators, with_validators
+from app.core.singleflight import SingleFlight
+from app.core.codec import Fields, Projection, field_selection, application_status, payment_status, certificate_status
+from app.core.query_guard import query_budget
+from app.core.timing import TimedRoute
+from app.services.marks import normalise_marks
+from app.services.allocation import ALLOCATED, decline_allocation
+from app.services.news_feed import news_feed
+from app.services.applicant_cache import cached_profile, cached_applications, store_profile, refresh_applications
+from app.services.status_events import status_events
+from app.services.intake import intake_service, verify_ticket, DuplicateSubmission, QUEUED, ACCEPTED, REJECTED
+from app.services.storage import storage, StorageError, StoredFile
+from app.services.images import images, variant_url, InvalidImage
+from app.services.uploads import (
+    receive_stream, resumable_uploads, ReceivedFile,
+    UploadRejected, UploadTooLarge, UnsupportedFileType, DOCUMENT_TYPES, IMAGE_TYPES,
+)
 from pydantic import BaseModel
 
-# Function to configure Cloudinary dynamically
-def configure_cloudinary():
-    """Configure Cloudinary with settings from environment"""
-    if settings.CLOUDINARY_CLOUD_NAME and settings.CLOUDINARY_API_KEY and settings.CLOUDINARY_API_SECRET:
-        cloudinary.config(
-            cloud_name=settings.CLOUDINARY_CLOUD_NAME,
-            api_key=settings.CLOUDINARY_API_KEY,
-            api_secret=settings.CLOUDINARY_API_SECRET
-        )
-        return True
-    return False
-
-# Configure Cloudinary at module load
-_cloudinary_configured = configure_cloudinary()
+logger = logging.getLogger(__name__)
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
+# Event streams stay open for the whole visit, so they are served outside
+# the admission gate, which would count each one as a single slow request
+events_router = APIRouter(route_class=TimedRoute)
 
 
 @router.post("/profile", response_model=ApplicantResponse, status_code=status.HTTP_201_CREATED)
@@ -87,8 +105,22 @@ async def create_applicant_profile(
     return new_applicant
 
 
+async def _load_profile(db: AsyncSession, applicant_id: int) -> Optional[ApplicantResponse]:
+    result = await db.execute(
+        select(Applicant).where(Applicant.applicant_id == applicant_id)
+    )
+    applicant = result.scalar_one_or_none()
+    return ApplicantResponse.model_validate(applicant) if applicant else None
+
+
+async def _profile(db: AsyncSession, applicant_id: int) -> Optional[ApplicantResponse]:
+    return await cached_profile(applicant_id, lambda: _load_profile(db, applicant_id))
+
+
 @router.get("/profile", response_model=ApplicantResponse)
+@query_budget(2)
 async def get_applicant_profile(
+    fields: Optional[Fields] = Depends(field_selection(ApplicantResponse)),
     current_user: User = Depends(require_role(RoleEnum.APPLICANT)),
     db: AsyncSession = Depends(get_db)
 ):
@@ -99,10 +131,7 @@ async def get_applicant_profile(
             detail="Applicant profile not found. Please complete onboarding."
         )
     
-    result = await db.execute(
-        select(Applicant).where(Applicant.applicant_id == current_user.applicant_id)
-    )
-    applicant = result.scalar_one_or_none()
+    applicant = await _profile(db, current_user.applicant_id)
     
     if not applicant:
         raise HTTPException(
@@ -110,6 +139,9 @@ async def get_applicant_profile(
             detail="Applicant profile not found"
         )
     
+    if fields:
+        # The profile comes from the applicant cache, so only encoding is trimmed
+        return Response(content=applicant.model_dump_json(include=set(fields)), media_type="application/json")
     return applicant
 
 
@@ -145,7 +177,9 @@ async def update_applicant_profile(
     await db.commit()
     await db.refresh(applicant)
     
-    return applicant
+    profile = ApplicantResponse.model_validate(applicant)
+    store_profile(applicant.applicant_id, profile)
+    return profile
 
 
 # Response schemas for dashboard data
@@ -163,20 +197,56 @@ class ApplicationResponse(BaseModel):
         from_attributes = True
 
 
-class NewsResponse(BaseModel):
-    news_id: int
-    news_title: str
-    news_desc: str
-    category_name: str
-    start_datetime: datetime
-    end_datetime: datetime
-    status: str
+DASHBOARD_SECTIONS = ("profile", "applications", "news", "sessions")
+
+
+class ApplicantDashboardResponse(BaseModel):
+    profile: Optional[ApplicantResponse] = None
+    applications: Optional[List[ApplicationResponse]] = None
+    news: Optional[List[NewsResponse]] = None
+    sessions: Optional[List[SessionResponse]] = None
+
+
+async def _load_applications(db: AsyncSession, applicant_id: int) -> List[ApplicationResponse]:
+    # Only the columns the list shows, as plain rows: no ORM objects to track
+    result = await db.execute(
+        select(
+            Application.application_id,
+            Application.enrollment_status,
+            Application.payment_status,
+            Application.cert_status,
+            Application.updated_date,
+            Application.reg_id,
+            Center.center_name,
+            Session.session_name,
+        )
+        .outerjoin(Center, Center.center_id == Application.center_id)
+        .outerjoin(Session, Session.session_id == Application.session_id)
+        .where(Application.applicant_id == applicant_id)
+        .order_by(Application.updated_date.desc())
+    )
     
-    class Config:
-        from_attributes = True
+    return [
+        ApplicationResponse(
+            application_id=row.application_id,
+            center_name=row.center_name if row.center_name is not None else "N/A",
+            session_name=row.session_name if row.session_name is not None else "N/A",
+            application_status=application_status(row.enrollment_status),
+            payment_status=payment_status(row.payment_status),
+            certificate_status=certificate_status(row.cert_status),
+            updated_date=row.updated_date,
+            reg_id=row.reg_id
+        )
+        for row in result.all()
+    ]
+
+
+async def _applications(db: AsyncSession, applicant_id: int) -> List[ApplicationResponse]:
+    return await cached_applications(applicant_id, lambda: _load_applications(db, applicant_id))
 
 
 @router.get("/applications", response_model=List[ApplicationResponse])
+@query_budget(2)
 async def get_my_applications(
     current_user: User = Depends(require_role(RoleEnum.APPLICANT)),
     db: AsyncSession = Depends(get_db)
@@ -185,114 +255,198 @@ async def get_my_applications(
     if not current_user.applicant_id:
         return []
     
-    result = await db.execute(
-        select(Application)
-        .options(
-            selectinload(Application.center),
-            selectinload(Application.session)
-        )
-        .where(Application.applicant_id == current_user.applicant_id)
-        .order_by(Application.updated_date.desc())
-    )
-    applications = result.scalars().all()
-    
-    # Transform to response format
-    response = []
-    for app in applications:
-        # Map status codes to readable strings
-        app_status_map = {"Y": "Selected", "N": "Submitted", "R": "Rejected", "P": "Pending"}
-        payment_status_map = {"Y": "Paid", "N": "Unpaid", "P": "Pending"}
-        cert_status_map = {"Y": "Issued", "N": "Not Issued", "P": "Pending"}
-        
-        response.append(ApplicationResponse(
-            application_id=app.application_id,
-            center_name=app.center.center_name if app.center else "N/A",
-            session_name=app.session.session_name if app.session else "N/A",
-            application_status=app_status_map.get(app.enrollment_status, "Pending"),
-            payment_status=payment_status_map.get(app.payment_status, "Pending"),
-            certificate_status=cert_status_map.get(app.cert_status, "Not Issued"),
-            updated_date=app.updated_date,
-            reg_id=app.reg_id
-        ))
-    
-    return response
+    return await _applications(db, current_user.applicant_id)
 
 
 @router.get("/news", response_model=List[NewsResponse])
 async def get_news(
-    current_user: User = Depends(require_role(RoleEnum.APPLICANT)),
-    db: AsyncSession = Depends(get_db)
+    request: Request,
+    current_user: User = Depends(require_role(RoleEnum.APPLICANT))
 ):
     """Get latest news items"""
-    # Get active news within validity period
-    now = datetime.utcnow()
+    # Served from memory; the cache tracks validity windows itself
+    feed = await news_feed.applicant_feed()
+    return not_modified(request, feed.validators) or with_validators(feed.response(request), feed.validators)
+
+
+# First active enrollment/news of each session (if any)
+_first_enrollment = (
+    select(EnrollmentNews.enroll_id)
+    .where(EnrollmentNews.session_id == Session.session_id, EnrollmentNews.active_status == 'Y')
+    .order_by(EnrollmentNews.enroll_start_date.asc())
+    .limit(1)
+    .correlate(Session)
+    .scalar_subquery()
+)
+
+# Response fields and the columns they are built from, for ?fields= selection
+_session_projection = Projection(SessionResponse, {
+    "session_id": Session.session_id,
+    "session_name": Session.session_name,
+    "session_desc": Session.session_desc,
+    "start_date": Session.start_date,
+    "end_date": Session.end_date,
+    "center_id": Session.center_id,
+    "active_status": Session.active_status,
+    "seat_capacity": Session.seat_capacity,
+    "enroll_id": _first_enrollment,
+})
+
+
+async def _load_sessions(db: AsyncSession, fields: Optional[Fields] = None) -> List[dict]:
+    # Get all sessions - applicants should see all sessions created by centers
     result = await db.execute(
-        select(News)
-        .options(selectinload(News.category))
-        .where(
-            and_(
-                News.status == "Y",
-                News.start_datetime <= now,
-                News.end_datetime >= now
-            )
-        )
-        .order_by(News.updated_date.desc())
-        .limit(10)
+        select(*_session_projection.columns(fields))
+        .select_from(Session)
+        .order_by(Session.start_date.desc())
     )
-    news_items = result.scalars().all()
-    
-    response = []
-    for news in news_items:
-        response.append(NewsResponse(
-            news_id=news.news_id,
-            news_title=news.news_title,
-            news_desc=news.news_desc,
-            category_name=news.category.news_cat_name if news.category else "General",
-            start_datetime=news.start_datetime,
-            end_datetime=news.end_datetime,
-            status=news.status
-        ))
-    
-    return response
+    return _session_projection.rows(result.all(), fields)
+
+
+# enroll_id depends on enrollment rows as well as sessions
+_sessions_changed = select(
+    func.count(Session.session_id), func.max(Session.session_id), func.max(Session.updated_date)
+).subquery()
+_enrollments_changed = select(
+    func.count(EnrollmentNews.enroll_id), func.max(EnrollmentNews.enroll_id), func.max(EnrollmentNews.updated_date)
+).subquery()
+_sessions_validators = select(_sessions_changed, _enrollments_changed).join_from(
+    _sessions_changed, _enrollments_changed, true()
+)
+# The session list is the same for every applicant
+_sessions_flight = SingleFlight("applicant_sessions")
+
+
+async def _encoded_sessions(db: AsyncSession, fields: Optional[Fields]) -> bytes:
+    return _session_projection.codec(fields).dump(await _load_sessions(db, fields))
 
 
 @router.get("/sessions", response_model=List[SessionResponse])
+@query_budget(3)
 async def get_available_sessions(
+    request: Request,
+    fields: Optional[Fields] = Depends(field_selection(SessionResponse)),
     current_user: User = Depends(require_role(RoleEnum.APPLICANT)),
     db: AsyncSession = Depends(get_db)
 ):
     """Get all sessions available for applicants (both active and inactive)"""
-    # Get all sessions - applicants should see all sessions created by centers
-    result = await db.execute(
-        select(Session)
-        .options(selectinload(Session.center))
-        .order_by(Session.start_date.desc())
+    # Concurrent requests share one validator query and one encoded list
+    validators = await _sessions_flight.do(
+        ("validators", fields),
+        lambda: query_validators(db, _sessions_validators, fields)
     )
-    sessions = result.scalars().all()
+    cached = not_modified(request, validators)
+    if cached:
+        return cached
     
-    # For each session, find the first active enrollment/news (if any) and include its enroll_id
-    session_enroll_map = {}
-    from app.models.enrollment_news import EnrollmentNews
-    for s in sessions:
-        enroll_result = await db.execute(
-            select(EnrollmentNews).where(EnrollmentNews.session_id == s.session_id, EnrollmentNews.active_status == 'Y').order_by(EnrollmentNews.enroll_start_date.asc())
+    body = await _sessions_flight.do(
+        ("body", fields, validators.etag),
+        lambda: _encoded_sessions(db, fields)
+    )
+    return with_validators(Response(content=body, media_type="application/json"), validators)
+
+
+async def _in_own_session(loader, *args):
+    """Run a loader on its own pooled connection so it can overlap with others"""
+    async with AsyncSessionLocal() as db:
+        return await loader(db, *args)
+
+
+@router.get("/dashboard", response_model=ApplicantDashboardResponse, response_model_exclude_unset=True)
+@query_budget(5)
+async def get_dashboard(
+    sections: Optional[str] = Query(
+        None,
+        description="Comma-separated subset of profile, applications, news, sessions (default: all)"
+    ),
+    current_user: User = Depends(require_role(RoleEnum.APPLICANT)),
+    db: AsyncSession = Depends(get_db)
+):
+    """Profile, applications, news and sessions in one response; the queries run concurrently"""
+    requested = DASHBOARD_SECTIONS if not sections else tuple(
+        dict.fromkeys(part.strip() for part in sections.split(",") if part.strip())
+    )
+    unknown = [section for section in requested if section not in DASHBOARD_SECTIONS]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown dashboard sections: {', '.join(unknown)}"
         )
-        enrollment = enroll_result.scalars().first()
-        session_enroll_map[s.session_id] = enrollment.enroll_id if enrollment else None
+    
+    applicant_id = current_user.applicant_id
+    loaders = {}
+    if "profile" in requested and applicant_id:
+        loaders["profile"] = (_profile, applicant_id)
+    if "applications" in requested and applicant_id:
+        loaders["applications"] = (_applications, applicant_id)
+    if "sessions" in requested:
+        loaders["sessions"] = (_load_sessions,)
+    
+    # The request session (already used for authentication) takes the first
+    # query; the others get their own connections so all of them overlap
+    tasks = {}
+    for index, (section, (loader, *args)) in enumerate(loaders.items()):
+        tasks[section] = loader(db, *args) if index == 0 else _in_own_session(loader, *args)
+    if "news" in requested:
+        tasks["news"] = news_feed.applicant_items()
+    results = dict(zip(tasks, await asyncio.gather(*tasks.values())))
+    
+    dashboard = {}
+    if "profile" in requested:
+        dashboard["profile"] = results.get("profile")
+    if "applications" in requested:
+        dashboard["applications"] = results.get("applications", [])
+    for section in ("news", "sessions"):
+        if section in requested:
+            dashboard[section] = results[section]
+    return ApplicantDashboardResponse(**dashboard)
 
-    return [
-        SessionResponse(
-            session_id=s.session_id,
-            session_name=s.session_name,
-            session_desc=s.session_desc,
-            start_date=s.start_date,
-            end_date=s.end_date,
-            center_id=s.center_id,
-            active_status=s.active_status,
-            enroll_id=session_enroll_map.get(s.session_id)
-        )
-        for s in sessions
-    ]
+
+_applications_adapter = TypeAdapter(List[ApplicationResponse])
+EVENTS_RETRY_MS = 5000  # client reconnect delay after a dropped stream
+
+
+async def _application_events(applicant_id: int):
+    """Current applications on connect, then again after every change"""
+    subscription = status_events.subscribe(applicant_id)
+    try:
+        yield f"retry: {EVENTS_RETRY_MS}\n\n"
+        changed = True
+        while not status_events.closed:
+            if changed:
+                if subscription.broadcast:
+                    # Everyone was woken at once; spread out the reloads
+                    subscription.broadcast = False
+                    await asyncio.sleep(random.uniform(0, settings.STATUS_EVENTS_BROADCAST_SPREAD))
+                    subscription.changed.clear()
+                applications = await _in_own_session(_applications, applicant_id)
+                yield f"event: applications\ndata: {_applications_adapter.dump_json(applications).decode()}\n\n"
+            else:
+                yield ": keep-alive\n\n"
+            changed = await subscription.wait(settings.STATUS_EVENTS_HEARTBEAT)
+    finally:
+        status_events.unsubscribe(subscription)
+
+
+@events_router.get("/events")
+async def application_events(
+    current_user: User = Depends(require_role(RoleEnum.APPLICANT)),
+    db: AsyncSession = Depends(get_db)
+):
+    """Server-Sent Events stream of the applicant's applications, pushed on status changes"""
+    if not current_user.applicant_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Applicant profile not found. Please complete onboarding."
+        )
+    
+    # The session stays open until the stream ends; give its connection back now
+    await db.close()
+    return StreamingResponse(
+        _application_events(current_user.applicant_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.post("/applications", response_model=ApplicationResponseSchema, status_code=status.HTTP_201_CREATED)
@@ -347,6 +501,15 @@ async def create_application(
             detail="You have already applied to this session"
         )
     
+    # Preference order defaults to submission order
+    preference = application_data.preference
+    if preference is None:
+        preference_result = await db.execute(
+            select(func.coalesce(func.max(Application.preference), 0))
+            .where(Application.applicant_id == current_user.applicant_id)
+        )
+        preference = preference_result.scalar_one() + 1
+    
     # Create application
     new_application = Application(
         applicant_id=current_user.applicant_id,
@@ -357,9 +520,12 @@ async def create_application(
         qualification_id=application_data.qualification_id,
         stream_id=application_data.stream_id,
         marks=application_data.marks,
+        marks_scale=application_data.marks_scale,
+        marks_numeric=normalise_marks(application_data.marks, application_data.marks_scale),
         dob_image=application_data.dob_image,
         marksheet_image=application_data.marksheet_image,
         role_id=application_data.role_id,
+        preference=preference,
         enrollment_status="N",  # Submitted
         payment_status="N",
         cert_status="N"
@@ -368,6 +534,10 @@ async def create_application(
     db.add(new_application)
     await db.commit()
     await db.refresh(new_application)
+    await refresh_applications(
+        current_user.applicant_id,
+        lambda: _load_applications(db, current_user.applicant_id)
+    )
     
     # Get session and center for response
     session_result = await db.execute(
@@ -377,135 +547,570 @@ async def create_application(
     )
     session = session_result.scalar_one_or_none()
     
-    app_status_map = {"Y": "Selected", "N": "Submitted", "R": "Rejected", "P": "Pending"}
-    payment_status_map = {"Y": "Paid", "N": "Unpaid", "P": "Pending"}
-    cert_status_map = {"Y": "Issued", "N": "Not Issued", "P": "Pending"}
-    
     return ApplicationResponseSchema(
         application_id=new_application.application_id,
         session_name=session.session_name if session else "N/A",
         center_name=session.center.center_name if session and session.center else "N/A",
-        application_status=app_status_map.get(new_application.enrollment_status, "Pending"),
-        payment_status=payment_status_map.get(new_application.payment_status, "Pending"),
-        certificate_status=cert_status_map.get(new_application.cert_status, "Not Issued"),
+        application_status=application_status(new_application.enrollment_status),
+        payment_status=payment_status(new_application.payment_status),
+        certificate_status=certificate_status(new_application.cert_status),
         updated_date=new_application.updated_date.isoformat(),
         reg_id=new_application.reg_id
     )
 
 
-@router.patch("/profile/photo", response_model=ApplicantResponse)
-async def update_profile_photo(
-    profile_photo: UploadFile = File(...),
-    current_user: User = Depends(require_role(RoleEnum.APPLICANT)),
-    db: AsyncSession = Depends(get_db)
+@router.post("/applications/intake", response_model=IntakeStatus, status_code=status.HTTP_202_ACCEPTED)
+async def submit_application(
+    application_data: ApplicationCreate,
+    current_user: User = Depends(require_role(RoleEnum.APPLICANT))
 ):
-    """Update applicant profile photo only - uploads to Cloudinary"""
+    """Queue an application during enrollment surges; poll the returned ticket for the outcome"""
     if not current_user.applicant_id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Applicant profile not found. Please complete onboarding."
         )
     
-    result = await db.execute(
-        select(Applicant).where(Applicant.applicant_id == current_user.applicant_id)
-    )
-    applicant = result.scalar_one_or_none()
+    try:
+        ticket = await intake_service.submit(current_user.applicant_id, application_data.model_dump())
+    except DuplicateSubmission:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="You have already applied to this session"
+        )
     
-    if not applicant:
+    return IntakeStatus(ticket=ticket, status=QUEUED)
+
+
+@router.get("/applications/intake/{ticket}", response_model=IntakeStatus)
+async def get_submission_status(
+    ticket: str,
+    current_user: User = Depends(require_role(RoleEnum.APPLICANT)),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get the outcome of a queued application"""
+    if not current_user.applicant_id or not verify_ticket(ticket, current_user.applicant_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Applicant profile not found"
+            detail="Unknown ticket"
         )
     
-    # Validate file type
-    if not profile_photo.content_type or not profile_photo.content_type.startswith('image/'):
+    outcome = intake_service.status(ticket, current_user.applicant_id)
+    if outcome is not None:
+        submission_status, application_id, detail = outcome
+        return IntakeStatus(ticket=ticket, status=submission_status, application_id=application_id, detail=detail)
+    
+    # Drained by another worker, or outcome no longer tracked in memory
+    result = await db.execute(
+        select(Application.application_id).where(
+            Application.intake_ticket == ticket,
+            Application.applicant_id == current_user.applicant_id
+        )
+    )
+    application_id = result.scalar_one_or_none()
+    if application_id is not None:
+        return IntakeStatus(ticket=ticket, status=ACCEPTED, application_id=application_id)
+    
+    result = await db.execute(
+        select(IntakeRejection.detail).where(
+            IntakeRejection.intake_ticket == ticket,
+            IntakeRejection.applicant_id == current_user.applicant_id
+        )
+    )
+    detail = result.scalar_one_or_none()
+    if detail is not None:
+        return IntakeStatus(ticket=ticket, status=REJECTED, detail=detail)
+    
+    return IntakeStatus(ticket=ticket, status=QUEUED)
+
+
+@router.post("/applications/{application_id}/decline", response_model=DeclineResponse)
+async def decline_application_seat(
+    application_id: int,
+    current_user: User = Depends(require_role(RoleEnum.APPLICANT)),
+    db: AsyncSession = Depends(get_db)
+):
+    """Decline an allocated seat; the seat passes to the session waitlist"""
+    result = await db.execute(
+        select(Application)
+        .where(
+            Application.application_id == application_id,
+            Application.applicant_id == current_user.applicant_id
+        )
+        .with_for_update()
+    )
+    application = result.scalar_one_or_none()
+    
+    if not application:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="File must be an image"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Application not found"
         )
     
-    # Validate file size (5MB max)
-    contents = await profile_photo.read()
-    if len(contents) > settings.MAX_UPLOAD_SIZE:
+    if application.enrollment_status != ALLOCATED:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"File size exceeds maximum allowed size of {settings.MAX_UPLOAD_SIZE / (1024 * 1024)}MB"
+            detail="Only an allocated seat can be declined"
         )
     
-    # Check if Cloudinary is configured
-    cloud_name = settings.CLOUDINARY_CLOUD_NAME
-    api_key = settings.CLOUDINARY_API_KEY
-    api_secret = settings.CLOUDINARY_API_SECRET
+    promotions = await decline_allocation(db, application)
+    await db.commit()
     
-    if not (cloud_name and api_key and api_secret):
-        import logging
-        logger = logging.getLogger(__name__)
-        logger.error(f"Cloudinary not configured. Cloud name: '{cloud_name}', API key: '{api_key[:5] if api_key else 'None'}...', API secret: {'***' if api_secret else 'None'}")
+    return DeclineResponse(application_id=application_id, promotions=promotions)
+
+
+async def _get_own_application(db: AsyncSession, applicant_id: int, application_id: int) -> Application:
+    result = await db.execute(
+        select(Application)
+        .where(
+            Application.application_id == application_id,
+            Application.applicant_id == applicant_id
+        )
+        .with_for_update()
+    )
+    application = result.scalar_one_or_none()
+    if not application:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Application not found"
+        )
+    return application
+
+
+def _require_storage():
+    if not storage.available:
+        logger.error("Storage backend '%s' is not configured", settings.STORAGE_BACKEND)
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Image upload service is not configured. Please restart the backend server after adding Cloudinary credentials to .env file."
         )
+
+
+def _require_direct_uploads():
+    if not storage.direct_uploads:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Direct uploads are not supported by the storage backend; upload through the API instead"
+        )
+
+
+def _upload_error(e: UploadRejected) -> HTTPException:
+    if isinstance(e, UploadTooLarge):
+        code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    elif isinstance(e, UnsupportedFileType):
+        code = status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+    else:
+        code = status.HTTP_409_CONFLICT
+    return HTTPException(status_code=code, detail=str(e))
+
+
+async def _attach_document(
+    db: AsyncSession,
+    background_tasks: BackgroundTasks,
+    application: Application,
+    document: str,
+    stored: StoredFile,
+) -> None:
+    """Point the application at a stored document and drop the one it replaces"""
+    previous = getattr(application, document)
+    old_key = storage.key_from_url(previous) if previous else None
+    setattr(application, document, stored.url)
+    application.updated_date = datetime.utcnow()
+    await db.commit()
     
-    # Configure Cloudinary before upload (ensure fresh config)
+    if old_key and old_key != stored.key:
+        background_tasks.add_task(storage.discard, old_key)
+
+
+async def _store_document(
+    db: AsyncSession,
+    background_tasks: BackgroundTasks,
+    applicant_id: int,
+    application_id: int,
+    document: str,
+    received: ReceivedFile,
+) -> DocumentUpload:
+    """Move a received file to storage and point the application at it
+
+    The received file is left in place; the caller discards it.
+    """
+    # Content-addressed key: re-uploading the same file keeps the same object
+    key = f"application_documents/application_{application_id}_{document}_{received.sha256[:16]}"
     try:
-        cloudinary.config(
-            cloud_name=cloud_name,
-            api_key=api_key,
-            api_secret=api_secret
-        )
-    except Exception as e:
-        import logging
-        logger = logging.getLogger(__name__)
-        logger.error(f"Failed to configure Cloudinary: {str(e)}")
+        application = await _get_own_application(db, applicant_id, application_id)
+        stored = await storage.save_file(key, received.path, resource_type="auto")
+    except StorageError as e:
+        logger.error(f"Document upload error: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to configure Cloudinary: {str(e)}"
+            detail=f"Failed to upload document: {str(e)}"
         )
     
+    await _attach_document(db, background_tasks, application, document, stored)
+    return DocumentUpload(
+        application_id=application_id,
+        document=document,
+        url=stored.url,
+        size=received.size,
+        sha256=received.sha256,
+        content_type=received.content_type,
+    )
+
+
+@router.put("/applications/{application_id}/documents/{document}", response_model=DocumentUpload)
+async def upload_application_document(
+    application_id: int,
+    document: Literal["dob_image", "marksheet_image"],
+    request: Request,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(require_role(RoleEnum.APPLICANT)),
+    db: AsyncSession = Depends(get_db)
+):
+    """Upload a document (JPEG, PNG or PDF) as the raw request body; streamed, never buffered whole"""
+    if not current_user.applicant_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Applicant profile not found. Please complete onboarding."
+        )
+    
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > settings.MAX_UPLOAD_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File size exceeds maximum allowed size of {settings.MAX_UPLOAD_SIZE / (1024 * 1024)}MB"
+        )
+    _require_storage()
+    
+    applicant_id = current_user.applicant_id
+    await _get_own_application(db, applicant_id, application_id)
+    # Do not hold a pooled connection while a slow client sends the body;
+    # the rollback expires current_user, so only applicant_id is used below
+    await db.rollback()
+    
     try:
-        file_obj = BytesIO(contents)
-        file_obj.name = profile_photo.filename or f"profile_{applicant.applicant_id}.jpg"
-        upload_result = cloudinary.uploader.upload(
-            file_obj,
-            folder="applicant_profiles",
-            public_id=f"applicant_{applicant.applicant_id}",
-            overwrite=True,
-            resource_type="image",
-            transformation=[
-                {"width": 400, "height": 400, "crop": "fill", "gravity": "face"},
-                {"quality": "auto"},
-            ]
-        )
-        cloudinary_url = upload_result.get("secure_url")
-        if not cloudinary_url:
+        received = await receive_stream(request.stream(), settings.MAX_UPLOAD_SIZE, DOCUMENT_TYPES)
+    except UploadRejected as e:
+        raise _upload_error(e)
+    
+    try:
+        return await _store_document(db, background_tasks, applicant_id, application_id, document, received)
+    finally:
+        received.discard()
+
+
+@router.post("/uploads", response_model=ResumableUploadStatus, status_code=status.HTTP_201_CREATED)
+async def create_resumable_upload(
+    upload: ResumableUploadCreate,
+    response: Response,
+    current_user: User = Depends(require_role(RoleEnum.APPLICANT)),
+    db: AsyncSession = Depends(get_db)
+):
+    """Start a resumable document upload; send the data with PATCH /uploads/{upload_id}"""
+    if not current_user.applicant_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Applicant profile not found. Please complete onboarding."
+        )
+    
+    if upload.length > settings.MAX_UPLOAD_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File size exceeds maximum allowed size of {settings.MAX_UPLOAD_SIZE / (1024 * 1024)}MB"
+        )
+    _require_storage()
+    await _get_own_application(db, current_user.applicant_id, upload.application_id)
+    
+    upload_id = resumable_uploads.create(
+        upload.length,
+        applicant_id=current_user.applicant_id,
+        application_id=upload.application_id,
+        document=upload.document,
+    )
+    response.headers["Location"] = f"/applicant/uploads/{upload_id}"
+    response.headers["Upload-Offset"] = "0"
+    return ResumableUploadStatus(upload_id=upload_id, offset=0, length=upload.length)
+
+
+def _get_own_upload(upload_id: str, applicant_id: Optional[int]) -> dict:
+    meta = resumable_uploads.get(upload_id)
+    if meta is None or meta["applicant_id"] != applicant_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload not found"
+        )
+    return meta
+
+
+@router.head("/uploads/{upload_id}")
+async def get_resumable_upload_offset(
+    upload_id: str,
+    current_user: User = Depends(require_role(RoleEnum.APPLICANT))
+):
+    """Offset to resume from after an interrupted PATCH"""
+    meta = _get_own_upload(upload_id, current_user.applicant_id)
+    return Response(headers={
+        "Upload-Offset": str(meta["offset"]),
+        "Upload-Length": str(meta["length"]),
+        "Cache-Control": "no-store",
+    })
+
+
+@router.patch("/uploads/{upload_id}", response_model=ResumableUploadStatus)
+async def append_resumable_upload(
+    upload_id: str,
+    request: Request,
+    response: Response,
+    background_tasks: BackgroundTasks,
+    upload_offset: int = Header(..., alias="Upload-Offset", ge=0),
+    current_user: User = Depends(require_role(RoleEnum.APPLICANT)),
+    db: AsyncSession = Depends(get_db)
+):
+    """Send the next part of a resumable upload, starting at Upload-Offset"""
+    applicant_id = current_user.applicant_id
+    meta = _get_own_upload(upload_id, applicant_id)
+    # Authentication checked out a connection; do not hold it while a slow client sends the part
+    await db.rollback()
+    
+    try:
+        offset = await resumable_uploads.append(upload_id, upload_offset, request.stream(), DOCUMENT_TYPES)
+    except UploadRejected as e:
+        raise _upload_error(e)
+    except KeyError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload not found"
+        )
+    
+    response.headers["Upload-Offset"] = str(offset)
+    if offset < meta["length"]:
+        return ResumableUploadStatus(upload_id=upload_id, offset=offset, length=meta["length"])
+    
+    received = await resumable_uploads.complete(upload_id)
+    # The part file is the stored document's source; on failure it stays,
+    # and repeating this PATCH (with no body) retries storing it
+    result = await _store_document(
+        db, background_tasks, applicant_id, meta["application_id"], meta["document"], received
+    )
+    resumable_uploads.remove(upload_id)
+    return ResumableUploadStatus(
+        upload_id=upload_id, offset=offset, length=meta["length"], completed=True, result=result
+    )
+
+
+@router.post("/uploads/direct", response_model=DirectUploadTicket, status_code=status.HTTP_201_CREATED)
+async def create_direct_upload(
+    upload: DirectUploadRequest,
+    current_user: User = Depends(require_role(RoleEnum.APPLICANT)),
+    db: AsyncSession = Depends(get_db)
+):
+    """Authorise an upload straight to storage; finish with POST /uploads/direct/complete"""
+    if not current_user.applicant_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Applicant profile not found. Please complete onboarding."
+        )
+    _require_storage()
+    _require_direct_uploads()
+    
+    options = {}
+    if upload.target == "profile_photo":
+        key = f"applicant_profiles/applicant_{current_user.applicant_id}_{uuid4().hex[:12]}"
+        types = IMAGE_TYPES
+        if storage.transforms_images:
+            options["transformation"] = "c_fill,g_face,h_400,w_400/q_auto"
+    else:
+        if upload.application_id is None:
             raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to get image URL from Cloudinary"
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="application_id is required for application documents"
             )
-        if applicant.profile_photo and "cloudinary.com" in applicant.profile_photo:
-            try:
-                old_public_id = f"applicant_profiles/applicant_{applicant.applicant_id}"
-                cloudinary.uploader.destroy(old_public_id)
-            except Exception:
-                pass
-        applicant.profile_photo = cloudinary_url
-        await db.commit()
-        await db.refresh(applicant)
-        return applicant
-    except cloudinary.exceptions.Error as e:
-        import logging
-        logger = logging.getLogger(__name__)
-        logger.error(f"Cloudinary upload error: {str(e)}")
+        await _get_own_application(db, current_user.applicant_id, upload.application_id)
+        key = f"application_documents/application_{upload.application_id}_{upload.target}_{uuid4().hex[:12]}"
+        types = DOCUMENT_TYPES
+    
+    token = create_upload_token({
+        "sub": current_user.applicant_id,
+        "key": key,
+        "target": upload.target,
+        "application_id": upload.application_id,
+        "max_size": settings.MAX_UPLOAD_SIZE,
+        "types": sorted(types),
+    })
+    form = storage.direct_upload(key, token, **options)
+    return DirectUploadTicket(
+        token=token,
+        key=key,
+        max_size=settings.MAX_UPLOAD_SIZE,
+        expires_in=settings.UPLOAD_TOKEN_EXPIRE_SECONDS,
+        **form,
+    )
+
+
+@router.post("/uploads/direct/complete", response_model=DirectUploadResult)
+async def complete_direct_upload(
+    completion: DirectUploadComplete,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(require_role(RoleEnum.APPLICANT)),
+    db: AsyncSession = Depends(get_db)
+):
+    """Attach a file uploaded straight to storage to the profile or application"""
+    _require_direct_uploads()
+    claims = decode_token(completion.token)
+    if (
+        not claims
+        or claims.get("type") != "upload"
+        or not current_user.applicant_id
+        or claims.get("sub") != str(current_user.applicant_id)
+    ):
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Cloudinary upload failed: {str(e)}. Please check Cloudinary configuration."
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid or expired upload token"
         )
-    except Exception as e:
-        import logging
-        logger = logging.getLogger(__name__)
-        logger.error(f"Profile photo upload error: {str(e)}", exc_info=True)
+    
+    try:
+        stored = storage.confirm_direct_upload(claims["key"], completion.proof)
+    except StorageError as e:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to upload profile photo: {str(e)}"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
         )
+    
+    target = claims["target"]
+    if target != "profile_photo":
+        application = await _get_own_application(db, current_user.applicant_id, claims["application_id"])
+        await _attach_document(db, background_tasks, application, target, stored)
+        return DirectUploadResult(target=target, application_id=application.application_id, url=stored.url)
+    
+    result = await db.execute(
+        select(Applicant).where(Applicant.applicant_id == current_user.applicant_id).with_for_update()
+    )
+    applicant = result.scalar_one_or_none()
+    if not applicant:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Applicant profile not found"
+        )
+    
+    if storage.transforms_images:
+        url = stored.url
+        old_key = storage.key_from_url(applicant.profile_photo) if applicant.profile_photo else None
+    else:
+        # Process the raw upload into the content-addressed image store
+        data = await storage.load(stored.key)
+        if data is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Uploaded file not found"
+            )
+        try:
+            content_hash = await images.store(data, stored.sha256 or hashlib.sha256(data).hexdigest())
+        except InvalidImage:
+            background_tasks.add_task(storage.discard, stored.key)
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="File must be an image"
+            )
+        url = variant_url(content_hash, "profile")
+        old_key = stored.key  # raw upload is no longer needed
+    
+    applicant.profile_photo = url
+    await db.commit()
+    store_profile(applicant.applicant_id, ApplicantResponse.model_validate(applicant))
+    if old_key and old_key != storage.key_from_url(url):
+        background_tasks.add_task(storage.discard, old_key)
+    return DirectUploadResult(target=target, url=url)
+
 
+@router.patch("/profile/photo", response_model=ApplicantResponse)
+async def update_profile_photo(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(require_role(RoleEnum.APPLICANT)),
+    db: AsyncSession = Depends(get_db)
+):
+    """Update applicant profile photo only - the image is the raw request body, streamed to storage"""
+    if not current_user.applicant_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Applicant profile not found. Please complete onboarding."
+        )
+    
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > settings.MAX_UPLOAD_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File size exceeds maximum allowed size of {settings.MAX_UPLOAD_SIZE / (1024 * 1024)}MB"
+        )
+    _require_storage()
+    
+    applicant_id = current_user.applicant_id
+    result = await db.execute(
+        select(Applicant.applicant_id).where(Applicant.applicant_id == applicant_id)
+    )
+    if result.scalar_one_or_none() is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Applicant profile not found"
+        )
+    # Do not hold a pooled connection while the body arrives and is stored
+    await db.rollback()
+    
+    try:
+        received = await receive_stream(request.stream(), settings.MAX_UPLOAD_SIZE, IMAGE_TYPES)
+    except UploadRejected as e:
+        raise _upload_error(e)
+    
+    if not storage.transforms_images:
+        # Processed in-house; identical photos share one content-addressed master
+        try:
+            content_hash = await images.store(received.path, received.sha256)
+        except InvalidImage:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail="File must be an image"
+            )
+        finally:
+            received.discard()
+        url, stored_key = variant_url(content_hash, "profile"), None
+    else:
+        # A fresh key per upload, so removing the previous photo can never hit the new one
+        key = f"applicant_profiles/applicant_{applicant_id}_{uuid4().hex[:12]}"
+        try:
+            stored = await storage.save_file(
+                key,
+                received.path,
+                resource_type="image",
+                transformation=[
+                    {"width": 400, "height": 400, "crop": "fill", "gravity": "face"},
+                    {"quality": "auto"},
+                ]
+            )
+        except StorageError as e:
+            logger.error(f"Profile photo upload error: {str(e)}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to upload profile photo: {str(e)}"
+            )
+        finally:
+            received.discard()
+        url, stored_key = stored.url, stored.key
+    
+    result = await db.execute(
+        select(Applicant).where(Applicant.applicant_id == applicant_id).with_for_update()
+    )
+    applicant = result.scalar_one_or_none()
+    if not applicant:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Applicant profile not found"
+        )
+    
+    old_key = storage.key_from_url(applicant.profile_photo) if applicant.profile_photo else None
+    applicant.profile_photo = url
+    await db.commit()
+    await db.refresh(applicant)
+    store_profile(applicant.applicant_id, ApplicantResponse.model_validate(applicant))
+    
+    if stored_key and old_key and old_key != stored_key:
+        background_tasks.add_task(storage.discard, old_key)
+    return applicant
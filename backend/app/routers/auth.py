@@ -19,8 +19,9 @@ from app.core.security import (
     decode_token,
 )
 from app.core.auth import get_current_user
+from app.core.timing import TimedRoute
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 logger = logging.getLogger("auth")
 
 
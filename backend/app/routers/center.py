@@ -3,10 +3,10 @@ Center router
 """
 
 from datetime import datetime
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
+from sqlalchemy import select, func
 from sqlalchemy.orm import selectinload
 from pydantic import BaseModel
 from app.db.session import get_db
@@ -14,14 +14,25 @@ from app.models.user import User
 from app.models.center import Center
 from app.models.session import Session
 from app.models.application import Application
-from app.models.news import News
-from app.models.news_category import NewsCategory
+from app.models.applicant import Applicant
 from app.models.role import RoleEnum
 from app.schemas.center import CenterCreate, CenterUpdate, CenterResponse
 from app.schemas.session import SessionCreate, SessionUpdate, SessionResponse
+from app.schemas.merit import MeritListRequest, MeritListSummary, MeritListEntry
+from app.schemas.application import ApplicationStatusUpdate
+from app.schemas.news import NewsResponse
 from app.core.auth import require_role
+from app.core.conditional import not_modified, query_validators, with_validators
+from app.core.codec import (
+    Fields, Projection, RowCodec, field_selection, application_status, payment_status, certificate_status
+)
+from app.core.query_guard import query_budget
+from app.core.timing import TimedRoute
+from app.services.news_feed import news_feed
+from app.services.ranking import rank_session
+from app.services.seats import reserve_seat, confirm_seat, unconfirm_seat, release_seat
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 
 @router.post("/profile", response_model=CenterResponse, status_code=status.HTTP_201_CREATED)
@@ -179,6 +190,9 @@ class SessionResponse(BaseModel):
     start_date: datetime
     end_date: datetime
     active_status: str
+    seat_capacity: int | None = None
+    seats_reserved: int = 0
+    seats_confirmed: int = 0
     
     class Config:
         from_attributes = True
@@ -199,21 +213,54 @@ class ApplicationResponse(BaseModel):
         from_attributes = True
 
 
-class NewsResponse(BaseModel):
-    news_id: int
-    news_title: str
-    news_desc: str
-    category_name: str
-    start_datetime: datetime
-    end_datetime: datetime
-    status: str
-    
-    class Config:
-        from_attributes = True
+def _or_zero(value):
+    return value or 0
+
+
+def _or_na(value):
+    return value if value is not None else "N/A"
+
+
+def _applicant_name(applicant_id, first_name, middle_name, last_name):
+    if applicant_id is None:
+        return "N/A"
+    return f"{first_name} {middle_name or ''} {last_name}".strip()
+
+
+# Response fields and the columns they are built from, for ?fields= selection
+_session_projection = Projection(SessionResponse, {
+    "session_id": Session.session_id,
+    "session_name": Session.session_name,
+    "session_desc": Session.session_desc,
+    "start_date": Session.start_date,
+    "end_date": Session.end_date,
+    "active_status": Session.active_status,
+    "seat_capacity": Session.seat_capacity,
+    "seats_reserved": ((Session.seats_reserved,), _or_zero),
+    "seats_confirmed": ((Session.seats_confirmed,), _or_zero),
+})
+
+_application_projection = Projection(ApplicationResponse, {
+    "application_id": Application.application_id,
+    "applicant_name": (
+        (Applicant.applicant_id, Applicant.first_name, Applicant.middle_name, Applicant.last_name),
+        _applicant_name,
+    ),
+    "applicant_email": Application.applicant_email_id,
+    "session_name": ((Session.session_name,), _or_na),
+    "application_status": ((Application.enrollment_status,), application_status),
+    "payment_status": ((Application.payment_status,), payment_status),
+    "certificate_status": ((Application.cert_status,), certificate_status),
+    "reg_id": Application.reg_id,
+    "updated_date": Application.updated_date,
+})
 
 
 @router.get("/sessions", response_model=List[SessionResponse])
+@query_budget(3)
 async def get_center_sessions(
+    request: Request,
+    fields: Optional[Fields] = Depends(field_selection(SessionResponse)),
     current_user: User = Depends(require_role(RoleEnum.CENTRE)),
     db: AsyncSession = Depends(get_db)
 ):
@@ -221,25 +268,25 @@ async def get_center_sessions(
     if not current_user.center_id:
         return []
     
+    validators = await query_validators(
+        db,
+        select(func.count(Session.session_id), func.max(Session.session_id), func.max(Session.updated_date))
+        .where(Session.center_id == current_user.center_id),
+        current_user.center_id,
+        fields,
+    )
+    cached = not_modified(request, validators)
+    if cached:
+        return cached
+    
     result = await db.execute(
-        select(Session)
+        select(*_session_projection.columns(fields))
         .where(Session.center_id == current_user.center_id)
         .order_by(Session.start_date.desc())
     )
-    sessions = result.scalars().all()
-    
-    return [
-        SessionResponse(
-            session_id=s.session_id,
-            session_name=s.session_name,
-            session_desc=s.session_desc,
-            start_date=s.start_date,
-            end_date=s.end_date,
-            center_id=s.center_id,
-            active_status=s.active_status
-        )
-        for s in sessions
-    ]
+    
+    response = _session_projection.codec(fields).response(_session_projection.rows(result.all(), fields))
+    return with_validators(response, validators)
 
 
 @router.post("/sessions", response_model=SessionResponse, status_code=status.HTTP_201_CREATED)
@@ -269,7 +316,8 @@ async def create_session(
         start_date=session_data.start_date,
         end_date=session_data.end_date,
         center_id=current_user.center_id,
-        active_status=session_data.active_status
+        active_status=session_data.active_status,
+        seat_capacity=session_data.seat_capacity
     )
     
     db.add(new_session)
@@ -283,7 +331,10 @@ async def create_session(
         start_date=new_session.start_date,
         end_date=new_session.end_date,
         center_id=new_session.center_id,
-        active_status=new_session.active_status
+        active_status=new_session.active_status,
+        seat_capacity=new_session.seat_capacity,
+        seats_reserved=new_session.seats_reserved or 0,
+        seats_confirmed=new_session.seats_confirmed or 0
     )
 
 
@@ -301,12 +352,13 @@ async def update_session(
             detail="Center profile not found. Please complete onboarding."
         )
     
-    # Get session and verify ownership
+    # Get session and verify ownership; the row lock holds off concurrent seat reservations
     result = await db.execute(
         select(Session).where(
             Session.session_id == session_id,
             Session.center_id == current_user.center_id
         )
+        .with_for_update()
     )
     session = result.scalar_one_or_none()
     
@@ -316,6 +368,13 @@ async def update_session(
             detail="Session not found"
         )
     
+    capacity = session_data.seat_capacity
+    if capacity is not None and capacity < session.seats_reserved + session.seats_confirmed:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Seat capacity cannot be lower than the seats already taken"
+        )
+    
     # Validate dates if both are being updated
     update_data = session_data.model_dump(exclude_unset=True)
     start_date = update_data.get('start_date', session.start_date)
@@ -343,7 +402,10 @@ async def update_session(
         start_date=session.start_date,
         end_date=session.end_date,
         center_id=session.center_id,
-        active_status=session.active_status
+        active_status=session.active_status,
+        seat_capacity=session.seat_capacity,
+        seats_reserved=session.seats_reserved or 0,
+        seats_confirmed=session.seats_confirmed or 0
     )
 
 
@@ -382,8 +444,28 @@ async def delete_session(
     return None
 
 
+async def _load_center_applications(
+    db: AsyncSession,
+    center_id: int,
+    fields: Optional[Fields] = None
+) -> List[dict]:
+    # Only the columns of the requested fields, as plain rows: no ORM objects to track
+    result = await db.execute(
+        select(*_application_projection.columns(fields))
+        .select_from(Application)
+        .outerjoin(Applicant, Applicant.applicant_id == Application.applicant_id)
+        .outerjoin(Session, Session.session_id == Application.session_id)
+        .where(Application.center_id == center_id)
+        .order_by(Application.updated_date.desc())
+    )
+    return _application_projection.rows(result.all(), fields)
+
+
 @router.get("/applications", response_model=List[ApplicationResponse])
+@query_budget(3)
 async def get_center_applications(
+    request: Request,
+    fields: Optional[Fields] = Depends(field_selection(ApplicationResponse)),
     current_user: User = Depends(require_role(RoleEnum.CENTRE)),
     db: AsyncSession = Depends(get_db)
 ):
@@ -391,74 +473,223 @@ async def get_center_applications(
     if not current_user.center_id:
         return []
     
+    # Applicant and session names come from joined rows, so their changes count too
+    validators = await query_validators(
+        db,
+        select(
+            func.count(Application.application_id),
+            func.max(Application.application_id),
+            func.max(Application.updated_date),
+            func.max(Applicant.updated_date),
+            func.max(Session.updated_date),
+        )
+        .select_from(Application)
+        .outerjoin(Applicant, Applicant.applicant_id == Application.applicant_id)
+        .outerjoin(Session, Session.session_id == Application.session_id)
+        .where(Application.center_id == current_user.center_id),
+        current_user.center_id,
+        fields,
+    )
+    cached = not_modified(request, validators)
+    if cached:
+        return cached
+    
+    rows = await _load_center_applications(db, current_user.center_id, fields)
+    return with_validators(_application_projection.codec(fields).response(rows), validators)
+
+
+@router.patch("/applications/{application_id}/status", response_model=ApplicationResponse)
+async def update_application_status(
+    application_id: int,
+    status_data: ApplicationStatusUpdate,
+    current_user: User = Depends(require_role(RoleEnum.CENTRE)),
+    db: AsyncSession = Depends(get_db)
+):
+    """Select, reject or mark payment for an application without overbooking the session"""
+    if not current_user.center_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Center profile not found. Please complete onboarding."
+        )
+    
     result = await db.execute(
         select(Application)
         .options(
             selectinload(Application.applicant),
             selectinload(Application.session)
         )
-        .where(Application.center_id == current_user.center_id)
-        .order_by(Application.updated_date.desc())
+        .where(
+            Application.application_id == application_id,
+            Application.center_id == current_user.center_id
+        )
+        .with_for_update(of=Application)
     )
-    applications = result.scalars().all()
-    
-    # Transform to response format
-    response = []
-    for app in applications:
-        # Map status codes to readable strings
-        app_status_map = {"Y": "Selected", "N": "Submitted", "R": "Rejected", "P": "Pending"}
-        payment_status_map = {"Y": "Paid", "N": "Unpaid", "P": "Pending"}
-        cert_status_map = {"Y": "Issued", "N": "Not Issued", "P": "Pending"}
-        
-        # Get applicant name
-        applicant_name = "N/A"
-        if app.applicant:
-            applicant_name = f"{app.applicant.first_name} {app.applicant.middle_name or ''} {app.applicant.last_name}".strip()
-        
-        response.append(ApplicationResponse(
-            application_id=app.application_id,
-            applicant_name=applicant_name,
-            applicant_email=app.applicant_email_id,
-            session_name=app.session.session_name if app.session else "N/A",
-            application_status=app_status_map.get(app.enrollment_status, "Pending"),
-            payment_status=payment_status_map.get(app.payment_status, "Pending"),
-            certificate_status=cert_status_map.get(app.cert_status, "Not Issued"),
-            reg_id=app.reg_id,
-            updated_date=app.updated_date
-        ))
+    app = result.scalar_one_or_none()
+    
+    if not app:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Application not found"
+        )
     
-    return response
+    was_selected = app.enrollment_status == "Y"
+    was_paid = app.payment_status == "Y"
+    update_data = status_data.model_dump(exclude_unset=True, exclude_none=True)
+    will_selected = update_data.get("enrollment_status", app.enrollment_status) == "Y"
+    will_paid = update_data.get("payment_status", app.payment_status) == "Y"
+    
+    if will_paid and not will_selected:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Payment can only be recorded for a selected application"
+        )
+    
+    # Seat counters move with the status in the same transaction
+    if will_selected and not was_selected:
+        if not await reserve_seat(db, app.session_id):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="No seats left in this session"
+            )
+        if will_paid:
+            await confirm_seat(db, app.session_id)
+        app.sel_date = datetime.utcnow()
+        app.sel_by = current_user.employee_id
+    elif was_selected and not will_selected:
+        await release_seat(db, app.session_id, confirmed=was_paid)
+    elif will_paid and not was_paid:
+        await confirm_seat(db, app.session_id)
+    elif was_paid and not will_paid:
+        await unconfirm_seat(db, app.session_id)
+    
+    for field, value in update_data.items():
+        setattr(app, field, value)
+    if will_selected:
+        app.waitlist_position = None
+    app.updated_date = datetime.utcnow()
+    
+    await db.commit()
+    
+    applicant_name = "N/A"
+    if app.applicant:
+        applicant_name = f"{app.applicant.first_name} {app.applicant.middle_name or ''} {app.applicant.last_name}".strip()
+    
+    return ApplicationResponse(
+        application_id=app.application_id,
+        applicant_name=applicant_name,
+        applicant_email=app.applicant_email_id,
+        session_name=app.session.session_name if app.session else "N/A",
+        application_status=application_status(app.enrollment_status),
+        payment_status=payment_status(app.payment_status),
+        certificate_status=certificate_status(app.cert_status),
+        reg_id=app.reg_id,
+        updated_date=app.updated_date
+    )
 
 
 @router.get("/news", response_model=List[NewsResponse])
 async def get_center_news(
+    request: Request,
+    current_user: User = Depends(require_role(RoleEnum.CENTRE))
+):
+    """Get all news items (global news for now)"""
+    # Served from memory; the cache tracks validity windows itself
+    feed = await news_feed.centre_feed()
+    return not_modified(request, feed.validators) or with_validators(feed.response(request), feed.validators)
+
+
+
+@router.post("/sessions/{session_id}/merit-list", response_model=MeritListSummary)
+async def compute_session_merit_list(
+    session_id: int,
+    merit_request: MeritListRequest,
     current_user: User = Depends(require_role(RoleEnum.CENTRE)),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get all news items (global news for now)"""
+    """Rank all applications of a session and persist merit and category ranks"""
+    if not current_user.center_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Center profile not found. Please complete onboarding."
+        )
+    
     result = await db.execute(
-        select(News)
-        .options(selectinload(News.category))
-        .where(
-            and_(
-                News.status == "Y",
-                News.end_datetime >= datetime.utcnow()
-            )
+        select(Session.session_id).where(
+            Session.session_id == session_id,
+            Session.center_id == current_user.center_id
         )
-        .order_by(News.start_datetime.desc())
     )
-    news_items = result.scalars().all()
-    
-    return [
-        NewsResponse(
-            news_id=n.news_id,
-            news_title=n.news_title,
-            news_desc=n.news_desc,
-            category_name=n.category.news_cat_name if n.category else "General",
-            start_datetime=n.start_datetime,
-            end_datetime=n.end_datetime,
-            status=n.status
+    if result.scalar_one_or_none() is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Session not found"
         )
-        for n in news_items
-    ]
+    
+    summary = await rank_session(
+        db,
+        session_id,
+        tie_breakers=merit_request.tie_breakers,
+        seats=merit_request.seats,
+        quotas=merit_request.quotas,
+    )
+    await db.commit()
+    
+    return MeritListSummary(session_id=session_id, **summary)
+
+
+_merit_rows = RowCodec(MeritListEntry)
+
 
+@router.get("/sessions/{session_id}/merit-list", response_model=List[MeritListEntry])
+async def get_session_merit_list(
+    session_id: int,
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    caste_id: Optional[int] = Query(None, description="Restrict to one category"),
+    current_user: User = Depends(require_role(RoleEnum.CENTRE)),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get the persisted merit list of a session, ordered by rank"""
+    if not current_user.center_id:
+        return []
+    
+    rank_column = Application.category_rank if caste_id is not None else Application.merit_rank
+    query = (
+        select(
+            Application.application_id,
+            Applicant.first_name,
+            Applicant.middle_name,
+            Applicant.last_name,
+            Applicant.caste_id,
+            Application.marks,
+            Application.marks_numeric,
+            Application.merit_rank,
+            Application.category_rank,
+        )
+        .join(Applicant, Applicant.applicant_id == Application.applicant_id)
+        .where(
+            Application.session_id == session_id,
+            Application.center_id == current_user.center_id,
+            Application.merit_rank.is_not(None)
+        )
+        .order_by(rank_column)
+        .limit(limit)
+        .offset(offset)
+    )
+    if caste_id is not None:
+        query = query.where(Applicant.caste_id == caste_id)
+    
+    result = await db.execute(query)
+    
+    return _merit_rows.response([
+        dict(
+            application_id=row.application_id,
+            applicant_name=f"{row.first_name} {row.middle_name or ''} {row.last_name}".strip(),
+            caste_id=row.caste_id,
+            marks=row.marks,
+            marks_numeric=row.marks_numeric,
+            merit_rank=row.merit_rank,
+            category_rank=row.category_rank,
+        )
+        for row in result.all()
+    ])
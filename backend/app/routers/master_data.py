@@ -1,10 +1,15 @@
-
-
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from typing import List
+from typing import Awaitable, Callable, Hashable, List, Type
+from pydantic import BaseModel, TypeAdapter
 from app.db.session import get_db
+from app.core.cache import TTLCache
+from app.core.compression import Precompressed
+from app.core.conditional import not_modified, with_validators
+from app.core.config import settings
+from app.core.invalidation import invalidation_bus
+from app.core.timing import TimedRoute
 from app.models.state import State
 from app.models.district import District
 from app.models.college import College
@@ -20,67 +25,108 @@ from app.schemas.master_data import (
     StreamResponse,
 )
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
+
+# Lookup lists change only through migrations and seed scripts, so they are
+# kept as encoded, precompressed JSON; the table triggers clear them via the
+# invalidation bus, MASTER_DATA_CACHE_TTL covers a listener outage
+_payloads = TTLCache(
+    ttl=settings.MASTER_DATA_CACHE_TTL,
+    max_entries=1024,
+    max_bytes=32 * 1024 * 1024,
+    sizeof=lambda payload: payload.nbytes,
+    name="master_data",
+)
+invalidation_bus.subscribe("master", lambda key: _payloads.clear())
+
+
+def _encoder(model: Type[BaseModel]) -> Callable[[list], Precompressed]:
+    adapter = TypeAdapter(List[model])
+    return lambda rows: Precompressed(adapter.dump_json(adapter.validate_python(rows, from_attributes=True)))
+
+
+_encode = {
+    model: _encoder(model)
+    for model in (StateResponse, DistrictResponse, CollegeResponse, CasteResponse, QualificationResponse, StreamResponse)
+}
+
+
+async def _cached(request: Request, key: Hashable, load: Callable[[], Awaitable[Precompressed]]):
+    payload = await _payloads.get_or_load(key, load)
+    return not_modified(request, payload.validators) or with_validators(payload.response(request), payload.validators)
 
 
 @router.get("/states", response_model=List[StateResponse])
-async def get_states(db: AsyncSession = Depends(get_db)):
-    
-    result = await db.execute(select(State).order_by(State.state_name))
-    states = result.scalars().all()
-    return states
+async def get_states(request: Request, db: AsyncSession = Depends(get_db)):
+
+    async def load():
+        result = await db.execute(select(State).order_by(State.state_name))
+        return _encode[StateResponse](result.scalars().all())
+
+    return await _cached(request, "states", load)
 
 
 @router.get("/districts", response_model=List[DistrictResponse])
 async def get_districts(
+    request: Request,
     state_id: int = Query(..., description="State ID"),
     db: AsyncSession = Depends(get_db)
 ):
-    
-    result = await db.execute(
-        select(District)
-        .where(District.state_id == state_id)
-        .order_by(District.district_name)
-    )
-    districts = result.scalars().all()
-    return districts
+
+    async def load():
+        result = await db.execute(
+            select(District)
+            .where(District.state_id == state_id)
+            .order_by(District.district_name)
+        )
+        return _encode[DistrictResponse](result.scalars().all())
+
+    return await _cached(request, ("districts", state_id), load)
 
 
 @router.get("/colleges", response_model=List[CollegeResponse])
 async def get_colleges(
+    request: Request,
     state_id: int = Query(..., description="State ID"),
     db: AsyncSession = Depends(get_db)
 ):
-    
-    result = await db.execute(
-        select(College)
-        .where(College.state_id == state_id)
-        .order_by(College.college_name)
-    )
-    colleges = result.scalars().all()
-    return colleges
+
+    async def load():
+        result = await db.execute(
+            select(College)
+            .where(College.state_id == state_id)
+            .order_by(College.college_name)
+        )
+        return _encode[CollegeResponse](result.scalars().all())
+
+    return await _cached(request, ("colleges", state_id), load)
 
 
 @router.get("/castes", response_model=List[CasteResponse])
-async def get_castes(db: AsyncSession = Depends(get_db)):
+async def get_castes(request: Request, db: AsyncSession = Depends(get_db)):
     """Get all castes"""
-    result = await db.execute(select(Caste).order_by(Caste.caste_name))
-    castes = result.scalars().all()
-    return castes
+    async def load():
+        result = await db.execute(select(Caste).order_by(Caste.caste_name))
+        return _encode[CasteResponse](result.scalars().all())
+
+    return await _cached(request, "castes", load)
 
 
 @router.get("/qualifications", response_model=List[QualificationResponse])
-async def get_qualifications(db: AsyncSession = Depends(get_db)):
+async def get_qualifications(request: Request, db: AsyncSession = Depends(get_db)):
     """Get all qualifications"""
-    result = await db.execute(select(Qualification).order_by(Qualification.qualification_name))
-    qualifications = result.scalars().all()
-    return qualifications
+    async def load():
+        result = await db.execute(select(Qualification).order_by(Qualification.qualification_name))
+        return _encode[QualificationResponse](result.scalars().all())
+
+    return await _cached(request, "qualifications", load)
 
 
 @router.get("/streams", response_model=List[StreamResponse])
-async def get_streams(db: AsyncSession = Depends(get_db)):
+async def get_streams(request: Request, db: AsyncSession = Depends(get_db)):
     """Get all streams"""
-    result = await db.execute(select(Stream).order_by(Stream.stream_name))
-    streams = result.scalars().all()
-    return streams
+    async def load():
+        result = await db.execute(select(Stream).order_by(Stream.stream_name))
+        return _encode[StreamResponse](result.scalars().all())
 
+    return await _cached(request, "streams", load)
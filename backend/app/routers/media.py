@@ -0,0 +1,44 @@
+"""
+Media router
+
+Serves image variants produced by the in-house image pipeline. URLs are
+content-addressed, so responses are cacheable forever.
+"""
+
+from fastapi import APIRouter, HTTPException, Request, Response, status
+from app.services.images import images, is_content_hash, VARIANTS, FORMATS
+from app.services.storage import storage
+from app.core.conditional import Validators, is_not_modified
+from app.core.timing import TimedRoute
+
+router = APIRouter(route_class=TimedRoute)
+
+
+@router.get("/images/{content_hash}/{variant}.{fmt}")
+async def get_image_variant(content_hash: str, variant: str, fmt: str, request: Request):
+    """Image variant, rendered from the stored master on first request"""
+    if (storage.transforms_images or not is_content_hash(content_hash)
+            or variant not in VARIANTS or fmt not in FORMATS):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Image not found"
+        )
+    
+    validators = Validators(f'"{content_hash[:16]}-{variant}-{fmt}"', None)
+    headers = {"ETag": validators.etag, "Cache-Control": "public, max-age=31536000, immutable"}
+    if is_not_modified(request, validators):
+        # A matching tag (or `*`) only stands for an image that still exists
+        if not await images.exists(content_hash):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Image not found"
+            )
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    data = await images.variant(content_hash, variant, fmt)
+    if data is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Image not found"
+        )
+    return Response(content=data, media_type=FORMATS[fmt][1], headers=headers)
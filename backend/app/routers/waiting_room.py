@@ -0,0 +1,62 @@
+"""
+Waiting room router
+
+Tickets are checked from memory, so clients can poll while the database
+is saturated; taking one costs a sequence number on the waiting room's own
+connection. Tickets belong to the user of the bearer token sent with them.
+"""
+
+from typing import Optional
+from fastapi import APIRouter, Header, HTTPException, Query, status
+from app.core.admission import admission, ticket_holder, QueueUnavailable, TICKET_HEADER
+from app.core.timing import TimedRoute
+from app.schemas.waiting_room import QueueStatus
+
+router = APIRouter(route_class=TimedRoute)
+
+
+@router.post("/ticket", response_model=QueueStatus)
+async def take_ticket(authorization: Optional[str] = Header(None)):
+    """Join the queue ahead of opening"""
+    holder = ticket_holder(authorization)
+    try:
+        ticket = await admission.issue(holder)
+    except QueueUnavailable:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="The waiting room is not available; try again shortly"
+        )
+    admitted, position, payload = admission.check(ticket, holder)
+    if admitted:
+        ticket = admission.admission_pass(payload["seq"], holder)
+    return QueueStatus(
+        ticket=ticket,
+        admitted=admitted,
+        position=position,
+        retry_after=0 if admitted else admission.retry_after(position),
+    )
+
+
+@router.get("/status", response_model=QueueStatus)
+async def queue_status(
+    ticket: Optional[str] = Query(None),
+    ticket_header: Optional[str] = Header(None, alias=TICKET_HEADER),
+    authorization: Optional[str] = Header(None),
+):
+    """Position of a ticket; once admitted the returned ticket is the admission pass"""
+    ticket = ticket or ticket_header
+    holder = ticket_holder(authorization)
+    admitted, position, payload = admission.check(ticket, holder) if ticket else (False, 0, None)
+    if payload is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Unknown or expired ticket"
+        )
+    if admitted and "adm" not in payload:
+        ticket = admission.admission_pass(payload["seq"], holder)
+    return QueueStatus(
+        ticket=ticket,
+        admitted=admitted,
+        position=position,
+        retry_after=0 if admitted else admission.retry_after(position),
+    )
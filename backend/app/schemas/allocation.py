@@ -0,0 +1,14 @@
+"""
+Seat allocation schemas
+"""
+
+from pydantic import BaseModel
+
+
+class AllocationSummary(BaseModel):
+    """Schema for a completed allocation run"""
+    applications: int
+    allocated: int
+    waitlisted: int
+    changed: int
+    rounds: int
@@ -2,8 +2,9 @@
 Application schemas
 """
 
-from typing import Optional
-from pydantic import BaseModel, Field
+from typing import Any, Dict, Literal, Optional
+from pydantic import BaseModel, Field, model_validator
+from app.services.marks import ambiguous_marks
 
 
 class ApplicationCreate(BaseModel):
@@ -13,9 +14,17 @@ class ApplicationCreate(BaseModel):
     qualification_id: int
     stream_id: int
     marks: str = Field(..., max_length=5)
+    marks_scale: Literal["percent", "cgpa"] = "percent"  # "cgpa": marks are a 10-point CGPA
     dob_image: Optional[str] = None
     marksheet_image: Optional[str] = None
     role_id: int = Field(default=4)
+    preference: Optional[int] = Field(None, ge=1)  # defaults to the next free choice
+
+    @model_validator(mode="after")
+    def check_marks(self):
+        if ambiguous_marks(self.marks, self.marks_scale):
+            raise ValueError('Marks of 10 or less need a % sign, or marks_scale "cgpa" for a CGPA')
+        return self
 
 
 class ApplicationResponse(BaseModel):
@@ -32,3 +41,81 @@ class ApplicationResponse(BaseModel):
     class Config:
         from_attributes = True
 
+
+
+class ApplicationStatusUpdate(BaseModel):
+    """Schema for a centre updating application status"""
+    enrollment_status: Optional[str] = Field(None, pattern="^[YNRP]$")
+    payment_status: Optional[str] = Field(None, pattern="^[YNP]$")
+    cert_status: Optional[str] = Field(None, pattern="^[YNP]$")
+
+
+class IntakeStatus(BaseModel):
+    """Schema for a queued submission"""
+    ticket: str
+    status: str  # queued / accepted / rejected
+    application_id: Optional[int] = None
+    detail: Optional[str] = None
+
+
+class DeclineResponse(BaseModel):
+    """Schema for a declined seat"""
+    application_id: int
+    promotions: int
+
+
+class DocumentUpload(BaseModel):
+    """Schema for a stored application document"""
+    application_id: int
+    document: str  # dob_image / marksheet_image
+    url: str
+    size: int
+    sha256: str
+    content_type: str
+
+
+class ResumableUploadCreate(BaseModel):
+    """Schema for starting a resumable document upload"""
+    application_id: int
+    document: Literal["dob_image", "marksheet_image"]
+    length: int = Field(..., gt=0)
+
+
+class ResumableUploadStatus(BaseModel):
+    """Schema for the progress of a resumable upload"""
+    upload_id: str
+    offset: int
+    length: int
+    completed: bool = False
+    result: Optional[DocumentUpload] = None
+
+
+class DirectUploadRequest(BaseModel):
+    """Schema for requesting a direct-to-storage upload"""
+    target: Literal["profile_photo", "dob_image", "marksheet_image"]
+    application_id: Optional[int] = None  # required for application documents
+
+
+class DirectUploadTicket(BaseModel):
+    """Schema for where and how to upload a file straight to storage"""
+    token: str
+    key: str
+    url: str
+    method: str
+    fields: Dict[str, Any]  # form fields to send along with the file (multipart POST)
+    headers: Dict[str, str]
+    max_size: int
+    expires_in: int
+
+
+class DirectUploadComplete(BaseModel):
+    """Schema for confirming a direct upload"""
+    token: str
+    proof: Dict[str, Any]  # upload server receipt, or the storage provider's upload response
+
+
+class DirectUploadResult(BaseModel):
+    """Schema for an attached direct upload"""
+    target: str
+    application_id: Optional[int] = None
+    url: str
@@ -0,0 +1,53 @@
+"""
+Cache and load statistics schemas
+"""
+
+from typing import List
+from pydantic import BaseModel
+
+
+class CacheStats(BaseModel):
+    """Schema for the counters and occupancy of an in-process cache"""
+    hits: int
+    misses: int
+    fills: int
+    stale_fills: int
+    evictions: int
+    expirations: int
+    hit_rate: float
+    entries: int
+    bytes: int
+    max_entries: int
+    max_bytes: int
+
+
+class SingleFlightStats(BaseModel):
+    """Schema for the counters of a single-flight (request coalescing) group"""
+    name: str
+    calls: int
+    executions: int
+    coalesced: int
+    errors: int
+    retries: int
+    max_shared: int
+    in_flight: int
+    coalesced_rate: float
+
+
+class PriorityLoad(BaseModel):
+    """Schema for the admitted and shed requests of one load-shedding priority"""
+    priority: str
+    admitted: int
+    shed: int
+    peak_in_flight: int
+    in_flight: int
+    max_in_flight: int
+    max_waiting: int
+
+
+class LoadSheddingStats(BaseModel):
+    """Schema for connection pool pressure and load shedding per priority"""
+    enabled: bool
+    pool_waiting: int
+    pool_timeouts: int
+    priorities: List[PriorityLoad]
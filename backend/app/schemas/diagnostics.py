@@ -0,0 +1,18 @@
+"""
+Diagnostics schemas
+"""
+
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel
+
+
+class SlowQuery(BaseModel):
+    """Schema for a statement captured by the slow-query log"""
+    captured_at: datetime
+    route: Optional[str] = None
+    duration_ms: float
+    statement: str
+    parameters: str
+    plan: Optional[str] = None
+    plan_status: str
@@ -0,0 +1,44 @@
+"""
+Merit list schemas
+"""
+
+from typing import Dict, List, Literal, Optional
+from pydantic import BaseModel, Field, model_validator
+
+
+class MeritListRequest(BaseModel):
+    """Schema for computing a session merit list"""
+    tie_breakers: List[Literal["dob", "submitted"]] = Field(default=["dob", "submitted"])
+    seats: Optional[int] = Field(None, ge=0)
+    quotas: Dict[int, int] = Field(default_factory=dict)  # caste_id -> reserved seats
+
+    @model_validator(mode="after")
+    def check_quotas(self):
+        if any(q < 0 for q in self.quotas.values()):
+            raise ValueError("Quota seats must not be negative")
+        if self.quotas and self.seats is None:
+            raise ValueError("Quotas require the number of seats")
+        if self.seats is not None and sum(self.quotas.values()) > self.seats:
+            raise ValueError("Quota seats exceed total seats")
+        return self
+
+
+class MeritListSummary(BaseModel):
+    """Schema for merit list computation result"""
+    session_id: int
+    ranked: int
+    selected_application_ids: List[int]
+
+
+class MeritListEntry(BaseModel):
+    """Schema for a ranked application"""
+    application_id: int
+    applicant_name: str
+    caste_id: int
+    marks: str
+    marks_numeric: Optional[float]
+    merit_rank: int
+    category_rank: int
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,20 @@
+"""
+News schemas
+"""
+
+from datetime import datetime
+from pydantic import BaseModel
+
+
+class NewsResponse(BaseModel):
+    """Schema for a news feed item"""
+    news_id: int
+    news_title: str
+    news_desc: str
+    category_name: str
+    start_datetime: datetime
+    end_datetime: datetime
+    status: str
+    
+    class Config:
+        from_attributes = True
@@ -14,6 +14,7 @@ class SessionCreate(BaseModel):
     start_date: datetime
     end_date: datetime
     active_status: str = Field(default="N", pattern="^[YN]$")
+    seat_capacity: Optional[int] = Field(None, ge=0)
 
 
 class SessionUpdate(BaseModel):
@@ -23,6 +24,7 @@ class SessionUpdate(BaseModel):
     start_date: Optional[datetime] = None
     end_date: Optional[datetime] = None
     active_status: Optional[str] = Field(None, pattern="^[YN]$")
+    seat_capacity: Optional[int] = Field(None, ge=0)
 
 
 class SessionResponse(BaseModel):
@@ -34,6 +36,7 @@ class SessionResponse(BaseModel):
     end_date: datetime
     center_id: int
     active_status: str
+    seat_capacity: int | None = None
     enroll_id: int | None = None
     
     class Config:
@@ -0,0 +1,13 @@
+"""
+Waiting room schemas
+"""
+
+from pydantic import BaseModel
+
+
+class QueueStatus(BaseModel):
+    """Schema for a waiting room ticket status"""
+    ticket: str
+    admitted: bool
+    position: int
+    retry_after: int
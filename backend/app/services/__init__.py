@@ -0,0 +1,3 @@
+"""
+Domain services (ranking, allocation, storage)
+"""
@@ -0,0 +1,332 @@
+"""
+Multi-centre seat allocation
+
+Applicant-proposing deferred acceptance over applicant preferences and
+session capacities. The batch run is vectorised with NumPy and executed
+in a worker process; declines are handled incrementally by promoting
+from the waitlist of the vacated session (a vacancy chain) instead of
+recomputing the whole allocation.
+"""
+
+from datetime import datetime
+from typing import Dict, Optional
+import numpy as np
+from sqlalchemy import select, update
+from sqlalchemy.orm import aliased
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.executor import run_in_process
+from app.db.bulk import bulk_update
+from app.models.application import Application
+from app.models.session import Session
+from app.services.applicant_cache import mark_changed, APPLICATIONS
+from app.services.seats import reserve_seat, release_seat, recount_seats
+
+ALLOCATED = "Y"
+WAITLISTED = "W"
+NOT_ALLOCATED = "N"
+DECLINED = "D"
+
+# Applications still taking part in allocation (rejected and declined ones do not)
+ELIGIBLE_STATUSES = (NOT_ALLOCATED, ALLOCATED, WAITLISTED, "P")
+
+
+def fixed_seat(application=Application):
+    """Allocated seats that are never taken back: paid for, or selected by the centre"""
+    return (application.enrollment_status == ALLOCATED) & (
+        (application.payment_status == "Y") | application.sel_by.isnot(None)
+    )
+
+
+FIXED = fixed_seat()
+
+
+def _group_starts(sorted_groups: np.ndarray) -> np.ndarray:
+    """Index of the first element of each run in a sorted group array, repeated per element"""
+    starts = np.flatnonzero(np.r_[True, sorted_groups[1:] != sorted_groups[:-1]])
+    counts = np.diff(np.r_[starts, len(sorted_groups)])
+    return np.repeat(starts, counts)
+
+
+def deferred_acceptance(
+    applicant_idx: np.ndarray,
+    session_idx: np.ndarray,
+    preference: np.ndarray,
+    priority: np.ndarray,
+    capacity: np.ndarray,
+) -> Dict[str, np.ndarray]:
+    """
+    Applicant-proposing deferred acceptance, one proposal round at a time.
+
+    Arrays are per application: `applicant_idx` and `session_idx` are dense
+    0-based indices, lower `preference` is preferred by the applicant and
+    lower `priority` wins at the session. `capacity` is per session.
+
+    Returns per-application `held` (allocated) and `rejected` (proposed and
+    turned down, i.e. waitlisted) masks plus the number of rounds.
+    """
+    n = len(applicant_idx)
+    held = np.zeros(n, dtype=bool)
+    rejected = np.zeros(n, dtype=bool)
+    if n == 0:
+        return {"held": held, "rejected": rejected, "rounds": 0}
+
+    # Each applicant's applications in preference order, contiguous in `by_applicant`
+    by_applicant = np.lexsort((preference, applicant_idx))
+    counts = np.bincount(applicant_idx)
+    starts = np.r_[0, np.cumsum(counts)[:-1]]
+    ends = starts + counts
+    pointer = starts.copy()
+
+    seats = np.zeros(int(session_idx.max()) + 1, dtype=bool)
+    free = np.flatnonzero(counts > 0)
+    rounds = 0
+    while free.size:
+        rounds += 1
+        proposals = by_applicant[pointer[free]]
+
+        # Only sessions that received proposals need to re-select
+        seats[:] = False
+        seats[session_idx[proposals]] = True
+        incumbents = np.flatnonzero(held & seats[session_idx])
+        candidates = np.concatenate([incumbents, proposals])
+
+        order = np.lexsort((priority[candidates], session_idx[candidates]))
+        candidates = candidates[order]
+        sessions = session_idx[candidates]
+        position = np.arange(len(candidates)) - _group_starts(sessions)
+        keep = position < capacity[sessions]
+
+        held[candidates] = keep
+        losers = candidates[~keep]
+        rejected[losers] = True
+
+        loser_applicants = applicant_idx[losers]
+        pointer[loser_applicants] += 1
+        free = loser_applicants[pointer[loser_applicants] < ends[loser_applicants]]
+
+    return {"held": held, "rejected": rejected, "rounds": rounds}
+
+
+def allocate(
+    application_ids: np.ndarray,
+    applicant_ids: np.ndarray,
+    session_ids: np.ndarray,
+    preference: np.ndarray,
+    merit_rank: np.ndarray,
+    marks: np.ndarray,
+    capacity_by_session: Dict[int, Optional[int]],
+) -> Dict[str, np.ndarray]:
+    """
+    Allocate seats from raw column arrays and derive statuses and waitlists.
+
+    Sessions order candidates by merit rank, then by marks for unranked
+    applications, then by application id. Sessions without a capacity
+    are unlimited.
+    """
+    n = len(application_ids)
+    _, applicant_idx = np.unique(applicant_ids, return_inverse=True)
+    unique_sessions, session_idx = np.unique(session_ids, return_inverse=True)
+
+    rank = np.where(np.isnan(merit_rank), np.inf, merit_rank)
+    score = np.where(np.isnan(marks), -np.inf, marks)
+    priority = np.empty(n, dtype=np.int64)
+    priority[np.lexsort((application_ids, -score, rank))] = np.arange(n)
+
+    capacity = np.array(
+        [n if capacity_by_session.get(int(s)) is None else capacity_by_session[int(s)] for s in unique_sessions],
+        dtype=np.int64,
+    )
+    result = deferred_acceptance(applicant_idx, session_idx, preference, priority, capacity)
+
+    status = np.full(n, NOT_ALLOCATED, dtype="<U1")
+    status[result["held"]] = ALLOCATED
+    status[result["rejected"]] = WAITLISTED
+
+    # Waitlist position: order of the turned-down applications at each session
+    waitlist_position = np.zeros(n, dtype=np.int64)
+    waitlisted = np.flatnonzero(result["rejected"])
+    order = waitlisted[np.lexsort((priority[waitlisted], session_idx[waitlisted]))]
+    waitlist_position[order] = np.arange(len(order)) - _group_starts(session_idx[order]) + 1
+
+    return {
+        "application_id": application_ids,
+        "status": status,
+        "waitlist_position": waitlist_position,
+        "rounds": result["rounds"],
+    }
+
+
+async def run_allocation(db: AsyncSession) -> Dict[str, int]:
+    """Allocate seats across all sessions and write statuses back in bulk
+
+    Fixed seats (see FIXED) are kept: they count against their session's
+    capacity, and their applicants take no further part in the run. Their
+    waitlist entries are dropped, so a decline never promotes them.
+    """
+    result = await db.execute(
+        select(Application.session_id, Application.applicant_id).where(FIXED)
+    )
+    fixed = result.all()
+    fixed_applicants = {applicant_id for _, applicant_id in fixed}
+    fixed_by_session: Dict[int, int] = {}
+    for session_id, _ in fixed:
+        fixed_by_session[session_id] = fixed_by_session.get(session_id, 0) + 1
+
+    result = await db.execute(
+        select(
+            Application.application_id,
+            Application.applicant_id,
+            Application.session_id,
+            Application.preference,
+            Application.merit_rank,
+            Application.marks_numeric,
+            Application.enrollment_status,
+            Application.waitlist_position,
+        ).where(Application.enrollment_status.in_(ELIGIBLE_STATUSES))
+    )
+    rows = []
+    stale = []
+    for row in result.all():
+        if row.applicant_id not in fixed_applicants:
+            rows.append(row)
+        elif row.enrollment_status == WAITLISTED:
+            stale.append(row)
+    now = datetime.utcnow()
+    if stale:
+        await bulk_update(db, Application, "application_id", {
+            "application_id": [row.application_id for row in stale],
+            "enrollment_status": [NOT_ALLOCATED] * len(stale),
+            "waitlist_position": [None] * len(stale),
+            "updated_date": [now] * len(stale),
+        })
+        mark_changed(db, APPLICATIONS, {row.applicant_id for row in stale})
+    if not rows:
+        return {"applications": 0, "allocated": len(fixed), "waitlisted": 0, "changed": len(stale), "rounds": 0}
+
+    capacity_result = await db.execute(select(Session.session_id, Session.seat_capacity))
+    capacity_by_session = {
+        session_id: None if capacity is None else max(capacity - fixed_by_session.get(session_id, 0), 0)
+        for session_id, capacity in capacity_result.all()
+    }
+
+    (application_ids, applicant_ids, session_ids, preference,
+     merit_rank, marks, old_status, old_position) = zip(*rows)
+    allocation = await run_in_process(
+        allocate,
+        np.asarray(application_ids, dtype=np.int64),
+        np.asarray(applicant_ids, dtype=np.int64),
+        np.asarray(session_ids, dtype=np.int64),
+        np.asarray(preference, dtype=np.int64),
+        np.array(merit_rank, dtype=np.float64),
+        np.array(marks, dtype=np.float64),
+        capacity_by_session,
+    )
+
+    status = allocation["status"]
+    waitlist_position = np.where(status == WAITLISTED, allocation["waitlist_position"], -1)
+
+    # Only rows whose outcome changed are written back
+    previous_position = np.array([-1 if p is None else p for p in old_position], dtype=np.int64)
+    changed = (status != np.asarray(old_status)) | (waitlist_position != previous_position)
+    await bulk_update(db, Application, "application_id", {
+        "application_id": allocation["application_id"][changed].tolist(),
+        "enrollment_status": status[changed].tolist(),
+        "waitlist_position": [None if p < 0 else p for p in waitlist_position[changed].tolist()],
+        "updated_date": [now] * int(changed.sum()),
+    })
+    mark_changed(db, APPLICATIONS, set(np.asarray(applicant_ids)[changed].tolist()))
+    await recount_seats(db)
+
+    return {
+        "applications": len(rows),
+        "allocated": int((status == ALLOCATED).sum()) + len(fixed),
+        "waitlisted": int((status == WAITLISTED).sum()),
+        "changed": int(changed.sum()) + len(stale),
+        "rounds": int(allocation["rounds"]),
+    }
+
+
+async def decline_allocation(db: AsyncSession, application: Application) -> int:
+    """
+    Decline an allocated seat and promote from the waitlist.
+
+    The applicant also leaves their less-preferred applications; waitlist
+    entries at sessions they prefer are kept. Each vacated seat is offered
+    to the best waitlisted applicant of that session, whose previous seat
+    is vacated in turn. Applicants holding a fixed seat are passed over.
+    Returns the number of promotions made.
+    """
+    held = aliased(Application)
+    holds_fixed_seat = (
+        select(held.application_id)
+        .where(held.applicant_id == Application.applicant_id, fixed_seat(held))
+        .exists()
+    )
+    now = datetime.utcnow()
+    await db.execute(
+        update(Application)
+        .where(
+            Application.applicant_id == application.applicant_id,
+            Application.preference >= application.preference,
+            Application.enrollment_status.in_(ELIGIBLE_STATUSES),
+        )
+        .values(enrollment_status=DECLINED, waitlist_position=None, updated_date=now)
+    )
+    await release_seat(db, application.session_id, confirmed=application.payment_status == "Y")
+
+    promotions = 0
+    session_id = application.session_id
+    while session_id is not None:
+        result = await db.execute(
+            select(Application)
+            .where(
+                Application.session_id == session_id,
+                Application.enrollment_status == WAITLISTED,
+                ~holds_fixed_seat,
+            )
+            .order_by(Application.waitlist_position)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        candidate = result.scalar_one_or_none()
+        if candidate is None or not await reserve_seat(db, session_id):
+            break
+
+        result = await db.execute(
+            select(Application)
+            .where(
+                Application.applicant_id == candidate.applicant_id,
+                Application.enrollment_status == ALLOCATED,
+            )
+            .with_for_update()
+        )
+        previous = result.scalar_one_or_none()
+
+        candidate.enrollment_status = ALLOCATED
+        candidate.waitlist_position = None
+        candidate.updated_date = now
+        promotions += 1
+
+        # Entries below the new seat are no longer needed by this applicant
+        await db.execute(
+            update(Application)
+            .where(
+                Application.applicant_id == candidate.applicant_id,
+                Application.preference > candidate.preference,
+                Application.enrollment_status == WAITLISTED,
+            )
+            .values(enrollment_status=NOT_ALLOCATED, waitlist_position=None, updated_date=now)
+        )
+
+        if previous is None:
+            session_id = None
+        else:
+            previous.enrollment_status = NOT_ALLOCATED
+            previous.updated_date = now
+            await release_seat(db, previous.session_id, confirmed=previous.payment_status == "Y")
+            session_id = previous.session_id
+
+        # The session does not autoflush; the next step must see this one
+        await db.flush()
+
+    return promotions
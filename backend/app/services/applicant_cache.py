@@ -0,0 +1,152 @@
+"""
+Per-applicant cache of profile and application lists
+
+Dashboards poll the profile and application list, which only change when
+the applicant edits them or a centre or allocation run changes a status.
+Both are cached per `applicant_id`:
+
+- the applicant's own writes (profile edits, photo updates, new
+  applications) store the fresh value right after they commit
+- ORM writes to applicants or applications from anywhere in this process
+  (centre status changes, allocation, intake batches) invalidate the
+  affected entries once their transaction commits; bulk updates that do
+  not name applicants drop every cached application list
+- writes from other workers arrive through the invalidation bus as
+  `applicant:<id>` and `application:<id>` keys
+- APPLICANT_CACHE_TTL bounds staleness for renamed sessions or centres
+  and for the time the bus listener is down
+
+Committed application changes are delivered on the bus in this worker
+too, where `status_events` pushes them to the applicants' open dashboards.
+"""
+
+from typing import Awaitable, Callable, Iterable, List, Optional
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session as OrmSession
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.invalidation import invalidation_bus, key_id
+from app.models.applicant import Applicant
+from app.models.application import Application
+from app.schemas.applicant import ApplicantResponse
+
+PROFILE = "profile"
+APPLICATIONS = "applications"
+# Invalidation bus key of each kind, as sent by the table triggers
+BUS_KEYS = {PROFILE: "applicant", APPLICATIONS: "application"}
+
+_CHANGED = "applicant_cache_changed"
+_CHANGED_ALL = "applicant_cache_changed_all"
+
+
+def _sizeof(value) -> int:
+    """Approximate payload size: the JSON length of the cached models"""
+    if isinstance(value, list):
+        return 64 + sum(len(item.model_dump_json()) for item in value)
+    return len(value.model_dump_json())
+
+
+applicant_cache = TTLCache(
+    ttl=settings.APPLICANT_CACHE_TTL,
+    max_entries=settings.APPLICANT_CACHE_MAX_ENTRIES,
+    max_bytes=settings.APPLICANT_CACHE_MAX_BYTES,
+    sizeof=_sizeof,
+    name="applicant_cache",
+)
+
+
+async def cached_profile(
+    applicant_id: int,
+    load: Callable[[], Awaitable[Optional[ApplicantResponse]]],
+) -> Optional[ApplicantResponse]:
+    return await applicant_cache.get_or_load((PROFILE, applicant_id), load)
+
+
+async def cached_applications(applicant_id: int, load: Callable[[], Awaitable[List]]) -> List:
+    return await applicant_cache.get_or_load((APPLICATIONS, applicant_id), load)
+
+
+def store_profile(applicant_id: int, profile: ApplicantResponse) -> None:
+    """Write-through after the applicant's own profile change has committed"""
+    applicant_cache.set((PROFILE, applicant_id), profile)
+
+
+async def refresh_applications(applicant_id: int, load: Callable[[], Awaitable[List]]) -> List:
+    """Reload and store an application list after the applicant's own change has committed"""
+    return await applicant_cache.fill((APPLICATIONS, applicant_id), load)
+
+
+def mark_changed(db: AsyncSession, kind: str, applicant_ids: Optional[Iterable[int]] = None) -> None:
+    """
+    Invalidate entries when the current transaction commits.
+
+    For writes the ORM events cannot see, such as raw SQL bulk updates;
+    without `applicant_ids` every entry of that kind is dropped.
+    """
+    _mark(db.sync_session, kind, applicant_ids)
+
+
+def _mark(session: OrmSession, kind: str, applicant_ids: Optional[Iterable[int]]) -> None:
+    if applicant_ids is None:
+        session.info.setdefault(_CHANGED_ALL, set()).add(kind)
+    else:
+        session.info.setdefault(_CHANGED, set()).update((kind, i) for i in applicant_ids)
+
+
+@event.listens_for(OrmSession, "after_flush")
+def _applicants_flushed(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Applicant):
+            _mark(session, PROFILE, (obj.applicant_id,))
+        elif isinstance(obj, Application) and obj.applicant_id is not None:
+            _mark(session, APPLICATIONS, (obj.applicant_id,))
+
+
+@event.listens_for(OrmSession, "do_orm_execute")
+def _applicants_bulk_write(orm_execute_state):
+    if orm_execute_state.is_select:
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None:
+        return
+    kind = {Applicant: PROFILE, Application: APPLICATIONS}.get(mapper.class_)
+    if kind is None:
+        return
+    # Bulk inserts (intake batches) name their applicants in the parameters
+    parameters = orm_execute_state.parameters
+    rows = parameters if isinstance(parameters, list) else [parameters] if parameters else []
+    if orm_execute_state.is_insert and rows and all("applicant_id" in row for row in rows):
+        _mark(orm_execute_state.session, kind, (row["applicant_id"] for row in rows))
+    else:
+        _mark(orm_execute_state.session, kind, None)
+
+
+@event.listens_for(OrmSession, "after_commit")
+def _applicants_committed(session):
+    changed_all = session.info.pop(_CHANGED_ALL, ())
+    changed = session.info.pop(_CHANGED, ())
+    keys = [BUS_KEYS[kind] for kind in changed_all]
+    keys += [f"{BUS_KEYS[kind]}:{applicant_id}" for kind, applicant_id in changed if kind not in changed_all]
+    if keys:
+        invalidation_bus.deliver(keys)
+
+
+@event.listens_for(OrmSession, "after_rollback")
+def _applicants_rolled_back(session):
+    session.info.pop(_CHANGED, None)
+    session.info.pop(_CHANGED_ALL, None)
+
+
+def _invalidated(kind: str):
+    def invalidate(key: str) -> None:
+        applicant_id = key_id(key)
+        if applicant_id is None:
+            applicant_cache.invalidate_where(lambda cached: cached[0] == kind)
+        else:
+            applicant_cache.invalidate((kind, applicant_id))
+    return invalidate
+
+
+invalidation_bus.subscribe(BUS_KEYS[PROFILE], _invalidated(PROFILE))
+invalidation_bus.subscribe(BUS_KEYS[APPLICATIONS], _invalidated(APPLICATIONS))
@@ -0,0 +1,156 @@
+"""
+Image processing for deployments without Cloudinary
+
+Uploads are decoded, oriented, stripped of EXIF and downscaled to a WebP
+master in the process pool. Masters are keyed by the SHA-256 of the
+uploaded bytes, so identical uploads are processed and stored once.
+Variants (profile crop, thumbnail, ...) are rendered from the master on
+first request and stored next to it.
+"""
+
+import asyncio
+import re
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+from PIL import Image, ImageOps
+from app.core.executor import run_in_process
+from app.services.storage import storage, StorageBackend
+
+MASTER_MAX_SIDE = 2048
+# Refuse decompression bombs before allocating the bitmap
+Image.MAX_IMAGE_PIXELS = 40_000_000
+
+# name: (width, height, crop); crop fills the box, otherwise the image fits inside it
+VARIANTS: Dict[str, Tuple[int, int, bool]] = {
+    "profile": (400, 400, True),
+    "thumb": (96, 96, True),
+    "medium": (800, 800, False),
+}
+FORMATS = {"webp": ("WEBP", "image/webp"), "jpg": ("JPEG", "image/jpeg")}
+MEDIA_URL_PREFIX = "/media/images"
+
+_HASH = re.compile(r"^[0-9a-f]{64}$")
+
+
+class InvalidImage(Exception):
+    """Upload could not be decoded as an image"""
+
+
+def master_key(content_hash: str) -> str:
+    return f"images/{content_hash}/master.webp"
+
+
+def variant_key(content_hash: str, variant: str, fmt: str) -> str:
+    return f"images/{content_hash}/{variant}.{fmt}"
+
+
+def variant_url(content_hash: str, variant: str, fmt: str = "webp") -> str:
+    return f"{MEDIA_URL_PREFIX}/{content_hash}/{variant}.{fmt}"
+
+
+def is_content_hash(value: str) -> bool:
+    return bool(_HASH.match(value))
+
+
+def _open(source, max_side: int) -> Image.Image:
+    """Decode, downscale to `max_side` and apply the EXIF orientation"""
+    try:
+        image = Image.open(source)
+        # JPEG can decode straight at 1/2, 1/4 or 1/8 scale
+        image.draft("RGB", (max_side, max_side))
+        image.load()
+    except (OSError, Image.DecompressionBombError) as e:
+        raise InvalidImage(str(e)) from e
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info or image.mode in ("LA", "PA") else "RGB")
+    # Resize before rotating: both are cheaper on the smaller bitmap
+    image.thumbnail((max_side, max_side), Image.LANCZOS, reducing_gap=2.0)
+    # The EXIF tags themselves are not carried over when re-encoding
+    return ImageOps.exif_transpose(image)
+
+
+def _encode(image: Image.Image, fmt: str, quality: int, method: int = 4) -> bytes:
+    pil_format, _ = FORMATS[fmt]
+    if pil_format == "JPEG" and image.mode == "RGBA":
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        image = background
+    out = BytesIO()
+    if pil_format == "WEBP":
+        image.save(out, pil_format, quality=quality, method=method)
+    else:
+        image.save(out, pil_format, quality=quality, optimize=True, progressive=True)
+    return out.getvalue()
+
+
+def prepare_master(source: Union[str, bytes]) -> bytes:
+    """Decode an upload (path or bytes), strip metadata and downscale it to a WebP master (runs in a worker)"""
+    image = _open(BytesIO(source) if isinstance(source, bytes) else source, MASTER_MAX_SIDE)
+    # Fastest WebP method: the master is only an intermediate for variants
+    return _encode(image, "webp", 90, method=0)
+
+
+def render_variant(master: bytes, variant: str, fmt: str) -> bytes:
+    """Render a named variant from master bytes (runs in a worker)"""
+    width, height, crop = VARIANTS[variant]
+    if crop:
+        image = _open(BytesIO(master), MASTER_MAX_SIDE)
+        # Bias the crop upwards: faces sit in the upper part of portraits
+        image = ImageOps.fit(image, (width, height), Image.LANCZOS, centering=(0.5, 0.35))
+    else:
+        image = _open(BytesIO(master), max(width, height))
+    return _encode(image, fmt, 82)
+
+
+class ImagePipeline:
+    """Content-addressed image store on top of a storage backend"""
+
+    def __init__(self, backend: StorageBackend):
+        self.backend = backend
+        self._rendering: Dict[str, asyncio.Future] = {}
+
+    async def store(self, source: Union[Path, bytes], content_hash: str) -> str:
+        """Store an uploaded image (file or bytes) once per content hash; returns the hash"""
+        key = master_key(content_hash)
+        if not await self.backend.exists(key):
+            if isinstance(source, Path):
+                source = str(source.resolve())
+            master = await run_in_process(prepare_master, source)
+            await self.backend.save(key, master)
+        return content_hash
+
+    async def exists(self, content_hash: str) -> bool:
+        return await self.backend.exists(master_key(content_hash))
+
+    async def variant(self, content_hash: str, variant: str, fmt: str) -> Optional[bytes]:
+        """Bytes of a variant, rendered and stored on first request; None for an unknown image"""
+        key = variant_key(content_hash, variant, fmt)
+        data = await self.backend.load(key)
+        if data is not None:
+            return data
+
+        # Concurrent first requests for the same variant share one render
+        pending = self._rendering.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+        future = asyncio.get_running_loop().create_future()
+        self._rendering[key] = future
+        try:
+            master = await self.backend.load(master_key(content_hash))
+            data = None
+            if master is not None:
+                data = await run_in_process(render_variant, master, variant, fmt)
+                await self.backend.save(key, data)
+            future.set_result(data)
+            return data
+        except BaseException as e:
+            future.set_exception(e)
+            # Waiters get the error; mark it retrieved so it is not logged twice
+            future.exception()
+            raise
+        finally:
+            del self._rendering[key]
+
+
+images = ImagePipeline(storage)
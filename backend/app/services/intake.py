@@ -0,0 +1,480 @@
+"""
+Write-behind intake for application submissions
+
+During enrollment surges a submission is validated, appended to a local
+journal file and acknowledged with a ticket as soon as the journal is
+fsynced (appends arriving together share one fsync). A background drainer
+inserts journalled submissions in large batches with one commit per batch;
+clients poll the ticket for the outcome.
+"""
+
+import asyncio
+import fcntl
+import hashlib
+import hmac
+import json
+import logging
+import os
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import select, insert, func, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.applicant import Applicant
+from app.models.application import Application
+from app.models.enrollment_news import EnrollmentNews
+from app.models.intake_rejection import IntakeRejection
+from app.models.qualification import Qualification
+from app.models.role_master import Role
+from app.models.session import Session
+from app.models.stream import Stream
+from app.services.marks import normalise_marks
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+ACCEPTED = "accepted"
+REJECTED = "rejected"
+
+# ticket -> (status, application_id, detail)
+Outcome = Tuple[str, Optional[int], Optional[str]]
+
+
+class DuplicateSubmission(Exception):
+    """The applicant already has a queued submission for this session"""
+
+
+def _signature(ticket_id: str, applicant_id: int) -> str:
+    message = f"{ticket_id}:{applicant_id}".encode()
+    return hmac.new(settings.SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()[:16]
+
+
+def issue_ticket(applicant_id: int) -> str:
+    """Create a ticket bound to the applicant"""
+    ticket_id = uuid.uuid4().hex
+    return f"{ticket_id}.{_signature(ticket_id, applicant_id)}"
+
+
+def verify_ticket(ticket: str, applicant_id: int) -> bool:
+    """Check that a ticket was issued by this service for this applicant"""
+    ticket_id, _, signature = ticket.partition(".")
+    return bool(signature) and hmac.compare_digest(signature, _signature(ticket_id, applicant_id))
+
+
+class IntakeJournal:
+    """Append-only journal file with group-committed fsyncs"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.offset_path = path.with_suffix(".offset")
+        self._file = open(path, "ab")
+        # Marks the journal as owned by a live worker
+        fcntl.flock(self._file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        self.lock = asyncio.Lock()
+        self._pending: List[Tuple[bytes, asyncio.Future]] = []
+        self._wakeup = asyncio.Event()
+        self._writer: Optional[asyncio.Task] = None
+        self.appended = 0
+        self.fsyncs = 0
+
+    async def append(self, record: dict) -> None:
+        """Return once the record is durable on disk"""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((json.dumps(record, default=str).encode() + b"\n", future))
+        self._wakeup.set()
+        if self._writer is None:
+            self._writer = asyncio.create_task(self._write_loop())
+        await future
+
+    async def _write_loop(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            batch, self._pending = self._pending, []
+            if not batch:
+                continue
+            try:
+                async with self.lock:
+                    await asyncio.to_thread(self._write, b"".join(line for line, _ in batch))
+            except Exception as exc:
+                logger.error(f"Intake journal write failed: {exc}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            self.appended += len(batch)
+            self.fsyncs += 1
+            for _, future in batch:
+                if not future.done():
+                    future.set_result(None)
+
+    def _write(self, data: bytes) -> None:
+        self._file.write(data)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    async def truncate_if_drained(self, offset: int) -> bool:
+        """Reset the journal once everything in it has been drained"""
+        async with self.lock:
+            if self._pending or offset < self.path.stat().st_size:
+                return False
+            os.ftruncate(self._file.fileno(), 0)
+            write_offset(self.offset_path, 0)
+            return True
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._writer.cancel()
+            self._writer = None
+        self._file.close()
+
+
+def read_offset(path: Path) -> int:
+    try:
+        return int(path.read_text() or 0)
+    except FileNotFoundError:
+        return 0
+
+
+def write_offset(path: Path, offset: int) -> None:
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(str(offset))
+    os.replace(tmp, path)
+
+
+def read_records(path: Path, offset: int, limit: int) -> Tuple[List[dict], int]:
+    """Read up to `limit` complete records from `offset`; a torn last line is left for later"""
+    records = []
+    with open(path, "rb") as f:
+        f.seek(offset)
+        while len(records) < limit:
+            line = f.readline()
+            if not line.endswith(b"\n"):
+                break
+            offset += len(line)
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                logger.error(f"Skipping corrupt intake record in {path.name} at offset {offset}")
+    return records, offset
+
+
+# Client-supplied references checked before inserting: (field, primary key, what)
+REFERENCES = (
+    ("enroll_id", EnrollmentNews.enroll_id, "Enrollment"),
+    ("qualification_id", Qualification.qualification_id, "Qualification"),
+    ("stream_id", Stream.stream_id, "Stream"),
+    ("role_id", Role.role_id, "Role"),
+)
+
+
+async def _existing_references(db: AsyncSession, records: List[dict]) -> Dict[str, set]:
+    """Which of the referenced ids in a batch exist, per field"""
+    found = {}
+    for field, column, _ in REFERENCES:
+        ids = {r["data"][field] for r in records}
+        result = await db.execute(select(column).where(column.in_(list(ids))))
+        found[field] = set(result.scalars().all())
+    return found
+
+
+async def _insert_rows(db: AsyncSession, rows: List[dict], outcomes: Dict[str, Outcome]) -> None:
+    """Insert the rows in one statement, or one by one if that fails
+
+    A row the checks in `insert_submissions` could not catch (a concurrent
+    duplicate, a reference deleted meanwhile, an out-of-range value) then
+    rejects only its own submission instead of failing the batch on every
+    retry of the drainer.
+    """
+    statement = insert(Application).returning(Application.intake_ticket, Application.application_id)
+    try:
+        async with db.begin_nested():
+            result = await db.execute(statement, rows)
+            inserted = result.all()
+    except DBAPIError as exc:
+        # A lost connection fails every row; the drainer retries the batch
+        if exc.connection_invalidated:
+            raise
+        inserted = []
+        for row in rows:
+            try:
+                async with db.begin_nested():
+                    result = await db.execute(statement, [row])
+                    inserted += result.all()
+            except DBAPIError as exc:
+                if exc.connection_invalidated:
+                    raise
+                logger.warning(f"Rejected intake submission {row['intake_ticket']}: {exc.orig}")
+                outcomes[row["intake_ticket"]] = (REJECTED, None, "Submission could not be processed")
+    for ticket, application_id in inserted:
+        outcomes[ticket] = (ACCEPTED, application_id, None)
+
+
+async def insert_submissions(records: List[dict]) -> Dict[str, Outcome]:
+    """Validate a batch against the database and insert it in one transaction"""
+    outcomes: Dict[str, Outcome] = {}
+    async with AsyncSessionLocal() as db:
+        tickets = [r["ticket"] for r in records]
+        result = await db.execute(
+            select(Application.intake_ticket, Application.application_id)
+            .where(Application.intake_ticket.in_(tickets))
+        )
+        # Already handled before a crash: the journal is replayed at least once
+        done = dict(result.all())
+        for ticket, application_id in done.items():
+            outcomes[ticket] = (ACCEPTED, application_id, None)
+        result = await db.execute(
+            select(IntakeRejection.intake_ticket, IntakeRejection.detail)
+            .where(IntakeRejection.intake_ticket.in_(tickets))
+        )
+        for ticket, detail in result.all():
+            done[ticket] = None
+            outcomes[ticket] = (REJECTED, None, detail)
+
+        records = [r for r in records if r["ticket"] not in done]
+        if not records:
+            return outcomes
+
+        session_ids = {r["data"]["session_id"] for r in records}
+        applicant_ids = {r["applicant_id"] for r in records}
+        result = await db.execute(
+            select(Session.session_id, Session.center_id).where(Session.session_id.in_(list(session_ids)))
+        )
+        centers = dict(result.all())
+        result = await db.execute(
+            select(Applicant.applicant_id, Applicant.email_id).where(Applicant.applicant_id.in_(list(applicant_ids)))
+        )
+        emails = dict(result.all())
+        pairs = {(r["applicant_id"], r["data"]["session_id"]) for r in records}
+        result = await db.execute(
+            select(Application.applicant_id, Application.session_id)
+            .where(tuple_(Application.applicant_id, Application.session_id).in_(list(pairs)))
+        )
+        existing = {tuple(row) for row in result.all()}
+        result = await db.execute(
+            select(Application.applicant_id, func.max(Application.preference))
+            .where(Application.applicant_id.in_(list(applicant_ids)))
+            .group_by(Application.applicant_id)
+        )
+        next_preference = {applicant_id: (top or 0) + 1 for applicant_id, top in result.all()}
+        references = await _existing_references(db, records)
+
+        rows = []
+        now = datetime.utcnow()
+        for record in records:
+            data = record["data"]
+            applicant_id = record["applicant_id"]
+            pair = (applicant_id, data["session_id"])
+            if applicant_id not in emails:
+                outcomes[record["ticket"]] = (REJECTED, None, "Applicant profile not found")
+                continue
+            if data["session_id"] not in centers:
+                outcomes[record["ticket"]] = (REJECTED, None, "Session not found")
+                continue
+            missing = next((what for field, _, what in REFERENCES if data[field] not in references[field]), None)
+            if missing:
+                outcomes[record["ticket"]] = (REJECTED, None, f"{missing} not found")
+                continue
+            if pair in existing:
+                outcomes[record["ticket"]] = (REJECTED, None, "You have already applied to this session")
+                continue
+            existing.add(pair)
+
+            preference = data.get("preference")
+            if preference is None:
+                preference = next_preference.get(applicant_id, 1)
+                next_preference[applicant_id] = preference + 1
+
+            rows.append({
+                "applicant_id": applicant_id,
+                "enroll_id": data["enroll_id"],
+                "session_id": data["session_id"],
+                "center_id": centers[data["session_id"]],
+                "applicant_email_id": emails[applicant_id],
+                "qualification_id": data["qualification_id"],
+                "stream_id": data["stream_id"],
+                "marks": data["marks"],
+                "marks_scale": data.get("marks_scale", "percent"),
+                "marks_numeric": normalise_marks(data["marks"], data.get("marks_scale", "percent")),
+                "dob_image": data.get("dob_image"),
+                "marksheet_image": data.get("marksheet_image"),
+                "role_id": data["role_id"],
+                "preference": preference,
+                "enrollment_status": "N",
+                "payment_status": "N",
+                "cert_status": "N",
+                # Queued submissions rank by when they were made, not when they were drained
+                "submitted_date": datetime.fromisoformat(record["accepted_at"]) if "accepted_at" in record else now,
+                "updated_date": now,
+                "intake_ticket": record["ticket"],
+            })
+
+        if rows:
+            await _insert_rows(db, rows, outcomes)
+        await _record_rejections(db, records, outcomes, emails)
+        await db.commit()
+    return outcomes
+
+
+async def _record_rejections(
+    db: AsyncSession, records: List[dict], outcomes: Dict[str, Outcome], applicants: Iterable[int]
+) -> None:
+    """Keep rejections where every worker can report them, also after a restart"""
+    applicants = set(applicants)
+    now = datetime.utcnow()
+    rejected = [
+        {
+            "intake_ticket": r["ticket"],
+            "applicant_id": r["applicant_id"],
+            "detail": outcomes[r["ticket"]][2],
+            "rejected_date": now,
+        }
+        for r in records
+        # Nobody can poll for an applicant that does not exist
+        if outcomes[r["ticket"]][0] == REJECTED and r["applicant_id"] in applicants
+    ]
+    if rejected:
+        await db.execute(pg_insert(IntakeRejection).on_conflict_do_nothing(), rejected)
+
+
+class IntakeService:
+    """Journal, status board and drainer of one API worker"""
+
+    def __init__(
+        self,
+        directory: str,
+        batch_size: int = 500,
+        interval: float = 0.2,
+        sink: Callable[[List[dict]], Awaitable[Dict[str, Outcome]]] = insert_submissions,
+        max_tracked: int = 100_000,
+    ):
+        self.directory = Path(directory)
+        self.batch_size = batch_size
+        self.interval = interval
+        self.sink = sink
+        self.max_tracked = max_tracked
+        self.journal: Optional[IntakeJournal] = None
+        self._statuses: "OrderedDict[str, Tuple[int, Outcome]]" = OrderedDict()
+        self._inflight: Dict[Tuple[int, int], str] = {}
+        self._drainer: Optional[asyncio.Task] = None
+        self.stats = {"accepted": 0, "drained": 0, "inserted": 0, "rejected": 0, "commits": 0, "errors": 0}
+
+    async def start(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.journal = IntakeJournal(self.directory / f"journal-{os.getpid()}.log")
+        self._drainer = asyncio.create_task(self._drain_loop())
+
+    async def stop(self) -> None:
+        if self._drainer is not None:
+            self._drainer.cancel()
+            self._drainer = None
+        if self.journal is not None:
+            await self.journal.close()
+            self.journal = None
+
+    async def submit(self, applicant_id: int, data: dict) -> str:
+        """Journal a submission and return its ticket"""
+        key = (applicant_id, data["session_id"])
+        if key in self._inflight:
+            raise DuplicateSubmission()
+        ticket = issue_ticket(applicant_id)
+        self._inflight[key] = ticket
+        self._track(ticket, applicant_id, (QUEUED, None, None))
+        try:
+            await self.journal.append({
+                "ticket": ticket,
+                "applicant_id": applicant_id,
+                "data": data,
+                "accepted_at": datetime.utcnow().isoformat(),
+            })
+        except Exception:
+            self._inflight.pop(key, None)
+            self._statuses.pop(ticket, None)
+            raise
+        self.stats["accepted"] += 1
+        return ticket
+
+    def status(self, ticket: str, applicant_id: int) -> Optional[Outcome]:
+        """Outcome known to this worker, or None"""
+        entry = self._statuses.get(ticket)
+        if entry is None or entry[0] != applicant_id:
+            return None
+        return entry[1]
+
+    def _track(self, ticket: str, applicant_id: int, outcome: Outcome) -> None:
+        self._statuses[ticket] = (applicant_id, outcome)
+        self._statuses.move_to_end(ticket)
+        while len(self._statuses) > self.max_tracked:
+            self._statuses.popitem(last=False)
+
+    async def _drain_loop(self) -> None:
+        while True:
+            try:
+                drained = await self.drain(self.journal)
+                for orphan in self._orphaned_journals():
+                    drained += await self._drain_orphan(orphan)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                self.stats["errors"] += 1
+                logger.error(f"Intake drain failed, will retry: {exc}", exc_info=True)
+                drained = 0
+            if not drained:
+                await asyncio.sleep(self.interval)
+
+    async def drain(self, journal: IntakeJournal) -> int:
+        """Insert one batch from the journal; returns the number of records drained"""
+        offset = read_offset(journal.offset_path)
+        records, new_offset = await asyncio.to_thread(read_records, journal.path, offset, self.batch_size)
+        if not records:
+            await journal.truncate_if_drained(offset)
+            return 0
+
+        await self._apply(records)
+        write_offset(journal.offset_path, new_offset)
+        return len(records)
+
+    async def _apply(self, records: List[dict]) -> None:
+        outcomes = await self.sink(records)
+        self.stats["commits"] += 1
+        self.stats["drained"] += len(records)
+        for record in records:
+            outcome = outcomes.get(record["ticket"], (REJECTED, None, "Submission could not be processed"))
+            self.stats["inserted" if outcome[0] == ACCEPTED else "rejected"] += 1
+            self._track(record["ticket"], record["applicant_id"], outcome)
+            self._inflight.pop((record["applicant_id"], record["data"]["session_id"]), None)
+
+    def _orphaned_journals(self) -> List[Path]:
+        own = self.journal.path if self.journal else None
+        return [path for path in self.directory.glob("journal-*.log") if path != own]
+
+    async def _drain_orphan(self, path: Path) -> int:
+        """Take over the journal of a worker that is no longer running"""
+        with open(path, "rb") as f:
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return 0  # owner is alive
+            offset_path = path.with_suffix(".offset")
+            offset = read_offset(offset_path)
+            records, new_offset = await asyncio.to_thread(read_records, path, offset, self.batch_size)
+            if records:
+                await self._apply(records)
+                write_offset(offset_path, new_offset)
+                return len(records)
+            path.unlink(missing_ok=True)
+            offset_path.unlink(missing_ok=True)
+            return 0
+
+
+intake_service = IntakeService(
+    settings.INTAKE_DIR,
+    batch_size=settings.INTAKE_BATCH_SIZE,
+    interval=settings.INTAKE_DRAIN_INTERVAL,
+)
@@ -0,0 +1,49 @@
+"""
+Marks normalisation
+
+Kept free of heavy imports: request schemas validate marks with it.
+"""
+
+import math
+from typing import Optional
+
+
+def _parse_marks(raw) -> Optional[float]:
+    text = str(raw).strip().rstrip("%").strip()
+    try:
+        value = float(text)
+    except ValueError:
+        return None
+    return value if math.isfinite(value) and value >= 0 else None
+
+
+def ambiguous_marks(raw, scale: str = "percent") -> bool:
+    """Whether percentage marks could as well be a CGPA: 10 or less, without a % sign"""
+    if raw is None or scale != "percent" or str(raw).strip().endswith("%"):
+        return False
+    value = _parse_marks(raw)
+    return value is not None and value <= 10
+
+
+def normalise_marks(raw, scale: str = "percent") -> Optional[float]:
+    """
+    Convert free-text marks to a percentage.
+
+    On the "percent" scale accepts "78", "78.5" and "78.5%"; values up to
+    10 count only with a % sign, as they may be a CGPA sent without its
+    scale (see `ambiguous_marks`). On the "cgpa" scale accepts a 10-point
+    CGPA such as "8.2" and scales it to 100. Anything unparseable, out of
+    range or ambiguous returns None and is ranked last.
+    """
+    if raw is None or ambiguous_marks(raw, scale):
+        return None
+    value = _parse_marks(raw)
+    if value is None:
+        return None
+    if scale == "cgpa":
+        if value > 10:
+            return None
+        value *= 10
+    elif value > 100:
+        return None
+    return round(value, 2)
@@ -0,0 +1,194 @@
+"""
+In-memory news feeds
+
+Both feeds are a pure function of the published news rows and the
+current time, and only change when a row's window opens or closes. The
+cache keeps the published rows in memory, precomputes both feeds as JSON
+bytes and keeps them until the next window boundary, so requests never
+touch Postgres. Feeds are `Precompressed`: each encoding is compressed
+once per feed rather than once per request.
+
+ORM writes to news or categories invalidate the rows when they commit;
+writes from other workers arrive as the `news` key on the invalidation
+bus. NEWS_CACHE_TTL bounds staleness while the bus listener is down.
+
+Feed semantics (same as the original queries):
+- applicant: start_datetime <= now <= end_datetime, newest update first
+  (NULL updated_date first, as Postgres sorts DESC), at most 10 items
+- centre: end_datetime >= now, latest start first
+"""
+
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional
+from pydantic import TypeAdapter
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session as OrmSession
+from app.core.compression import Precompressed
+from app.core.config import settings
+from app.core.invalidation import invalidation_bus
+from app.db.session import AsyncSessionLocal
+from app.models.news import News
+from app.models.news_category import NewsCategory
+from app.schemas.news import NewsResponse
+
+APPLICANT_FEED_LIMIT = 10
+# Windows are inclusive and timestamps have microsecond resolution
+_RESOLUTION = timedelta(microseconds=1)
+
+_feed_adapter = TypeAdapter(List[NewsResponse])
+
+
+class NewsFeedCache:
+    """Published news rows plus feeds precomputed until the next boundary"""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._rows: Optional[List[NewsResponse]] = None
+        self._updated: dict = {}
+        self._generation = 0
+        self._loaded_generation = -1
+        self._loaded_at = 0.0
+        self._lock = asyncio.Lock()
+        self._applicant = Precompressed(b"[]")
+        self._applicant_items: List[NewsResponse] = []
+        self._centre = Precompressed(b"[]")
+        self._computed_at: Optional[datetime] = None
+        self._valid_until: Optional[datetime] = None
+        self.stats = {"hits": 0, "recomputes": 0, "reloads": 0}
+
+    def invalidate(self) -> None:
+        """Drop the loaded rows; the next request reloads them"""
+        self._generation += 1
+
+    def _stale(self) -> bool:
+        return (
+            self._loaded_generation != self._generation
+            or time.monotonic() - self._loaded_at > self.ttl
+        )
+
+    async def _reload(self) -> None:
+        generation = self._generation
+        now = datetime.utcnow()
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(
+                    News.news_id,
+                    News.news_title,
+                    News.news_desc,
+                    NewsCategory.news_cat_name,
+                    News.start_datetime,
+                    News.end_datetime,
+                    News.status,
+                    News.updated_date,
+                )
+                .outerjoin(NewsCategory, NewsCategory.news_cat_id == News.news_cat_id)
+                .where(News.status == "Y", News.end_datetime >= now)
+            )
+            rows = result.all()
+
+        self._rows = [
+            NewsResponse(
+                news_id=row.news_id,
+                news_title=row.news_title,
+                news_desc=row.news_desc,
+                category_name=row.news_cat_name or "General",
+                start_datetime=row.start_datetime,
+                end_datetime=row.end_datetime,
+                status=row.status,
+            )
+            for row in rows
+        ]
+        self._updated = {row.news_id: row.updated_date for row in rows}
+        self._loaded_generation = generation
+        self._loaded_at = time.monotonic()
+        self._computed_at = None
+        self.stats["reloads"] += 1
+
+    def _compute(self, now: datetime) -> None:
+        """Build both feeds for `now` and find when either can next change"""
+        rows = self._rows
+        live = [n for n in rows if n.start_datetime <= now <= n.end_datetime]
+        live.sort(key=lambda n: n.news_id)
+        live.sort(
+            key=lambda n: (self._updated[n.news_id] is None, self._updated[n.news_id] or datetime.min),
+            reverse=True,
+        )
+        upcoming = sorted(
+            (n for n in rows if n.end_datetime >= now),
+            key=lambda n: n.start_datetime,
+            reverse=True,
+        )
+        self._applicant_items = live[:APPLICANT_FEED_LIMIT]
+        self._applicant = Precompressed(_feed_adapter.dump_json(self._applicant_items))
+        self._centre = Precompressed(_feed_adapter.dump_json(upcoming))
+
+        boundaries = [n.start_datetime for n in rows if n.start_datetime > now]
+        boundaries += [n.end_datetime + _RESOLUTION for n in rows if n.end_datetime >= now]
+        self._computed_at = now
+        self._valid_until = min(boundaries) if boundaries else None
+        self.stats["recomputes"] += 1
+
+    async def _feed(self) -> None:
+        if self._stale():
+            async with self._lock:
+                if self._stale():
+                    await self._reload()
+        now = datetime.utcnow()
+        if (
+            self._computed_at is None
+            or now < self._computed_at
+            or (self._valid_until is not None and now >= self._valid_until)
+        ):
+            self._compute(now)
+        else:
+            self.stats["hits"] += 1
+
+    async def applicant_feed(self) -> Precompressed:
+        """JSON of the news currently shown to applicants"""
+        await self._feed()
+        return self._applicant
+
+    async def applicant_items(self) -> List[NewsResponse]:
+        """The applicant feed as models, for composite responses"""
+        await self._feed()
+        return self._applicant_items
+
+    async def centre_feed(self) -> Precompressed:
+        """JSON of the current and upcoming news shown to centres"""
+        await self._feed()
+        return self._centre
+
+
+news_feed = NewsFeedCache(settings.NEWS_CACHE_TTL)
+invalidation_bus.subscribe("news", lambda key: news_feed.invalidate())
+
+
+@event.listens_for(OrmSession, "after_flush")
+def _news_flushed(session, flush_context):
+    """Remember that this transaction wrote news; invalidate once it commits"""
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, (News, NewsCategory)):
+            session.info["news_changed"] = True
+            return
+
+
+@event.listens_for(OrmSession, "do_orm_execute")
+def _news_bulk_write(orm_execute_state):
+    if orm_execute_state.is_select:
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.class_ in (News, NewsCategory):
+        orm_execute_state.session.info["news_changed"] = True
+
+
+@event.listens_for(OrmSession, "after_commit")
+def _news_committed(session):
+    if session.info.pop("news_changed", False):
+        invalidation_bus.deliver(("news",))
+
+
+@event.listens_for(OrmSession, "after_rollback")
+def _news_rolled_back(session):
+    session.info.pop("news_changed", None)
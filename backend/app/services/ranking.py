@@ -0,0 +1,158 @@
+"""
+Merit-list ranking for sessions
+
+Scoring is done with NumPy sorts in a worker process; ranks are written
+back to t_applications in a single bulk UPDATE.
+"""
+
+from typing import Dict, Optional, Sequence
+import numpy as np
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.executor import run_in_process
+from app.db.bulk import bulk_update
+from app.models.applicant import Applicant
+from app.models.application import Application
+
+# dob: older applicant first, submitted: earlier submission first
+TIE_BREAKERS = ("dob", "submitted")
+
+
+def _group_positions(order: np.ndarray, groups: np.ndarray) -> np.ndarray:
+    """0-based position of each element of `order` within its group, keeping `order`'s sequence"""
+    if len(order) == 0:
+        return np.empty(0, dtype=np.int64)
+    by_group = np.argsort(groups[order], kind="stable")
+    grouped = groups[order][by_group]
+    starts = np.flatnonzero(np.r_[True, grouped[1:] != grouped[:-1]])
+    counts = np.diff(np.r_[starts, len(grouped)])
+    positions = np.empty(len(order), dtype=np.int64)
+    positions[by_group] = np.arange(len(order)) - np.repeat(starts, counts)
+    return positions
+
+
+def compute_merit_list(
+    application_ids: Sequence[int],
+    marks: Sequence[float],
+    dob_days: Sequence[int],
+    submitted: Sequence[int],
+    caste_ids: Sequence[int],
+    tie_breakers: Sequence[str] = TIE_BREAKERS,
+    seats: Optional[int] = None,
+    quotas: Optional[Dict[int, int]] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Rank applications by marks (descending) with the given tie-breakers.
+
+    `dob_days` and `submitted` are ordinal (days, microseconds); lower comes
+    first. Application id is always the final tie-breaker so the order is
+    total.
+    When `seats` is given, open-merit seats are filled first, then the
+    per-caste quota seats from the remaining applicants of that caste;
+    quota seats that cannot be filled roll over to general merit.
+    """
+    ids = np.asarray(application_ids, dtype=np.int64)
+    score = np.asarray(marks, dtype=np.float64)
+    score = np.where(np.isnan(score), -np.inf, score)
+    castes = np.asarray(caste_ids, dtype=np.int64)
+    n = len(ids)
+
+    # np.lexsort uses the last key as the primary one
+    keys = [ids]
+    for breaker in reversed(list(tie_breakers)):
+        if breaker == "dob":
+            keys.append(np.asarray(dob_days, dtype=np.int64))
+        elif breaker == "submitted":
+            keys.append(np.asarray(submitted, dtype=np.int64))
+        else:
+            raise ValueError(f"Unknown tie-breaker: {breaker}")
+    keys.append(-score)
+    order = np.lexsort(keys)
+
+    merit_rank = np.empty(n, dtype=np.int64)
+    merit_rank[order] = np.arange(1, n + 1)
+    category_rank = np.empty(n, dtype=np.int64)
+    category_rank[order] = _group_positions(order, castes) + 1
+
+    selected = np.zeros(n, dtype=bool)
+    if seats is not None and n:
+        quotas = quotas or {}
+        open_seats = max(seats - sum(quotas.values()), 0)
+        selected[order[:open_seats]] = True
+
+        if quotas:
+            remaining = order[~selected[order]]
+            unique_castes, inverse = np.unique(castes, return_inverse=True)
+            quota_of = np.array([quotas.get(int(c), 0) for c in unique_castes], dtype=np.int64)[inverse]
+            positions = _group_positions(remaining, castes)
+            selected[remaining[positions < quota_of[remaining]]] = True
+
+        leftover = seats - int(selected.sum())
+        if leftover > 0:
+            selected[order[~selected[order]][:leftover]] = True
+
+    return {
+        "application_id": ids,
+        "merit_rank": merit_rank,
+        "category_rank": category_rank,
+        "selected": selected,
+    }
+
+
+async def rank_session(
+    db: AsyncSession,
+    session_id: int,
+    tie_breakers: Sequence[str] = TIE_BREAKERS,
+    seats: Optional[int] = None,
+    quotas: Optional[Dict[int, int]] = None,
+) -> Dict[str, object]:
+    """Compute and persist the merit list of a session; rejected applications are left unranked"""
+    result = await db.execute(
+        select(
+            Application.application_id,
+            Application.marks_numeric,
+            Applicant.dob,
+            Application.submitted_date,
+            Applicant.caste_id,
+        )
+        .join(Applicant, Applicant.applicant_id == Application.applicant_id)
+        .where(
+            Application.session_id == session_id,
+            Application.enrollment_status != "R",
+        )
+    )
+    rows = result.all()
+
+    await db.execute(
+        update(Application)
+        .where(Application.session_id == session_id, Application.enrollment_status == "R")
+        .values(merit_rank=None, category_rank=None)
+    )
+    if not rows:
+        return {"ranked": 0, "selected_application_ids": []}
+
+    ids, marks, dobs, submitted, castes = zip(*rows)
+    ranking = await run_in_process(
+        compute_merit_list,
+        np.asarray(ids, dtype=np.int64),
+        np.array(marks, dtype=np.float64),
+        np.array(dobs, dtype="datetime64[D]").astype(np.int64),
+        np.array(submitted, dtype="datetime64[us]").astype(np.int64),
+        np.asarray(castes, dtype=np.int64),
+        tuple(tie_breakers),
+        seats,
+        quotas,
+    )
+
+    await bulk_update(db, Application, "application_id", {
+        "application_id": ranking["application_id"].tolist(),
+        "merit_rank": ranking["merit_rank"].tolist(),
+        "category_rank": ranking["category_rank"].tolist(),
+    })
+
+    selected = ranking["application_id"][ranking["selected"]]
+    selected_ranks = ranking["merit_rank"][ranking["selected"]]
+    return {
+        "ranked": len(rows),
+        "selected_application_ids": selected[np.argsort(selected_ranks)].tolist(),
+    }
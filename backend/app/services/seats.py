@@ -0,0 +1,101 @@
+"""
+Seat-capacity counters for sessions
+
+Every change is a single conditional UPDATE on the m_session row, so the
+capacity check and the increment happen atomically in Postgres and
+concurrent selections or payments cannot overbook a session.
+"""
+
+from typing import Iterable, Optional
+from sqlalchemy import update, select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.application import Application
+from app.models.session import Session
+
+
+async def reserve_seat(db: AsyncSession, session_id: int) -> bool:
+    """Hold a seat for a selected applicant; False when the session is full"""
+    result = await db.execute(
+        update(Session)
+        .where(
+            Session.session_id == session_id,
+            (Session.seat_capacity.is_(None))
+            | (Session.seats_reserved + Session.seats_confirmed < Session.seat_capacity),
+        )
+        .values(seats_reserved=Session.seats_reserved + 1)
+        .returning(Session.session_id)
+        .execution_options(synchronize_session=False)
+    )
+    return result.scalar_one_or_none() is not None
+
+
+async def confirm_seat(db: AsyncSession, session_id: int) -> bool:
+    """Turn a reserved seat into a confirmed one once payment is received"""
+    result = await db.execute(
+        update(Session)
+        .where(Session.session_id == session_id, Session.seats_reserved > 0)
+        .values(
+            seats_reserved=Session.seats_reserved - 1,
+            seats_confirmed=Session.seats_confirmed + 1,
+        )
+        .returning(Session.session_id)
+        .execution_options(synchronize_session=False)
+    )
+    return result.scalar_one_or_none() is not None
+
+
+async def unconfirm_seat(db: AsyncSession, session_id: int) -> bool:
+    """Move a confirmed seat back to reserved (payment reverted)"""
+    result = await db.execute(
+        update(Session)
+        .where(Session.session_id == session_id, Session.seats_confirmed > 0)
+        .values(
+            seats_reserved=Session.seats_reserved + 1,
+            seats_confirmed=Session.seats_confirmed - 1,
+        )
+        .returning(Session.session_id)
+        .execution_options(synchronize_session=False)
+    )
+    return result.scalar_one_or_none() is not None
+
+
+async def release_seat(db: AsyncSession, session_id: int, confirmed: bool = False) -> bool:
+    """Give a reserved (or confirmed) seat back to the session"""
+    column = Session.seats_confirmed if confirmed else Session.seats_reserved
+    result = await db.execute(
+        update(Session)
+        .where(Session.session_id == session_id, column > 0)
+        .values({column.key: column - 1})
+        .returning(Session.session_id)
+        .execution_options(synchronize_session=False)
+    )
+    return result.scalar_one_or_none() is not None
+
+
+async def recount_seats(db: AsyncSession, session_ids: Optional[Iterable[int]] = None) -> None:
+    """Rebuild the counters from t_applications after bulk status changes"""
+    selected = Application.enrollment_status == "Y"
+    paid = Application.payment_status == "Y"
+    counts = (
+        select(
+            Application.session_id.label("session_id"),
+            func.count().filter(selected & ~paid).label("reserved"),
+            func.count().filter(selected & paid).label("confirmed"),
+        )
+        .where(selected)
+        .group_by(Application.session_id)
+    )
+    reset = update(Session).values(seats_reserved=0, seats_confirmed=0)
+    if session_ids is not None:
+        session_ids = list(session_ids)
+        counts = counts.where(Application.session_id.in_(session_ids))
+        reset = reset.where(Session.session_id.in_(session_ids))
+    counts = counts.subquery()
+
+    await db.execute(reset.execution_options(synchronize_session=False))
+    await db.execute(
+        update(Session)
+        .where(Session.session_id == counts.c.session_id)
+        .values(seats_reserved=counts.c.reserved, seats_confirmed=counts.c.confirmed)
+        .execution_options(synchronize_session=False)
+    )
@@ -0,0 +1,95 @@
+"""
+Application status push
+
+Applicant dashboards hold one idle Server-Sent Events connection instead
+of polling. Each connection is a `Subscription`: an event flag plus the
+applicant id, parked until a commit changes one of that applicant's
+applications.
+
+Changes arrive through the invalidation bus as `application` keys, both
+from commits in this worker and, via LISTEN/NOTIFY, from every other
+worker. Keys that do not name applicants (bulk changes, a reconnected
+listener) wake every subscriber; those wake-ups are spread over
+STATUS_EVENTS_BROADCAST_SPREAD seconds so that the clients do not all
+reload at once.
+"""
+
+import asyncio
+from typing import Dict, Iterable, Optional, Set
+from app.core.invalidation import invalidation_bus, key_id
+
+
+class Subscription:
+    """One open event stream; `changed` is set when its applications change"""
+
+    __slots__ = ("applicant_id", "changed", "broadcast")
+
+    def __init__(self, applicant_id: int):
+        self.applicant_id = applicant_id
+        self.changed = asyncio.Event()
+        self.broadcast = False
+
+    async def wait(self, timeout: float) -> bool:
+        """True when woken by a change, False after `timeout` seconds"""
+        try:
+            # asyncio.timeout, unlike wait_for, needs no extra task per wait
+            async with asyncio.timeout(timeout):
+                await self.changed.wait()
+        except TimeoutError:
+            return False
+        self.changed.clear()
+        return True
+
+
+class StatusEvents:
+    """In-process fan-out of application changes to open event streams"""
+
+    def __init__(self):
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+        self.closed = False
+        self.stats = {"published": 0, "delivered": 0}
+
+    @property
+    def connections(self) -> int:
+        return sum(len(subscriptions) for subscriptions in self._subscribers.values())
+
+    def subscribe(self, applicant_id: int) -> Subscription:
+        subscription = Subscription(applicant_id)
+        self._subscribers.setdefault(applicant_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscriptions = self._subscribers.get(subscription.applicant_id)
+        if subscriptions is not None:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscribers[subscription.applicant_id]
+
+    def publish(self, applicant_ids: Optional[Iterable[int]] = None) -> None:
+        """Wake the subscribers of `applicant_ids` (None: everyone)"""
+        self.stats["published"] += 1
+        if applicant_ids is None:
+            targets = [(s, True) for subscriptions in self._subscribers.values() for s in subscriptions]
+        else:
+            targets = [
+                (s, False)
+                for applicant_id in set(applicant_ids)
+                for s in self._subscribers.get(applicant_id, ())
+            ]
+        for subscription, broadcast in targets:
+            subscription.broadcast = subscription.broadcast or broadcast
+            subscription.changed.set()
+        self.stats["delivered"] += len(targets)
+
+    def invalidated(self, key: str) -> None:
+        applicant_id = key_id(key)
+        self.publish(None if applicant_id is None else (applicant_id,))
+
+    def close(self) -> None:
+        """End every open stream (shutdown)"""
+        self.closed = True
+        self.publish(None)
+
+
+status_events = StatusEvents()
+invalidation_bus.subscribe("application", status_events.invalidated)
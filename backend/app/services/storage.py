@@ -0,0 +1,330 @@
+"""
+File storage backends
+
+Handlers talk to a `StorageBackend` with an async interface. The
+Cloudinary backend runs the blocking SDK calls on a dedicated thread pool
+sharing one pooled HTTP connector, so a slow upload never blocks the
+event loop. The local backend writes below UPLOAD_DIR and is meant for
+development and tests.
+"""
+
+import asyncio
+import logging
+import os
+import re
+import shutil
+import time
+import urllib.request
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlparse
+import cloudinary
+import cloudinary.api
+import cloudinary.uploader
+from cloudinary import utils as cloudinary_utils
+from app.core.config import settings
+from app.core.security import decode_token
+
+logger = logging.getLogger(__name__)
+
+LOCAL_URL_PREFIX = "/uploads"
+LARGE_FILE_SIZE = 20 * 1024 * 1024  # Cloudinary's upload_large chunk size
+
+
+class StorageError(Exception):
+    """Upload or delete failed in the storage backend"""
+
+
+@dataclass
+class StoredFile:
+    key: str
+    url: str
+    sha256: Optional[str] = None
+
+
+class StorageBackend(ABC):
+    """Async interface shared by all storage backends"""
+
+    @property
+    def available(self) -> bool:
+        return True
+
+    @property
+    def transforms_images(self) -> bool:
+        """Whether the backend crops and recompresses images itself"""
+        return False
+
+    @property
+    def direct_uploads(self) -> bool:
+        """Whether clients can upload straight to the backend (see `direct_upload`)"""
+        return False
+
+    @abstractmethod
+    async def save(self, key: str, data: bytes, **options) -> StoredFile:
+        """Store `data` under `key`; backend-specific `options` may be ignored"""
+
+    @abstractmethod
+    async def save_file(self, key: str, path: Path, **options) -> StoredFile:
+        """Store a file from disk under `key`; the file may be moved or left behind"""
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """Remove the object stored under `key`, if any"""
+
+    @abstractmethod
+    def key_from_url(self, url: str) -> Optional[str]:
+        """Key of an object served from `url`, or None when the URL is not ours"""
+
+    @abstractmethod
+    async def exists(self, key: str) -> bool:
+        """Whether an object is stored under `key`"""
+
+    @abstractmethod
+    async def load(self, key: str) -> Optional[bytes]:
+        """Contents stored under `key`, or None when missing"""
+
+    @abstractmethod
+    def direct_upload(self, key: str, token: str, **options) -> dict:
+        """Where and how a client uploads `key` without going through the API"""
+
+    @abstractmethod
+    def confirm_direct_upload(self, key: str, proof: dict) -> StoredFile:
+        """Check the client's proof that `key` was uploaded; raises StorageError"""
+
+    def close(self) -> None:
+        """Release resources held by the backend"""
+
+    async def discard(self, key: str) -> None:
+        """Delete without raising; used for background clean-up"""
+        try:
+            await self.delete(key)
+        except Exception:
+            logger.warning("Failed to delete stored file %s", key, exc_info=True)
+
+
+class CloudinaryStorage(StorageBackend):
+    """Cloudinary SDK calls on a bounded thread pool with pooled connections"""
+
+    _PUBLIC_ID = re.compile(r"/upload/(?:.*?/)?v\d+/(.+?)(?:\.[A-Za-z0-9]+)?$")
+
+    def __init__(self, cloud_name: str, api_key: str, api_secret: str, max_connections: int):
+        self._configured = bool(cloud_name and api_key and api_secret)
+        self._cloud_name = cloud_name
+        self._api_key = api_key
+        self._api_secret = api_secret
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_connections, thread_name_prefix="cloudinary"
+        )
+        self._uploader = cloudinary.uploader
+        if not self._configured:
+            return
+
+        cloudinary.config(cloud_name=cloud_name, api_key=api_key, api_secret=api_secret)
+        # The SDK's module-level connector keeps a single connection per
+        # host; size it to the thread pool so concurrent calls reuse sockets.
+        cloudinary.uploader._http = cloudinary_utils.get_http_connector(
+            cloudinary.config(), {**cloudinary.CERT_KWARGS, "maxsize": max_connections}
+        )
+
+    @property
+    def available(self) -> bool:
+        return self._configured
+
+    @property
+    def transforms_images(self) -> bool:
+        return True
+
+    @property
+    def direct_uploads(self) -> bool:
+        return self._configured
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+
+    async def _call(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._executor, partial(fn, *args, **kwargs))
+        except cloudinary.exceptions.Error as e:
+            raise StorageError(str(e)) from e
+
+    async def save(self, key: str, data: bytes, **options) -> StoredFile:
+        result = await self._call(
+            self._uploader.upload,
+            data,
+            public_id=key,
+            overwrite=True,
+            **options,
+        )
+        url = result.get("secure_url")
+        if not url:
+            raise StorageError("Cloudinary did not return a URL")
+        return StoredFile(key=result.get("public_id", key), url=url)
+
+    async def save_file(self, key: str, path: Path, **options) -> StoredFile:
+        # The SDK streams files above its chunk size in several requests
+        upload = self._uploader.upload_large if path.stat().st_size > LARGE_FILE_SIZE else self._uploader.upload
+        result = await self._call(upload, str(path), public_id=key, overwrite=True, **options)
+        url = result.get("secure_url")
+        if not url:
+            raise StorageError("Cloudinary did not return a URL")
+        return StoredFile(key=result.get("public_id", key), url=url)
+
+    async def delete(self, key: str) -> None:
+        await self._call(self._uploader.destroy, key)
+
+    async def _resource(self, key: str) -> Optional[dict]:
+        # Uploads with resource_type "auto" become images (PDFs included) or raw files
+        for resource_type in ("image", "raw"):
+            try:
+                return await self._call(cloudinary.api.resource, key, resource_type=resource_type)
+            except StorageError as e:
+                if not isinstance(e.__cause__, cloudinary.exceptions.NotFound):
+                    raise
+        return None
+
+    async def exists(self, key: str) -> bool:
+        return await self._resource(key) is not None
+
+    @staticmethod
+    def _download(url: str) -> bytes:
+        with urllib.request.urlopen(url, timeout=30) as response:
+            return response.read()
+
+    async def load(self, key: str) -> Optional[bytes]:
+        resource = await self._resource(key)
+        if resource is None:
+            return None
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._executor, self._download, resource["secure_url"])
+        except OSError as e:
+            raise StorageError(f"Download of {key} failed: {e}") from e
+
+    def direct_upload(self, key: str, token: str, **options) -> dict:
+        # Signed upload parameters; Cloudinary rejects any change to them
+        params = {"public_id": key, "timestamp": int(time.time()), **options}
+        signature = cloudinary_utils.api_sign_request(params, self._api_secret)
+        return {
+            "url": f"https://api.cloudinary.com/v1_1/{self._cloud_name}/auto/upload",
+            "method": "POST",
+            "fields": {**params, "api_key": self._api_key, "signature": signature},
+            "headers": {},
+        }
+
+    def confirm_direct_upload(self, key: str, proof: dict) -> StoredFile:
+        # Fields of Cloudinary's upload response; its signature covers public_id and version
+        public_id = proof.get("public_id")
+        version = proof.get("version")
+        signature = proof.get("signature")
+        if public_id != key or not version or not signature:
+            raise StorageError("Upload response does not match this upload")
+        if not cloudinary_utils.verify_api_response_signature(public_id, version, signature):
+            raise StorageError("Invalid upload response signature")
+        url, _ = cloudinary_utils.cloudinary_url(
+            public_id,
+            version=version,
+            format=proof.get("format"),
+            resource_type=proof.get("resource_type", "image"),
+            secure=True,
+        )
+        return StoredFile(key=public_id, url=url)
+
+    def key_from_url(self, url: str) -> Optional[str]:
+        if not url or "cloudinary.com" not in url:
+            return None
+        match = self._PUBLIC_ID.search(urlparse(url).path)
+        return match.group(1) if match else None
+
+
+class LocalStorage(StorageBackend):
+    """Files below a local directory, served by the app under /uploads"""
+
+    def __init__(self, root: str, url_prefix: str = LOCAL_URL_PREFIX):
+        self.root = Path(root).resolve()
+        self.url_prefix = url_prefix.rstrip("/")
+
+    @property
+    def direct_uploads(self) -> bool:
+        # Received by the stand-in upload server, when one is configured
+        return bool(settings.UPLOAD_SERVER_URL)
+
+    def _path(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if self.root not in path.parents:
+            raise StorageError(f"Invalid storage key: {key}")
+        return path
+
+    def _write(self, path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+    async def save(self, key: str, data: bytes, **options) -> StoredFile:
+        await asyncio.to_thread(self._write, self._path(key), data)
+        return StoredFile(key=key, url=f"{self.url_prefix}/{key}")
+
+    def _move(self, source: Path, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        shutil.move(str(source), str(path))
+
+    async def save_file(self, key: str, path: Path, **options) -> StoredFile:
+        await asyncio.to_thread(self._move, path, self._path(key))
+        return StoredFile(key=key, url=f"{self.url_prefix}/{key}")
+
+    async def delete(self, key: str) -> None:
+        await asyncio.to_thread(self._path(key).unlink, missing_ok=True)
+
+    async def exists(self, key: str) -> bool:
+        return await asyncio.to_thread(self._path(key).is_file)
+
+    def _read(self, path: Path) -> Optional[bytes]:
+        try:
+            return path.read_bytes()
+        except FileNotFoundError:
+            return None
+
+    async def load(self, key: str) -> Optional[bytes]:
+        return await asyncio.to_thread(self._read, self._path(key))
+
+    def direct_upload(self, key: str, token: str, **options) -> dict:
+        return {
+            "url": f"{settings.UPLOAD_SERVER_URL.rstrip('/')}/upload",
+            "method": "PUT",
+            "fields": {},
+            "headers": {"Authorization": f"Bearer {token}"},
+        }
+
+    def confirm_direct_upload(self, key: str, proof: dict) -> StoredFile:
+        # Receipt signed by the upload server (app.upload_server)
+        receipt = decode_token(proof.get("receipt") or "")
+        if not receipt or receipt.get("type") != "upload_receipt" or receipt.get("key") != key:
+            raise StorageError("Invalid upload receipt")
+        return StoredFile(key=key, url=f"{self.url_prefix}/{key}", sha256=receipt.get("sha256"))
+
+    def key_from_url(self, url: str) -> Optional[str]:
+        if not url or not url.startswith(self.url_prefix + "/"):
+            return None
+        return url[len(self.url_prefix) + 1:]
+
+
+def create_storage() -> StorageBackend:
+    """Backend selected by STORAGE_BACKEND"""
+    if settings.STORAGE_BACKEND == "local":
+        return LocalStorage(settings.UPLOAD_DIR)
+    if settings.STORAGE_BACKEND == "cloudinary":
+        return CloudinaryStorage(
+            settings.CLOUDINARY_CLOUD_NAME,
+            settings.CLOUDINARY_API_KEY,
+            settings.CLOUDINARY_API_SECRET,
+            settings.STORAGE_MAX_CONNECTIONS,
+        )
+    raise ValueError(f"Unknown storage backend: {settings.STORAGE_BACKEND}")
+
+
+storage = create_storage()
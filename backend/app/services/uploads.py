@@ -0,0 +1,255 @@
+"""
+Streaming uploads
+
+Request bodies are consumed chunk by chunk into a temporary file: the
+size limit is enforced while data arrives, the SHA-256 is computed on the
+fly and the content type is sniffed from the first bytes instead of being
+taken from the client. Memory use stays at a few chunks per upload
+whatever the file size.
+
+Resumable uploads follow the tus model: the client declares the length,
+then sends the file in any number of PATCH requests carrying the offset
+they continue from, and can ask for the current offset after a dropped
+connection.
+"""
+
+import asyncio
+import fcntl
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, Iterable, Optional
+from app.core.config import settings
+
+SNIFF_BYTES = 16
+
+IMAGE_TYPES = frozenset({"image/jpeg", "image/png", "image/gif", "image/webp"})
+DOCUMENT_TYPES = frozenset({"image/jpeg", "image/png", "application/pdf"})
+
+_SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"%PDF-", "application/pdf"),
+)
+
+_UPLOAD_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+class UploadRejected(Exception):
+    """Upload refused while it was being received"""
+
+
+class UploadTooLarge(UploadRejected):
+    pass
+
+
+class UnsupportedFileType(UploadRejected):
+    pass
+
+
+class UploadConflict(UploadRejected):
+    """Offset mismatch or another request is writing the same upload"""
+
+
+def sniff_content_type(head: bytes) -> Optional[str]:
+    """Content type from magic bytes, or None when unrecognised"""
+    for signature, content_type in _SIGNATURES:
+        if head.startswith(signature):
+            return content_type
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def _check_type(head: bytes, allowed: Iterable[str]) -> str:
+    content_type = sniff_content_type(head)
+    if content_type not in allowed:
+        raise UnsupportedFileType(f"Allowed file types: {', '.join(sorted(allowed))}")
+    return content_type
+
+
+@dataclass
+class ReceivedFile:
+    path: Path
+    size: int
+    sha256: str
+    content_type: str
+
+    def discard(self) -> None:
+        self.path.unlink(missing_ok=True)
+
+
+async def receive_stream(
+    chunks: AsyncIterator[bytes],
+    max_size: int,
+    allowed_types: Iterable[str],
+    directory: Optional[str] = None,
+) -> ReceivedFile:
+    """Spool a stream to a temporary file, enforcing size and type as it arrives"""
+    directory = Path(directory or settings.UPLOAD_TMP_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    fd, name = tempfile.mkstemp(dir=directory, suffix=".upload")
+    path = Path(name)
+    digest = hashlib.sha256()
+    size = 0
+    head = b""
+    content_type = None
+    try:
+        with os.fdopen(fd, "wb") as f:
+            async for chunk in chunks:
+                if not chunk:
+                    continue
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadTooLarge(f"File exceeds the maximum size of {max_size} bytes")
+                if content_type is None:
+                    head += chunk[:SNIFF_BYTES - len(head)]
+                    if len(head) >= SNIFF_BYTES:
+                        content_type = _check_type(head, allowed_types)
+                digest.update(chunk)
+                f.write(chunk)
+        if content_type is None:
+            content_type = _check_type(head, allowed_types)
+    except BaseException:
+        path.unlink(missing_ok=True)
+        raise
+    return ReceivedFile(path=path, size=size, sha256=digest.hexdigest(), content_type=content_type)
+
+
+class ResumableUploads:
+    """Partial uploads on disk: `<id>.part` holds the data, `<id>.json` the metadata"""
+
+    def __init__(self, directory: str, ttl: int):
+        self.directory = Path(directory)
+        self.ttl = ttl
+
+    def _paths(self, upload_id: str):
+        if not _UPLOAD_ID.match(upload_id):
+            return None, None
+        return self.directory / f"{upload_id}.part", self.directory / f"{upload_id}.json"
+
+    def create(self, length: int, **meta) -> str:
+        """Register an upload of `length` bytes; `meta` identifies owner and target"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.purge_stale()
+        upload_id = uuid.uuid4().hex
+        part, info = self._paths(upload_id)
+        part.touch()
+        info.write_text(json.dumps({**meta, "length": length, "created": time.time()}))
+        return upload_id
+
+    def get(self, upload_id: str) -> Optional[dict]:
+        """Metadata with the current offset, or None for an unknown upload"""
+        part, info = self._paths(upload_id)
+        if info is None or not info.exists():
+            return None
+        try:
+            meta = json.loads(info.read_text())
+            meta["offset"] = part.stat().st_size
+        except (OSError, ValueError):
+            return None
+        return meta
+
+    async def append(
+        self,
+        upload_id: str,
+        offset: int,
+        chunks: AsyncIterator[bytes],
+        allowed_types: Iterable[str],
+    ) -> int:
+        """Write chunks continuing at `offset`; returns the new offset"""
+        meta = self.get(upload_id)
+        if meta is None:
+            raise KeyError(upload_id)
+        part, _ = self._paths(upload_id)
+        length = meta["length"]
+
+        with open(part, "r+b") as f:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise UploadConflict("Another request is writing this upload")
+            current = os.fstat(f.fileno()).st_size
+            if offset != current:
+                raise UploadConflict(f"Upload-Offset must be {current}")
+            f.seek(current)
+            size = current
+            try:
+                async for chunk in chunks:
+                    if not chunk:
+                        continue
+                    if size + len(chunk) > length:
+                        raise UploadTooLarge(f"Upload exceeds its declared length of {length} bytes")
+                    f.write(chunk)
+                    if size < SNIFF_BYTES <= size + len(chunk) or size + len(chunk) == length:
+                        f.flush()
+                        head = await asyncio.to_thread(_read_head, part)
+                        _check_type(head, allowed_types)
+                    size += len(chunk)
+            except UnsupportedFileType:
+                f.truncate(0)
+                raise
+            finally:
+                # Whatever arrived before a dropped connection is kept for resuming
+                f.flush()
+        return size
+
+    async def complete(self, upload_id: str) -> ReceivedFile:
+        """Hash and type a fully received upload"""
+        meta = self.get(upload_id)
+        part, _ = self._paths(upload_id)
+        sha256, head = await asyncio.to_thread(_hash_file, part)
+        return ReceivedFile(
+            path=part,
+            size=meta["offset"],
+            sha256=sha256,
+            content_type=sniff_content_type(head),
+        )
+
+    def remove(self, upload_id: str) -> None:
+        part, info = self._paths(upload_id)
+        if info is None:
+            return
+        part.unlink(missing_ok=True)
+        info.unlink(missing_ok=True)
+
+    def purge_stale(self) -> None:
+        """Drop uploads that were not finished within the TTL"""
+        cutoff = time.time() - self.ttl
+        for info in self.directory.glob("*.json"):
+            part = info.with_suffix(".part")
+            try:
+                touched = part.stat().st_mtime if part.exists() else info.stat().st_mtime
+            except OSError:
+                continue
+            if touched < cutoff:
+                self.remove(info.stem)
+
+
+def _read_head(path: Path) -> bytes:
+    with open(path, "rb") as f:
+        return f.read(SNIFF_BYTES)
+
+
+def _hash_file(path: Path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        head = f.read(SNIFF_BYTES)
+        digest.update(head)
+        for chunk in iter(lambda: f.read(settings.UPLOAD_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest(), head
+
+
+resumable_uploads = ResumableUploads(
+    os.path.join(settings.UPLOAD_TMP_DIR, "resumable"),
+    ttl=settings.UPLOAD_RESUMABLE_TTL,
+)
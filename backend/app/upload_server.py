@@ -0,0 +1,91 @@
+"""
+Stand-in for a direct-upload storage tier
+
+Accepts uploads authorised by the short-lived tokens the API issues
+(POST /applicant/uploads/direct), so file bytes never pass through the
+API workers. Files are streamed into UPLOAD_DIR with the same size and
+type checks as the API and answered with a signed receipt, which the
+client hands to POST /applicant/uploads/direct/complete.
+
+Run next to the API with the local storage backend, and point the API's
+UPLOAD_SERVER_URL at it to enable direct uploads:
+    uvicorn app.upload_server:app --port 8001
+    UPLOAD_SERVER_URL=http://localhost:8001
+"""
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Mount, Route
+from starlette.staticfiles import StaticFiles
+from app.core.config import settings
+from app.core.security import decode_token, create_upload_receipt
+from app.services.storage import LocalStorage, LOCAL_URL_PREFIX
+from app.services.uploads import receive_stream, UploadTooLarge, UnsupportedFileType
+
+storage = LocalStorage(settings.UPLOAD_DIR)
+
+
+def _error(status_code: int, detail: str) -> JSONResponse:
+    return JSONResponse({"detail": detail}, status_code=status_code)
+
+
+async def upload(request: Request):
+    """Store the raw request body under the key named in the upload token"""
+    authorization = request.headers.get("authorization", "")
+    token = authorization[7:] if authorization.lower().startswith("bearer ") else ""
+    claims = decode_token(token) if token else None
+    if not claims or claims.get("type") != "upload":
+        return _error(401, "Invalid or expired upload token")
+
+    max_size = claims["max_size"]
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > max_size:
+        return _error(413, f"File exceeds the maximum size of {max_size} bytes")
+
+    try:
+        received = await receive_stream(request.stream(), max_size, claims["types"])
+    except UploadTooLarge as e:
+        return _error(413, str(e))
+    except UnsupportedFileType as e:
+        return _error(415, str(e))
+
+    try:
+        stored = await storage.save_file(claims["key"], received.path)
+    finally:
+        received.discard()
+
+    receipt = create_upload_receipt({
+        "key": stored.key,
+        "sha256": received.sha256,
+        "size": received.size,
+        "content_type": received.content_type,
+    })
+    return JSONResponse({
+        "key": stored.key,
+        "url": stored.url,
+        "size": received.size,
+        "sha256": received.sha256,
+        "content_type": received.content_type,
+        "receipt": receipt,
+    }, status_code=201)
+
+
+storage.root.mkdir(parents=True, exist_ok=True)
+
+app = Starlette(
+    routes=[
+        Route("/upload", upload, methods=["PUT"]),
+        Mount(LOCAL_URL_PREFIX, StaticFiles(directory=storage.root), name="uploads"),
+    ],
+    middleware=[
+        Middleware(
+            CORSMiddleware,
+            allow_origins=["*"],
+            allow_methods=["PUT", "GET"],
+            allow_headers=["*"],
+        ),
+    ],
+)
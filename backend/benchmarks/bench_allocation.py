@@ -0,0 +1,66 @@
+"""
+Benchmark deferred-acceptance seat allocation on synthetic data
+
+Usage: python benchmarks/bench_allocation.py [applications]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.allocation import allocate
+
+
+def synthetic(total: int, seed: int = 7):
+    """Applicants with 1-6 preferences over sessions of skewed popularity"""
+    rng = np.random.default_rng(seed)
+    sessions = max(total // 500, 10)
+    choices = rng.integers(1, 7, total // 3)
+    choices = choices[np.cumsum(choices) <= total * 1.03]
+    applicants = len(choices)
+    applicant_ids = np.repeat(np.arange(1, applicants + 1), choices)
+    n = len(applicant_ids)
+
+    weights = 1.0 / (np.arange(sessions) + 50)
+    popularity = rng.choice(sessions, n, p=weights / weights.sum())
+    preference = np.arange(n) - np.repeat(np.cumsum(choices) - choices, choices) + 1
+    # Drop duplicate (applicant, session) pairs
+    _, keep = np.unique(applicant_ids * sessions + popularity, return_index=True)
+    keep.sort()
+
+    capacity = {int(s): int(c) for s, c in enumerate(rng.integers(20, 200, sessions))}
+    return (
+        np.arange(1, len(keep) + 1, dtype=np.int64),
+        applicant_ids[keep],
+        popularity[keep],
+        preference[keep],
+        np.full(len(keep), np.nan),
+        np.round(rng.uniform(35, 100, len(keep)), 1),
+        capacity,
+    )
+
+
+def main(total: int = 1_000_000):
+    data = synthetic(total)
+    n = len(data[0])
+    seats = sum(data[6].values())
+
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    result = allocate(*data)
+    wall = time.perf_counter() - start
+    cpu = time.process_time() - cpu_start
+
+    status = result["status"]
+    print(f"applications: {n}, applicants: {len(np.unique(data[1]))}, sessions: {len(data[6])}, seats: {seats}")
+    print(f"allocated:    {int((status == 'Y').sum())}, waitlisted: {int((status == 'W').sum())}")
+    print(f"rounds:       {result['rounds']}")
+    print(f"time:         {wall:.2f} s wall, {cpu:.2f} s cpu")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
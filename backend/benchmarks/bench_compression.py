@@ -0,0 +1,78 @@
+"""
+Benchmark response compression
+
+Serves a centre application list of `rows` synthetic rows (the same
+Projection rows and RowCodec as GET /center/applications) from an
+in-process ASGI app behind CompressionMiddleware, and fetches it
+`requests` times per client encoding:
+
+- identity, gzip and (if installed) brotli compressed per response
+- the same body as a `Precompressed` payload, compressed once
+
+Reports bytes on the wire, the saving over identity and server CPU per
+request, so the cost of each encoding can be weighed against its saving.
+
+Usage: python benchmarks/bench_compression.py [rows] [requests]
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import httpx
+from fastapi import FastAPI, Request
+from app.core.compression import CompressionMiddleware, Precompressed, available_encodings
+from bench_sparse_fields import result_rows
+from app.routers.center import _application_projection as projection
+
+
+def build_app(rows: int) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware)
+    table = result_rows(None, rows)
+    payload = Precompressed(projection.codec().dump(projection.rows(table)))
+
+    @app.get("/applications")
+    async def applications():
+        return projection.codec().response(projection.rows(table))
+
+    @app.get("/precompressed")
+    async def precompressed(request: Request):
+        return payload.response(request)
+
+    return app
+
+
+async def fetch(client: httpx.AsyncClient, path: str, encoding: str, requests: int):
+    received = 0
+    # Raw bytes as sent: decoding would add client CPU to the measurement
+    start = time.process_time()
+    for _ in range(requests):
+        async with client.stream("GET", path, headers={"Accept-Encoding": encoding}) as response:
+            async for chunk in response.aiter_raw():
+                received += len(chunk)
+    return time.process_time() - start, received // requests
+
+
+async def main(rows: int = 10_000, requests: int = 20):
+    app = build_app(rows)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        print(f"{rows} rows, {requests} requests per case")
+        baseline = None
+        for path in ("/applications", "/precompressed"):
+            for encoding in ("identity", *available_encodings()):
+                cpu, size = await fetch(client, path, encoding, requests)
+                baseline = baseline or size
+                print(
+                    f"{path:>15} {encoding:>8}: {size / 1024:8.1f} KB  "
+                    f"saved {100 * (1 - size / baseline):5.1f}%  CPU {cpu / requests * 1000:7.2f} ms/request"
+                )
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    asyncio.run(main(*(int(a) for a in args)))
@@ -0,0 +1,74 @@
+"""
+Benchmark conditional GET under dashboard polling
+
+Serves a centre application list of `rows` synthetic rows through the
+same pieces as GET /center/applications (Projection rows, RowCodec,
+validators) from an in-process ASGI app, and polls it `polls` times:
+once always downloading the full body, once revalidating with the ETag
+from the previous response. The validator query is replaced by a fixed
+aggregate row, so this measures what a 304 saves after the database
+round trip: bytes on the wire and server CPU per poll.
+
+Usage: python benchmarks/bench_conditional.py [rows] [polls]
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import httpx
+from fastapi import FastAPI, Request
+from app.core.conditional import make_validators, not_modified, with_validators
+from bench_sparse_fields import START, result_rows
+from app.routers.center import _application_projection as projection
+
+
+def build_app(rows: int) -> FastAPI:
+    app = FastAPI()
+    table = result_rows(None, rows)
+    aggregates = (rows, rows - 1, START, START, None)
+
+    @app.get("/applications")
+    async def applications(request: Request):
+        validators = make_validators(*aggregates, 1, None)
+        cached = not_modified(request, validators)
+        if cached:
+            return cached
+        return with_validators(projection.codec().response(projection.rows(table)), validators)
+
+    return app
+
+
+async def poll(client: httpx.AsyncClient, polls: int, revalidate: bool):
+    etag = None
+    received = 0
+    statuses = set()
+    start = time.process_time()
+    for _ in range(polls):
+        headers = {"If-None-Match": etag} if revalidate and etag else {}
+        response = await client.get("/applications", headers=headers)
+        statuses.add(response.status_code)
+        received += len(response.content) + sum(len(k) + len(v) + 4 for k, v in response.headers.items())
+        etag = response.headers.get("etag", etag)
+    return time.process_time() - start, received, statuses
+
+
+async def main(rows: int = 10_000, polls: int = 50):
+    app = build_app(rows)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        print(f"{rows} rows, {polls} polls")
+        for label, revalidate in (("full", False), ("etag", True)):
+            cpu, received, statuses = await poll(client, polls, revalidate)
+            print(
+                f"{label:>5}: {received / polls / 1024:9.1f} KB/poll  "
+                f"CPU {cpu / polls * 1000:7.2f} ms/poll  statuses {sorted(statuses)}"
+            )
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    asyncio.run(main(*(int(a) for a in args)))
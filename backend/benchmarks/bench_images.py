@@ -0,0 +1,84 @@
+"""
+Benchmark image pipeline throughput
+
+Generates `count` camera-sized JPEGs and runs the full pipeline on each
+(master + profile WebP + thumbnail WebP) in a spawn process pool with 1
+up to `max_workers` workers. Reports images per second overall and per
+worker (one worker per core).
+
+Usage: python benchmarks/bench_images.py [count] [max_workers] [width] [height]
+"""
+
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+from PIL import Image
+from app.services.images import prepare_master, render_variant
+
+
+def make_photo(path: Path, width: int, height: int, seed: int) -> None:
+    """Smooth gradient plus sensor-like noise, so JPEG sizes resemble real photos"""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width]
+    base = np.stack([
+        (x / width * 255),
+        (y / height * 255),
+        ((x + y) / (width + height) * 255),
+    ], axis=-1)
+    pixels = np.clip(base + rng.normal(0, 12, base.shape), 0, 255).astype(np.uint8)
+    image = Image.fromarray(pixels, "RGB")
+    exif = image.getexif()
+    exif[0x0112] = 6  # rotated 90 degrees
+    exif[0x010F] = "Benchmark Camera"
+    image.save(path, "JPEG", quality=88, exif=exif)
+
+
+def process(path: str):
+    start = time.perf_counter()
+    master = prepare_master(path)
+    mastered = time.perf_counter()
+    profile = render_variant(master, "profile", "webp")
+    thumb = render_variant(master, "thumb", "webp")
+    return len(master) + len(profile) + len(thumb), mastered - start, time.perf_counter() - mastered
+
+
+def main(count: int = 40, max_workers: int = 0, width: int = 4000, height: int = 3000):
+    max_workers = max_workers or os.cpu_count() or 1
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        for i in range(count):
+            path = Path(directory) / f"photo_{i}.jpg"
+            make_photo(path, width, height, i)
+            paths.append(str(path))
+        average = sum(os.path.getsize(p) for p in paths) / count / 1024
+        print(f"{count} photos {width}x{height}, average {average:.0f} KB")
+
+        workers = 1
+        while workers <= max_workers:
+            with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                # Warm up the workers (imports) outside the timing
+                list(pool.map(process, paths[:workers]))
+                start = time.perf_counter()
+                results = list(pool.map(process, paths))
+                elapsed = time.perf_counter() - start
+            written, master_s, variants_s = (sum(column) for column in zip(*results))
+            rate = count / elapsed
+            print(
+                f"{workers:2d} workers: {rate:6.1f} images/s  {rate / workers:6.1f} per core  "
+                f"master {master_s / count * 1000:6.1f} ms  2 variants {variants_s / count * 1000:6.1f} ms  "
+                f"output {written / count / 1024:.0f} KB/image"
+            )
+            workers *= 2
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(*(int(a) for a in args))
@@ -0,0 +1,66 @@
+"""
+Benchmark the write-behind intake path
+
+Concurrent submitters push applications through the journal while the
+drainer feeds a simulated database sink that costs `commit_ms` per commit
+and `row_us` per row. Reports accepted submissions per second (fsynced and
+acknowledged) against commits per second on the database side.
+
+Usage: python benchmarks/bench_intake.py [submissions] [concurrency] [commit_ms] [row_us]
+"""
+
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.intake import IntakeService, ACCEPTED
+
+
+def simulated_sink(commit_ms: float, row_us: float):
+    async def sink(records):
+        await asyncio.sleep(commit_ms / 1000 + len(records) * row_us / 1_000_000)
+        return {r["ticket"]: (ACCEPTED, i, None) for i, r in enumerate(records)}
+    return sink
+
+
+async def main(submissions: int = 20_000, concurrency: int = 500, commit_ms: float = 5.0, row_us: float = 50.0):
+    with tempfile.TemporaryDirectory() as directory:
+        service = IntakeService(directory, batch_size=500, interval=0.05, sink=simulated_sink(commit_ms, row_us))
+        await service.start()
+
+        queue = asyncio.Queue()
+        for i in range(submissions):
+            queue.put_nowait(i)
+
+        async def submitter():
+            while not queue.empty():
+                i = queue.get_nowait()
+                await service.submit(i, {
+                    "session_id": 1, "enroll_id": 1, "qualification_id": 1,
+                    "stream_id": 1, "marks": "81.5", "role_id": 4,
+                })
+
+        start = time.perf_counter()
+        await asyncio.gather(*(submitter() for _ in range(concurrency)))
+        accepted_at = time.perf_counter() - start
+        while service.stats["drained"] < submissions:
+            await asyncio.sleep(0.01)
+        drained_at = time.perf_counter() - start
+        fsyncs = service.journal.fsyncs
+        await service.stop()
+
+    stats = service.stats
+    print(f"submissions:  {submissions} from {concurrency} concurrent clients")
+    print(f"accepted:     {submissions / accepted_at:,.0f} req/s ({fsyncs} journal fsyncs)")
+    print(f"drained:      {stats['drained']} in {drained_at:.2f} s with {stats['commits']} commits "
+          f"({stats['commits'] / drained_at:,.1f} commits/s, {stats['drained'] / stats['commits']:.0f} rows/commit)")
+    print(f"per-request commits would need {submissions} commits")
+
+
+if __name__ == "__main__":
+    casts = (int, int, float, float)
+    asyncio.run(main(*(cast(arg) for cast, arg in zip(casts, sys.argv[1:]))))
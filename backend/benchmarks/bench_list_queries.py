@@ -0,0 +1,135 @@
+"""
+Benchmark ORM hydration against column projection for list endpoints
+
+Clones one existing application of CENTER_ID into `rows` applications
+inside a transaction against DATABASE_URL, then builds the centre's
+application list twice: the old way (full Application objects plus
+selectinload of Applicant and Session) and through the column-projection
+loader the endpoint now uses. Reports statements issued, CPU time and
+Python heap peak (tracemalloc) per run. The transaction is rolled back.
+
+Usage: python benchmarks/bench_list_queries.py CENTER_ID [rows] [repeats]
+"""
+
+import asyncio
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import event, func, select, text
+from sqlalchemy.orm import selectinload
+from app.core.config import settings
+from app.db.base import get_async_engine, get_async_session_local
+from app.models.application import Application
+from app.routers.center import ApplicationResponse, _load_center_applications
+
+
+async def hydrated(db, center_id: int):
+    """The list endpoint before column projection"""
+    result = await db.execute(
+        select(Application)
+        .options(
+            selectinload(Application.applicant),
+            selectinload(Application.session)
+        )
+        .where(Application.center_id == center_id)
+        .order_by(Application.updated_date.desc())
+    )
+    response = []
+    for app in result.scalars().all():
+        app_status_map = {"Y": "Selected", "N": "Submitted", "R": "Rejected", "P": "Pending", "W": "Waitlisted", "D": "Declined"}
+        payment_status_map = {"Y": "Paid", "N": "Unpaid", "P": "Pending"}
+        cert_status_map = {"Y": "Issued", "N": "Not Issued", "P": "Pending"}
+        applicant_name = "N/A"
+        if app.applicant:
+            applicant_name = f"{app.applicant.first_name} {app.applicant.middle_name or ''} {app.applicant.last_name}".strip()
+        response.append(ApplicationResponse(
+            application_id=app.application_id,
+            applicant_name=applicant_name,
+            applicant_email=app.applicant_email_id,
+            session_name=app.session.session_name if app.session else "N/A",
+            application_status=app_status_map.get(app.enrollment_status, "Pending"),
+            payment_status=payment_status_map.get(app.payment_status, "Pending"),
+            certificate_status=cert_status_map.get(app.cert_status, "Not Issued"),
+            reg_id=app.reg_id,
+            updated_date=app.updated_date
+        ))
+    return response
+
+
+async def measure(label: str, db, load, center_id: int, repeats: int, counter: list):
+    cpu, peak, statements = [], [], 0
+    for _ in range(repeats):
+        db.expunge_all()
+        counter[0] = 0
+        tracemalloc.start()
+        start = time.process_time()
+        rows = await load(db, center_id)
+        cpu.append(time.process_time() - start)
+        peak.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        statements = counter[0]
+    cpu.sort()
+    print(
+        f"{label:>10}: {len(rows)} rows  {statements} statements  "
+        f"CPU {cpu[len(cpu) // 2] * 1000:7.1f} ms (median)  peak heap {min(peak) / 1024 / 1024:6.1f} MB"
+    )
+    return rows
+
+
+async def main(center_id: int, rows: int = 10_000, repeats: int = 5):
+    engine = get_async_engine(settings.DATABASE_URL)
+    SessionLocal = get_async_session_local(engine)
+    counter = [0]
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def count(conn, cursor, statement, parameters, context, executemany):
+        counter[0] += 1
+
+    async with SessionLocal() as db:
+        try:
+            template = (await db.execute(
+                select(Application.application_id)
+                .where(Application.center_id == center_id)
+                .limit(1)
+            )).scalar_one_or_none()
+            if template is None:
+                sys.exit(f"Centre {center_id} has no application to clone")
+
+            existing = (await db.execute(
+                select(func.count()).select_from(Application).where(Application.center_id == center_id)
+            )).scalar_one()
+            columns = [
+                c.name for c in Application.__table__.columns
+                if c.name not in ("application_id", "intake_ticket")
+            ]
+            await db.execute(
+                text(
+                    f"INSERT INTO t_applications ({', '.join(columns)}) "
+                    f"SELECT {', '.join(columns)} FROM t_applications, generate_series(1, :n) "
+                    f"WHERE application_id = :template"
+                ),
+                {"n": max(rows - existing, 0), "template": template},
+            )
+
+            print(f"centre {center_id}: {max(rows, existing)} applications, {repeats} runs each")
+            before = await measure("hydrated", db, hydrated, center_id, repeats, counter)
+            after = await measure("projected", db, _load_center_applications, center_id, repeats, counter)
+            # Cloned rows share updated_date, so compare independent of their order
+            same = (
+                sorted((r.model_dump() for r in before), key=lambda r: r["application_id"])
+                == sorted(after, key=lambda r: r["application_id"])
+            )
+            print(f"identical responses: {same}")
+        finally:
+            await db.rollback()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit(__doc__)
+    asyncio.run(main(*(int(arg) for arg in sys.argv[1:4])))
@@ -0,0 +1,124 @@
+"""
+Benchmark latency under overload with and without load shedding
+
+Drives an in-process ASGI app behind LoadSheddingMiddleware with an open
+loop of requests (arrivals do not wait for responses, like real users),
+at `overload` times what the connection pool can serve. Each request
+holds a simulated pooled connection for `service_ms`; the simulated pool
+has the configured capacity, times out waiters after DB_POOL_TIMEOUT and
+reports its waiting callers to the shedder the way MonitoredPool does.
+The mix is one login and one submission for every eight dashboard reads.
+
+Reports per priority the status codes and the p50/p99 latency of the
+requests that were served, once with shedding off and once on.
+
+Usage: python benchmarks/bench_load_shedding.py [seconds] [overload] [service_ms]
+"""
+
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import httpx
+from fastapi import FastAPI
+from app.core.config import settings
+from app.core.load_shedding import LoadShedder, LoadSheddingMiddleware, default_limits, route_class
+
+MIX = [("POST", "/auth/login")] + [("POST", "/applicant/applications")] + [("GET", "/applicant/dashboard")] * 8
+
+
+class SimulatedPool:
+    def __init__(self, capacity: int, timeout: float):
+        self.capacity = capacity
+        self.timeout = timeout
+        self.free = asyncio.Semaphore(capacity)
+        self.waiting = 0
+        self.timeouts = 0
+
+    def stats(self) -> dict:
+        return {"waiting": self.waiting, "timeouts": self.timeouts, "capacity": self.capacity}
+
+    async def query(self, seconds: float) -> bool:
+        self.waiting += 1
+        try:
+            async with asyncio.timeout(self.timeout):
+                await self.free.acquire()
+        except TimeoutError:
+            self.timeouts += 1
+            return False
+        finally:
+            self.waiting -= 1
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            self.free.release()
+        return True
+
+
+async def run(seconds: float, overload: float, service: float, shedding: bool) -> None:
+    settings.LOAD_SHEDDING_ENABLED = shedding
+    capacity = settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+    pool = SimulatedPool(capacity, settings.DB_POOL_TIMEOUT)
+    app = FastAPI()
+
+    @app.api_route("/{path:path}", methods=["GET", "POST"])
+    async def handler(path: str):
+        if not await pool.query(service):
+            return {"ok": False}
+        return {"ok": True}
+
+    asgi = LoadSheddingMiddleware(app, LoadShedder(default_limits(), pool.stats))
+    rate = capacity / service * overload
+    results = {}
+
+    async def one(client, method, path):
+        start = time.perf_counter()
+        response = await client.request(method, path)
+        elapsed = time.perf_counter() - start
+        status = response.status_code
+        if status == 200 and not response.json()["ok"]:
+            status = "timeout"
+        results.setdefault(route_class(method, path), []).append((status, elapsed))
+
+    transport = httpx.ASGITransport(app=asgi)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        tasks = []
+        start = time.perf_counter()
+        sent = 0
+        while time.perf_counter() - start < seconds:
+            due = int((time.perf_counter() - start) * rate)
+            for _ in range(due - sent):
+                method, path = random.choice(MIX)
+                tasks.append(asyncio.create_task(one(client, method, path)))
+            sent = max(sent, due)
+            await asyncio.sleep(0.001)
+        await asyncio.gather(*tasks)
+
+    print(f"shedding {'on' if shedding else 'off'}: {sent} requests at {rate:.0f}/s, {pool.timeouts} pool timeouts")
+    for priority, outcomes in sorted(results.items()):
+        served = sorted(elapsed for status, elapsed in outcomes if status == 200)
+        counts = {}
+        for status, _ in outcomes:
+            counts[status] = counts.get(status, 0) + 1
+        summary = "  ".join(f"{status}: {count}" for status, count in sorted(counts.items(), key=str))
+        p50 = served[len(served) // 2] * 1000 if served else 0.0
+        p99 = served[int(len(served) * 0.99)] * 1000 if served else 0.0
+        print(f"  {priority:>8}  p50 {p50:8.1f} ms  p99 {p99:8.1f} ms  {summary}")
+
+
+async def main(seconds: int = 10, overload: int = 3, service_ms: int = 20):
+    print(
+        f"pool of {settings.DB_POOL_SIZE}+{settings.DB_MAX_OVERFLOW}, {service_ms} ms per request, "
+        f"{overload}x its throughput, pool timeout {settings.DB_POOL_TIMEOUT:.0f} s"
+    )
+    for shedding in (False, True):
+        await run(seconds, overload, service_ms / 1000, shedding)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    asyncio.run(main(*(int(a) for a in args)))
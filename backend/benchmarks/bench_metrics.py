@@ -0,0 +1,73 @@
+"""
+Benchmark the cost of recording request metrics
+
+Calls a bare ASGI endpoint `requests` times directly (no HTTP client or
+server in between), once as is and once wrapped in MetricsMiddleware, and
+reports the added time per request. The route is set on the scope as the
+router would. Also reports the cost of a single histogram observation and
+the time to render /metrics with the series this produced.
+
+Usage: python benchmarks/bench_metrics.py [requests]
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.metrics import REQUEST_SECONDS, MetricsMiddleware, render_metrics
+
+ROUTES = [type("Route", (), {"path_format": f"/bench/route/{i}"})() for i in range(20)]
+START = {"type": "http.response.start", "status": 200, "headers": []}
+BODY = {"type": "http.response.body", "body": b"{}"}
+
+
+async def endpoint(scope, receive, send):
+    scope["route"] = ROUTES[scope["n"] % len(ROUTES)]
+    await send(START)
+    await send(BODY)
+
+
+async def receive():
+    return {"type": "http.request", "body": b""}
+
+
+async def send(message):
+    pass
+
+
+async def per_request(app, requests: int) -> float:
+    scope = {"type": "http", "method": "GET", "path": "/bench", "n": 0}
+    start = time.perf_counter()
+    for n in range(requests):
+        scope["n"] = n
+        await app(scope, receive, send)
+    return (time.perf_counter() - start) / requests
+
+
+async def main(requests: int = 200_000):
+    middleware = MetricsMiddleware(endpoint)
+    # Warm up: create the series
+    await per_request(middleware, 1000)
+    best_bare = min([await per_request(endpoint, requests) for _ in range(3)])
+    best_recorded = min([await per_request(middleware, requests) for _ in range(3)])
+    print(f"{requests} requests, {len(ROUTES)} routes")
+    print(f"  bare endpoint        {best_bare * 1e6:6.2f} us/request")
+    print(f"  with metrics         {best_recorded * 1e6:6.2f} us/request")
+    print(f"  overhead             {(best_recorded - best_bare) * 1e6:6.2f} us/request")
+
+    start = time.perf_counter()
+    for n in range(requests):
+        REQUEST_SECONDS.observe(0.012, ("GET", "/bench/route/0"))
+    print(f"  histogram observe    {(time.perf_counter() - start) / requests * 1e6:6.2f} us")
+
+    start = time.perf_counter()
+    text = render_metrics()
+    print(f"  render /metrics      {(time.perf_counter() - start) * 1000:6.2f} ms ({len(text)} bytes)")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    asyncio.run(main(*(int(a) for a in args)))
@@ -0,0 +1,42 @@
+"""
+Benchmark merit-list ranking on a synthetic session
+
+Usage: python benchmarks/bench_ranking.py [applicants]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.ranking import compute_merit_list
+
+
+def main(n: int = 200_000):
+    rng = np.random.default_rng(42)
+    ids = np.arange(1, n + 1, dtype=np.int64)
+    marks = np.round(rng.uniform(35, 100, n), 1)  # one decimal -> many ties
+    marks[rng.random(n) < 0.01] = np.nan  # unparseable marks
+    dob_days = rng.integers(9000, 13000, n)
+    submitted = rng.integers(0, 7 * 86_400_000_000, n)  # microseconds over an enrollment week
+    castes = rng.integers(1, 6, n)
+    quotas = {2: 150, 3: 75, 4: 270}
+
+    compute_merit_list(ids[:1000], marks[:1000], dob_days[:1000], submitted[:1000], castes[:1000])  # warm-up
+
+    runs = []
+    for _ in range(5):
+        start = time.process_time()
+        result = compute_merit_list(ids, marks, dob_days, submitted, castes, ("dob", "submitted"), 1000, quotas)
+        runs.append(time.process_time() - start)
+
+    print(f"applicants: {n}")
+    print(f"selected:   {int(result['selected'].sum())}")
+    print(f"cpu time:   best {min(runs) * 1000:.1f} ms, median {sorted(runs)[2] * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,79 @@
+"""
+Contention benchmark for atomic seat reservations on one session
+
+Runs concurrent reserve_seat() transactions against DATABASE_URL and checks
+that exactly `capacity` of them succeed. The session's capacity and counters
+are restored afterwards.
+
+Usage: python benchmarks/bench_seat_contention.py SESSION_ID [reservations] [capacity]
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import select, update
+from app.core.config import settings
+from app.db.base import get_async_engine, get_async_session_local
+from app.models.session import Session
+from app.services.seats import reserve_seat
+
+
+async def main(session_id: int, reservations: int = 500, capacity: int = 300):
+    engine = get_async_engine(settings.DATABASE_URL, pool_size=50, max_overflow=0)
+    SessionLocal = get_async_session_local(engine)
+
+    async with SessionLocal() as db:
+        result = await db.execute(
+            select(Session.seat_capacity, Session.seats_reserved, Session.seats_confirmed)
+            .where(Session.session_id == session_id)
+        )
+        original = result.one()
+        await db.execute(
+            update(Session).where(Session.session_id == session_id)
+            .values(seat_capacity=capacity, seats_reserved=0, seats_confirmed=0)
+        )
+        await db.commit()
+
+    latencies = []
+
+    async def reserve():
+        start = time.perf_counter()
+        async with SessionLocal() as db:
+            ok = await reserve_seat(db, session_id)
+            await db.commit()
+        latencies.append(time.perf_counter() - start)
+        return ok
+
+    try:
+        start = time.perf_counter()
+        outcomes = await asyncio.gather(*(reserve() for _ in range(reservations)))
+        elapsed = time.perf_counter() - start
+
+        async with SessionLocal() as db:
+            reserved = (await db.execute(
+                select(Session.seats_reserved).where(Session.session_id == session_id)
+            )).scalar_one()
+    finally:
+        async with SessionLocal() as db:
+            await db.execute(
+                update(Session).where(Session.session_id == session_id)
+                .values(seat_capacity=original[0], seats_reserved=original[1], seats_confirmed=original[2])
+            )
+            await db.commit()
+        await engine.dispose()
+
+    latencies.sort()
+    print(f"reservations: {reservations} concurrent, capacity {capacity}")
+    print(f"succeeded:    {sum(outcomes)} (counter {reserved}) -> {'OK' if sum(outcomes) == reserved == min(capacity, reservations) else 'OVERBOOKED'}")
+    print(f"throughput:   {reservations / elapsed:.0f} reservations/s ({elapsed * 1000:.0f} ms total)")
+    print(f"latency:      p50 {latencies[len(latencies) // 2] * 1000:.1f} ms, p99 {latencies[int(len(latencies) * 0.99)] * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit(__doc__)
+    asyncio.run(main(*(int(arg) for arg in sys.argv[1:4])))
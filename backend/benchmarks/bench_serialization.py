@@ -0,0 +1,131 @@
+"""
+Benchmark JSON serialization of large list responses
+
+Builds the centre application list from `rows` synthetic database rows
+two ways: the previous path (status maps rebuilt per row, one validated
+ApplicationResponse per row, then FastAPI's response_model validation and
+json encoding) and the RowCodec path (shared status labels, plain dicts,
+one precompiled serializer call). Reports median time, Python heap peak
+and checks that both produce the same JSON.
+
+Usage: python benchmarks/bench_serialization.py [rows] [repeats]
+"""
+
+import asyncio
+import json
+import sys
+import time
+import tracemalloc
+from collections import namedtuple
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from app.core.codec import RowCodec, application_status, payment_status, certificate_status
+from app.routers.center import ApplicationResponse
+
+Row = namedtuple("Row", [
+    "application_id", "applicant_email_id", "enrollment_status", "payment_status", "cert_status",
+    "reg_id", "updated_date", "applicant_id", "first_name", "middle_name", "last_name", "session_name",
+])
+
+
+def make_rows(count: int) -> List[Row]:
+    start = datetime(2025, 6, 1, 9, 30)
+    return [
+        Row(
+            application_id=i,
+            applicant_email_id=f"applicant{i}@example.com",
+            enrollment_status="NYRPWD"[i % 6],
+            payment_status="NYP"[i % 3],
+            cert_status="NYP"[i % 3],
+            reg_id=f"REG{i:08d}" if i % 4 == 0 else None,
+            updated_date=start + timedelta(seconds=i, microseconds=i % 1000),
+            applicant_id=i,
+            first_name="Aarav",
+            middle_name=None if i % 2 else "Kumar",
+            last_name="Sharma",
+            session_name="PG-DAC Aug 2025",
+        )
+        for i in range(count)
+    ]
+
+
+field = create_response_field(name="Response_get_center_applications", type_=List[ApplicationResponse])
+
+
+async def model_path(rows: List[Row]) -> bytes:
+    response = []
+    for row in rows:
+        app_status_map = {"Y": "Selected", "N": "Submitted", "R": "Rejected", "P": "Pending", "W": "Waitlisted", "D": "Declined"}
+        payment_status_map = {"Y": "Paid", "N": "Unpaid", "P": "Pending"}
+        cert_status_map = {"Y": "Issued", "N": "Not Issued", "P": "Pending"}
+        response.append(ApplicationResponse(
+            application_id=row.application_id,
+            applicant_name=f"{row.first_name} {row.middle_name or ''} {row.last_name}".strip(),
+            applicant_email=row.applicant_email_id,
+            session_name=row.session_name,
+            application_status=app_status_map.get(row.enrollment_status, "Pending"),
+            payment_status=payment_status_map.get(row.payment_status, "Pending"),
+            certificate_status=cert_status_map.get(row.cert_status, "Not Issued"),
+            reg_id=row.reg_id,
+            updated_date=row.updated_date
+        ))
+    content = await serialize_response(field=field, response_content=response, is_coroutine=True)
+    return JSONResponse(content).body
+
+
+codec = RowCodec(ApplicationResponse)
+
+
+async def codec_path(rows: List[Row]) -> bytes:
+    return codec.dump([
+        dict(
+            application_id=row.application_id,
+            applicant_name=f"{row.first_name} {row.middle_name or ''} {row.last_name}".strip(),
+            applicant_email=row.applicant_email_id,
+            session_name=row.session_name,
+            application_status=application_status(row.enrollment_status),
+            payment_status=payment_status(row.payment_status),
+            certificate_status=certificate_status(row.cert_status),
+            reg_id=row.reg_id,
+            updated_date=row.updated_date
+        )
+        for row in rows
+    ])
+
+
+async def measure(label: str, build, rows: List[Row], repeats: int) -> bytes:
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        body = await build(rows)
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    await build(rows)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    times.sort()
+    print(
+        f"{label:>7}: {times[len(times) // 2] * 1000:7.1f} ms (median)  "
+        f"peak heap {peak / 1024 / 1024:6.1f} MB  body {len(body) / 1024:.0f} KB"
+    )
+    return body
+
+
+async def main(count: int = 10_000, repeats: int = 7):
+    rows = make_rows(count)
+    print(f"{count} rows, {repeats} runs each")
+    before = await measure("models", model_path, rows, repeats)
+    after = await measure("codec", codec_path, rows, repeats)
+    print(f"same JSON: {json.loads(before) == json.loads(after)}")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    asyncio.run(main(*(int(a) for a in args)))
@@ -0,0 +1,84 @@
+"""
+Benchmark request coalescing under a thundering herd
+
+Fires `clients` concurrent requests at the handlers of
+GET /applicant/sessions, /master/states and /applicant/news against
+DATABASE_URL, each with its own session as `get_db` would give it, once
+with single-flight disabled and once enabled. Caches are emptied before
+each burst, as at enrollment opening. Reports the SQL statements issued,
+the most pooled connections checked out at once and the wall time of the
+burst.
+
+The news feed already reloads under a lock, so it coalesces either way.
+
+Usage: python benchmarks/bench_singleflight.py [clients]
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import event
+from starlette.requests import Request
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal, engine
+from app.routers import applicant, master_data
+from app.services.news_feed import news_feed
+
+counters = {"statements": 0, "peak_connections": 0}
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _count(conn, cursor, statement, parameters, context, executemany):
+    counters["statements"] += 1
+    counters["peak_connections"] = max(counters["peak_connections"], engine.sync_engine.pool.checkedout())
+
+
+def request(path: str) -> Request:
+    return Request({"type": "http", "method": "GET", "path": path, "headers": [], "query_string": b""})
+
+
+async def sessions():
+    async with AsyncSessionLocal() as db:
+        return await applicant.get_available_sessions(request("/applicant/sessions"), None, None, db)
+
+
+async def states():
+    async with AsyncSessionLocal() as db:
+        return await master_data.get_states(request("/master/states"), db)
+
+
+async def news():
+    return await news_feed.applicant_feed()
+
+
+async def burst(label: str, handler, clients: int, enabled: bool) -> None:
+    settings.SINGLEFLIGHT_ENABLED = enabled
+    master_data._payloads.clear()
+    news_feed.invalidate()
+    counters.update(statements=0, peak_connections=0)
+    start = time.perf_counter()
+    await asyncio.gather(*(handler() for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+    print(
+        f"{label:>18} {'coalesced' if enabled else 'each':>9}: {counters['statements']:5d} statements  "
+        f"{counters['peak_connections']:3d} connections  {elapsed * 1000:8.1f} ms"
+    )
+
+
+async def main(clients: int = 500):
+    print(f"{clients} concurrent requests per burst, pool of {settings.DB_POOL_SIZE}+{settings.DB_MAX_OVERFLOW}")
+    # Warm up connections and compiled statements
+    await burst("warm-up", sessions, 1, False)
+    for label, handler in (("/applicant/sessions", sessions), ("/master/states", states), ("/applicant/news", news)):
+        for enabled in (False, True):
+            await burst(label, handler, clients, enabled)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    asyncio.run(main(*(int(a) for a in args)))
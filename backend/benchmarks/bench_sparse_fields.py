@@ -0,0 +1,76 @@
+"""
+Benchmark sparse fieldsets on the centre application list
+
+Builds `rows` synthetic result rows for the columns a Projection selects
+and encodes them with all fields and with `fields` only, the way
+GET /center/applications?fields=... does. Reports the number of selected
+columns, response size and median server CPU time per response.
+
+Usage: python benchmarks/bench_sparse_fields.py [rows] [fields] [repeats]
+       e.g. python benchmarks/bench_sparse_fields.py 10000 applicant_name,application_status
+"""
+
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.models.applicant import Applicant
+from app.models.application import Application
+from app.models.session import Session
+from app.routers.center import ApplicationResponse, _application_projection as projection
+
+START = datetime(2025, 6, 1, 9, 30)
+VALUES = {
+    id(Application.application_id): lambda i: i,
+    id(Application.applicant_email_id): lambda i: f"applicant{i}@example.com",
+    id(Application.enrollment_status): lambda i: "NYRPWD"[i % 6],
+    id(Application.payment_status): lambda i: "NYP"[i % 3],
+    id(Application.cert_status): lambda i: "NYP"[i % 3],
+    id(Application.reg_id): lambda i: f"REG{i:08d}" if i % 4 == 0 else None,
+    id(Application.updated_date): lambda i: START + timedelta(seconds=i),
+    id(Applicant.applicant_id): lambda i: i,
+    id(Applicant.first_name): lambda i: "Aarav",
+    id(Applicant.middle_name): lambda i: None if i % 2 else "Kumar",
+    id(Applicant.last_name): lambda i: "Sharma",
+    id(Session.session_name): lambda i: "PG-DAC Aug 2025",
+}
+
+
+def result_rows(fields, count: int):
+    """What the database would return for `select(*projection.columns(fields))`"""
+    makers = [VALUES[id(column)] for column in projection.columns(fields)]
+    return [tuple(make(i) for make in makers) for i in range(count)]
+
+
+def measure(label: str, fields, count: int, repeats: int) -> None:
+    rows = result_rows(fields, count)
+    codec = projection.codec(fields)
+    times = []
+    for _ in range(repeats):
+        start = time.process_time()
+        body = codec.dump(projection.rows(rows, fields))
+        times.append(time.process_time() - start)
+    times.sort()
+    print(
+        f"{label:>8}: {len(projection.columns(fields)):2d} columns  "
+        f"{len(body) / 1024:8.0f} KB  CPU {times[len(times) // 2] * 1000:6.1f} ms (median)"
+    )
+
+
+def main(count: int = 10_000, fields: str = "application_id,applicant_name", repeats: int = 7):
+    selected = tuple(name for name in ApplicationResponse.model_fields if name in fields.split(","))
+    print(f"{count} applications; sparse fields: {', '.join(selected)}")
+    measure("all", None, count, repeats)
+    measure("sparse", selected, count, repeats)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(
+        int(args[0]) if len(args) > 0 else 10_000,
+        args[1] if len(args) > 1 else "application_id,applicant_name",
+        int(args[2]) if len(args) > 2 else 7,
+    )
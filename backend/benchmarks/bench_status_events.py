@@ -0,0 +1,104 @@
+"""
+Benchmark memory per open application event stream
+
+Opens `connections` concurrent GET /applicant/events streams against an
+in-process ASGI app, each served by the same generator as the real
+endpoint, and reports the memory they hold once idle: Python heap
+(tracemalloc) and resident set size. The application list is replaced by
+an empty one, so this measures the idle stream itself; socket buffers in
+the server and kernel come on top. Then publishes one change for every
+applicant and reports how long the fan-out takes until each stream has
+sent its update, delivered as one invalidation bus key the way the
+table trigger sends it.
+
+Usage: python benchmarks/bench_status_events.py [connections]
+"""
+
+import asyncio
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+import app.routers.applicant as applicant_router
+from app.core.invalidation import invalidation_bus
+from app.services.status_events import status_events
+
+
+async def _no_applications(loader, *args):
+    return []
+
+
+def rss() -> int:
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * 4096
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    applicant_router._in_own_session = _no_applications
+
+    @app.get("/events/{applicant_id}")
+    async def events(applicant_id: int):
+        return StreamingResponse(applicant_router._application_events(applicant_id), media_type="text/event-stream")
+
+    return app
+
+
+async def main(connections: int = 50_000):
+    app = build_app()
+    disconnect = asyncio.Event()
+    updates = {"count": 0, "target": connections, "done": asyncio.Event()}
+
+    async def receive():
+        await disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    def client(applicant_id: int):
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+            "scheme": "http", "path": f"/events/{applicant_id}", "raw_path": b"", "query_string": b"",
+            "root_path": "", "headers": [], "client": ("127.0.0.1", 1), "server": ("bench", 80),
+        }
+        events = [0]
+
+        async def send(message):
+            if message["type"] == "http.response.body" and message.get("body", b"").startswith(b"event:"):
+                events[0] += 1
+                # The first event is the snapshot sent on connect
+                if events[0] == 2:
+                    updates["count"] += 1
+                    if updates["count"] == updates["target"]:
+                        updates["done"].set()
+
+        return app(scope, receive, send)
+
+    tracemalloc.start()
+    heap_before, rss_before = tracemalloc.get_traced_memory()[0], rss()
+    tasks = [asyncio.create_task(client(i)) for i in range(connections)]
+    while status_events.connections < connections:
+        await asyncio.sleep(0.1)
+    await asyncio.sleep(0.5)
+    heap, rss_after = tracemalloc.get_traced_memory()[0] - heap_before, rss() - rss_before
+    tracemalloc.stop()
+    print(f"{connections} idle streams")
+    print(f"  heap {heap / 2**20:7.1f} MB  ({heap / connections / 1024:5.1f} KB/connection, traced)")
+    print(f"  RSS  {rss_after / 2**20:7.1f} MB  ({rss_after / connections / 1024:5.1f} KB/connection)")
+
+    start = time.perf_counter()
+    invalidation_bus.deliver((f"application:{','.join(map(str, range(connections)))}",))
+    await updates["done"].wait()
+    print(f"  fan-out of one change per applicant: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    disconnect.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    print(f"  open after disconnect: {status_events.connections}")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    asyncio.run(main(*(int(a) for a in args)))
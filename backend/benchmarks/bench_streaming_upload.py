@@ -0,0 +1,68 @@
+"""
+Benchmark memory use of streaming uploads
+
+Pushes a `megabytes` MB body through the streaming pipeline into the
+local storage backend and compares the Python heap peak (tracemalloc)
+with buffering the whole body first, as the old photo endpoint did.
+
+Usage: python benchmarks/bench_streaming_upload.py [megabytes] [chunk_kb]
+"""
+
+import asyncio
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.storage import LocalStorage
+from app.services.uploads import receive_stream, DOCUMENT_TYPES
+
+PDF_HEADER = b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n"
+
+
+async def body(megabytes: int, chunk_size: int):
+    chunk = bytes(chunk_size)
+    yield PDF_HEADER + chunk[len(PDF_HEADER):]
+    for _ in range(megabytes * 1024 * 1024 // chunk_size - 1):
+        yield chunk
+
+
+async def buffered(megabytes: int, chunk_size: int, storage: LocalStorage):
+    data = b"".join([c async for c in body(megabytes, chunk_size)])
+    await storage.save("buffered.pdf", data)
+
+
+async def streamed(megabytes: int, chunk_size: int, storage: LocalStorage, spool: str):
+    received = await receive_stream(body(megabytes, chunk_size), 1 << 40, DOCUMENT_TYPES, spool)
+    await storage.save_file("streamed.pdf", received.path)
+
+
+async def measure(label: str, coro):
+    tracemalloc.start()
+    start = time.perf_counter()
+    await coro
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:>9}: {elapsed:6.2f}s  peak heap {peak / 1024 / 1024:8.2f} MB")
+
+
+async def main(megabytes: int = 200, chunk_kb: int = 64):
+    chunk_size = chunk_kb * 1024
+    with tempfile.TemporaryDirectory() as directory:
+        storage = LocalStorage(str(Path(directory) / "store"))
+        spool = str(Path(directory) / "spool")
+        print(f"{megabytes} MB body in {chunk_kb} KB chunks")
+        await measure("buffered", buffered(megabytes, chunk_size, storage))
+        await measure("streamed", streamed(megabytes, chunk_size, storage, spool))
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    asyncio.run(main(
+        int(args[0]) if len(args) > 0 else 200,
+        int(args[1]) if len(args) > 1 else 64,
+    ))
@@ -0,0 +1,103 @@
+"""
+Benchmark event-loop responsiveness during concurrent uploads
+
+A small app exposes the old upload path (the blocking SDK call made in
+the handler) and the storage backend path next to a trivial /ping
+endpoint. While `uploads` simultaneous uploads run, /ping is polled and
+its latency reported. The Cloudinary SDK is replaced by a stand-in that
+blocks for `upload_ms`, so no credentials or network are needed.
+
+Usage: python benchmarks/bench_uploads.py [uploads] [upload_ms]
+"""
+
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import httpx
+from fastapi import FastAPI
+from app.services.storage import CloudinaryStorage
+
+
+class SlowUploader:
+    """Blocking stand-in for cloudinary.uploader"""
+
+    def __init__(self, upload_ms: float):
+        self.delay = upload_ms / 1000
+
+    def upload(self, data, public_id, **options):
+        time.sleep(self.delay)
+        return {"public_id": public_id, "secure_url": f"https://res.cloudinary.com/demo/image/upload/v1/{public_id}.jpg"}
+
+    def destroy(self, public_id):
+        time.sleep(self.delay / 4)
+        return {"result": "ok"}
+
+
+def build_app(uploader: SlowUploader) -> FastAPI:
+    storage = CloudinaryStorage("demo", "key", "secret", max_connections=10)
+    storage._uploader = uploader
+    app = FastAPI()
+
+    @app.post("/blocking/{n}")
+    async def blocking(n: int):
+        return uploader.upload(b"x" * 1024, public_id=f"bench_{n}")
+
+    @app.post("/storage/{n}")
+    async def offloaded(n: int):
+        stored = await storage.save(f"bench_{n}", b"x" * 1024)
+        return {"url": stored.url}
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    return app
+
+
+async def measure(client: httpx.AsyncClient, path: str, uploads: int):
+    latencies = []
+    done = asyncio.Event()
+
+    async def poll():
+        # Latency counts from when the ping was due, so a stalled loop shows up
+        while not done.is_set():
+            due = time.perf_counter() + 0.01
+            await asyncio.sleep(0.01)
+            await client.get("/ping")
+            latencies.append((time.perf_counter() - due) * 1000)
+
+    poller = asyncio.create_task(poll())
+    await asyncio.sleep(0.05)
+    start = time.perf_counter()
+    await asyncio.gather(*(client.post(f"/{path}/{n}") for n in range(uploads)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await poller
+
+    latencies.sort()
+    print(
+        f"{path:>9}: {uploads} uploads in {elapsed:6.2f}s | /ping n={len(latencies):4d} "
+        f"median {statistics.median(latencies):7.1f} ms  "
+        f"p95 {latencies[int(len(latencies) * 0.95)]:7.1f} ms  max {latencies[-1]:7.1f} ms"
+    )
+
+
+async def main(uploads: int = 50, upload_ms: float = 200.0):
+    app = build_app(SlowUploader(upload_ms))
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        await measure(client, "blocking", uploads)
+        await measure(client, "storage", uploads)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    asyncio.run(main(
+        int(args[0]) if len(args) > 0 else 50,
+        float(args[1]) if len(args) > 1 else 200.0,
+    ))
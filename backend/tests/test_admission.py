@@ -0,0 +1,68 @@
+"""
+Waiting room admission
+
+Runs against the database (see conftest.py): two controllers stand in for
+two workers sharing the queue.
+"""
+
+import pytest
+from app.core.admission import AdmissionController
+
+SLOW = 0.001  # admissions per second; the tests move the watermark themselves
+
+
+def worker() -> AdmissionController:
+    return AdmissionController(
+        min_rate=SLOW, max_rate=SLOW, target_latency=1.0, target_occupancy=1.0,
+        admission_ttl=60, sync_interval=60,
+    )
+
+
+@pytest.mark.asyncio
+async def test_tickets_are_served_in_order_by_every_worker(seed):
+    first, second = worker(), worker()
+    await first.connect()
+    await second.connect()
+    try:
+        # An empty queue that only moves when told to
+        await first._connection.execute(
+            "UPDATE t_waiting_room SET admitted = (SELECT nextval('waiting_room_ticket_seq')), "
+            "rate = $1, advanced_at = now(), adjusted_at = now() WHERE id = 1",
+            SLOW,
+        )
+        await first.sync()
+        early = await first.issue("holder")
+        late = await second.issue("holder")
+
+        # `first` has not synced since `late` was taken from `second`
+        admitted, position, payload = first.check(late, "holder")
+        assert (admitted, position) == (False, 2) and payload is not None
+
+        await second.sync()
+        assert second.check(early, "holder")[:2] == (False, 1)
+        assert second.check(late, "holder")[:2] == (False, 2)
+
+        await first._connection.execute("UPDATE t_waiting_room SET admitted = admitted + 1 WHERE id = 1")
+        await first.sync()
+        await second.sync()
+        assert first.check(early, "holder")[:2] == (True, 0)
+        assert second.check(early, "holder")[:2] == (True, 0)
+        assert first.check(late, "holder")[:2] == (False, 1)
+        assert not first.is_open()
+    finally:
+        await first._connection.execute("DELETE FROM t_waiting_room")
+        await first.close()
+        await second.close()
+
+
+@pytest.mark.asyncio
+async def test_tickets_belong_to_their_holder(seed):
+    controller = worker()
+    await controller.connect()
+    try:
+        ticket = await controller.issue("holder")
+        assert controller.check(ticket, "holder")[2] is not None
+        assert controller.check(ticket, "someone else")[2] is None
+        assert controller.check(ticket, None)[2] is None
+    finally:
+        await controller.close()
@@ -0,0 +1,174 @@
+"""
+Seat allocation
+
+The allocation core is tested on plain arrays; the run and decline tests
+use the database (see conftest.py).
+"""
+
+import math
+import numpy as np
+import pytest
+from sqlalchemy import select
+from app.models.application import Application
+from app.services.allocation import (
+    ALLOCATED, DECLINED, NOT_ALLOCATED, WAITLISTED,
+    allocate, decline_allocation, deferred_acceptance, run_allocation,
+)
+
+
+def accept(applications, capacity):
+    """deferred_acceptance over (applicant, session, preference, priority) tuples"""
+    applicant, session, preference, priority = (np.array(column) for column in zip(*applications))
+    return deferred_acceptance(applicant, session, preference, priority, np.array(capacity))
+
+
+def test_everyone_gets_their_first_choice_when_it_fits():
+    result = accept([(0, 0, 1, 0), (0, 1, 2, 1), (1, 1, 1, 2)], [1, 1])
+    assert result["held"].tolist() == [True, False, True]
+    assert not result["rejected"].any()
+    assert result["rounds"] == 1
+
+
+def test_higher_priority_displaces_a_held_seat():
+    # 0 and 1 both want session 0; 1 has priority and 0 moves on to session 1
+    result = accept([(0, 0, 1, 1), (0, 1, 2, 2), (1, 0, 1, 0)], [1, 1])
+    assert result["held"].tolist() == [False, True, True]
+    assert result["rejected"].tolist() == [True, False, False]
+
+
+def test_displacement_chains_through_several_sessions():
+    applications = [
+        (0, 0, 1, 2), (0, 1, 2, 2), (0, 2, 3, 2),
+        (1, 0, 1, 1), (1, 1, 2, 1),
+        (2, 0, 1, 0),
+    ]
+    result = accept(applications, [1, 1, 1])
+    held = {(a, s) for (a, s, _, _), h in zip(applications, result["held"]) if h}
+    assert held == {(2, 0), (1, 1), (0, 2)}
+
+
+def test_outcome_is_stable():
+    rng = np.random.default_rng(7)
+    applicants, sessions = 40, 5
+    applications = []
+    for applicant in range(applicants):
+        for preference, session in enumerate(rng.permutation(sessions)[:3], start=1):
+            applications.append((applicant, int(session), preference, 0))
+    priority = rng.permutation(len(applications))
+    applications = [(a, s, p, int(priority[i])) for i, (a, s, p, _) in enumerate(applications)]
+    capacity = [4] * sessions
+    held = accept(applications, capacity)["held"]
+
+    seat = {a: p for (a, s, p, _), h in zip(applications, held) if h}
+    holders = {}
+    for (a, s, p, r), h in zip(applications, held):
+        if h:
+            holders.setdefault(s, []).append(r)
+    assert all(len(holders.get(s, [])) <= capacity[s] for s in range(sessions))
+    # No applicant prefers a session that has a free seat or a lower-priority holder
+    for a, s, p, r in applications:
+        if p < seat.get(a, math.inf):
+            taken = holders.get(s, [])
+            assert len(taken) == capacity[s] and max(taken) < r
+
+
+def test_allocate_orders_by_rank_then_marks_and_numbers_waitlists():
+    result = allocate(
+        application_ids=np.array([10, 11, 12, 13]),
+        applicant_ids=np.array([1, 2, 3, 4]),
+        session_ids=np.array([7, 7, 7, 7]),
+        preference=np.array([1, 1, 1, 1]),
+        merit_rank=np.array([2, 1, math.nan, math.nan]),
+        marks=np.array([50, 40, 60, 90]),
+        capacity_by_session={7: 1},
+    )
+    # Ranked applications first, then unranked ones by marks
+    assert result["status"].tolist() == [WAITLISTED, ALLOCATED, WAITLISTED, WAITLISTED]
+    assert result["waitlist_position"].tolist() == [1, 0, 3, 2]
+
+
+def test_allocate_treats_a_missing_capacity_as_unlimited():
+    result = allocate(
+        application_ids=np.array([1, 2, 3]),
+        applicant_ids=np.array([1, 2, 3]),
+        session_ids=np.array([5, 5, 5]),
+        preference=np.array([1, 1, 1]),
+        merit_rank=np.array([1, 2, 3]),
+        marks=np.array([90, 80, 70]),
+        capacity_by_session={5: None},
+    )
+    assert result["status"].tolist() == [ALLOCATED] * 3
+
+
+def test_allocate_leaves_applications_never_proposed_unallocated():
+    result = allocate(
+        application_ids=np.array([1, 2]),
+        applicant_ids=np.array([1, 1]),
+        session_ids=np.array([5, 6]),
+        preference=np.array([1, 2]),
+        merit_rank=np.array([1, 1]),
+        marks=np.array([90, 90]),
+        capacity_by_session={5: 1, 6: 1},
+    )
+    assert result["status"].tolist() == [ALLOCATED, NOT_ALLOCATED]
+
+
+async def apply(seed, centre, applicant, session, preference, **values):
+    return await seed.add(Application(
+        applicant_id=applicant.applicant_id, enroll_id=session.enrollment.enroll_id,
+        session_id=session.session_id, center_id=centre.center.center_id,
+        applicant_email_id=applicant.email_id, qualification_id=centre.qualification.qualification_id,
+        stream_id=centre.stream.stream_id, marks="80", marks_numeric=80.0, role_id=centre.role.role_id,
+        preference=preference, **values,
+    ))
+
+
+async def statuses(db, applications):
+    result = await db.execute(
+        select(Application.application_id, Application.enrollment_status, Application.payment_status)
+        .where(Application.application_id.in_([a.application_id for a in applications]))
+        .execution_options(populate_existing=True)
+    )
+    return {row.application_id: (row.enrollment_status, row.payment_status) for row in result.all()}
+
+
+@pytest.mark.asyncio
+async def test_decline_chain_passes_over_fixed_seats(seed):
+    centre = await seed.centre()
+    first = await seed.session(centre, 0, seat_capacity=1, seats_reserved=1)
+    second = await seed.session(centre, 1, seat_capacity=1, seats_confirmed=1)
+    decliner, paid, next_in_line = [await seed.applicant(centre, n) for n in range(3)]
+
+    declined = await apply(seed, centre, decliner, first, 1, enrollment_status=ALLOCATED)
+    # Waitlisted first at `first`, but holding a paid seat at `second`
+    paid_waiting = await apply(seed, centre, paid, first, 1, enrollment_status=WAITLISTED, waitlist_position=1)
+    paid_seat = await apply(seed, centre, paid, second, 2, enrollment_status=ALLOCATED, payment_status="Y")
+    promoted = await apply(seed, centre, next_in_line, first, 1, enrollment_status=WAITLISTED, waitlist_position=2)
+
+    assert await decline_allocation(seed.db, declined) == 1
+    await seed.db.flush()
+
+    assert await statuses(seed.db, [declined, paid_waiting, paid_seat, promoted]) == {
+        declined.application_id: (DECLINED, "N"),
+        paid_waiting.application_id: (WAITLISTED, "N"),
+        paid_seat.application_id: (ALLOCATED, "Y"),
+        promoted.application_id: (ALLOCATED, "N"),
+    }
+
+
+@pytest.mark.asyncio
+async def test_run_drops_waitlist_entries_of_fixed_seats(seed):
+    centre = await seed.centre()
+    first = await seed.session(centre, 0, seat_capacity=1)
+    second = await seed.session(centre, 1, seat_capacity=1)
+    applicant = await seed.applicant(centre)
+
+    waiting = await apply(seed, centre, applicant, first, 1, enrollment_status=WAITLISTED, waitlist_position=1)
+    selected = await apply(seed, centre, applicant, second, 2, enrollment_status=ALLOCATED, sel_by=centre.employee.employee_id)
+
+    await run_allocation(seed.db)
+
+    assert await statuses(seed.db, [waiting, selected]) == {
+        waiting.application_id: (NOT_ALLOCATED, "N"),
+        selected.application_id: (ALLOCATED, "N"),
+    }
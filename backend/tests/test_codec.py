@@ -0,0 +1,129 @@
+"""
+Shared response codec
+"""
+
+from datetime import date, datetime
+from typing import Optional
+import pytest
+from fastapi import HTTPException
+from pydantic import BaseModel
+from sqlalchemy import Column, Date, DateTime, Float, Integer, MetaData, String, Table
+from app.core.codec import (
+    Projection, RowCodec, field_selection, application_status, certificate_status, payment_status,
+)
+
+
+class Row(BaseModel):
+    id: int
+    name: str
+    marks: Optional[float] = None
+    born: date
+    updated: datetime
+
+
+ROWS = [
+    {"id": 1, "name": "Asha \"A\" Rao", "marks": 81.5, "born": date(2004, 2, 29), "updated": datetime(2024, 6, 1, 9, 30)},
+    {"id": 2, "name": "Ravi", "marks": None, "born": date(2003, 1, 1), "updated": datetime(2024, 6, 2, 0, 0, 5)},
+]
+
+
+def test_rows_encode_like_the_response_model():
+    expected = b"[" + b",".join(Row(**row).model_dump_json().encode() for row in ROWS) + b"]"
+    assert RowCodec(Row).dump(ROWS) == expected
+
+
+def test_field_subset_encodes_only_those_fields():
+    assert RowCodec(Row, ("id", "marks")).dump([{"id": 1, "marks": None}]) == b'[{"id":1,"marks":null}]'
+
+
+def test_dump_accepts_any_iterable():
+    assert RowCodec(Row, ("id",)).dump({"id": n} for n in range(2)) == b'[{"id":0},{"id":1}]'
+    assert RowCodec(Row).dump([]) == b"[]"
+
+
+def test_response_is_json():
+    response = RowCodec(Row, ("id",)).response([{"id": 3}], status_code=201)
+    assert response.status_code == 201
+    assert response.media_type == "application/json"
+    assert response.body == b'[{"id":3}]'
+
+
+def test_status_labels():
+    assert application_status("W") == "Waitlisted"
+    assert application_status("?") == "Pending"
+    assert payment_status("Y") == "Paid"
+    assert payment_status("?") == "Pending"
+    assert certificate_status("P") == "Pending"
+    assert certificate_status("?") == "Not Issued"
+
+
+people = Table(
+    "people", MetaData(),
+    Column("id", Integer), Column("first", String), Column("last", String),
+    Column("marks", Float), Column("born", Date), Column("updated", DateTime),
+)
+
+
+def name(first, last):
+    return f"{first} {last}"
+
+
+projection = Projection(Row, {
+    "id": people.c.id,
+    "name": ((people.c.first, people.c.last), name),
+    "marks": people.c.marks,
+    "born": people.c.born,
+    "updated": people.c.updated,
+})
+
+
+def test_projection_needs_a_source_for_every_field():
+    with pytest.raises(ValueError, match="marks"):
+        Projection(Row, {"id": people.c.id, "name": people.c.first, "born": people.c.born, "updated": people.c.updated})
+
+
+def test_projection_selects_only_the_columns_of_requested_fields():
+    assert projection.columns(("id", "name")) == (people.c.id, people.c.first, people.c.last)
+    assert len(projection.columns()) == 6
+
+
+def test_projection_selects_shared_columns_once():
+    shared = Projection(Row, {
+        "id": people.c.id,
+        "name": ((people.c.id, people.c.last), name),
+        "marks": people.c.marks,
+        "born": people.c.born,
+        "updated": people.c.updated,
+    })
+    assert shared.columns(("id", "name")) == (people.c.id, people.c.last)
+    assert shared.rows([(7, "Rao")], ("id", "name")) == [{"id": 7, "name": "7 Rao"}]
+
+
+def test_projection_builds_and_encodes_rows():
+    rows = projection.rows([(1, "Asha", "Rao", 81.5)], ("id", "name", "marks"))
+    assert rows == [{"id": 1, "name": "Asha Rao", "marks": 81.5}]
+    assert projection.codec(("id", "name", "marks")).dump(rows) == b'[{"id":1,"name":"Asha Rao","marks":81.5}]'
+
+
+def test_projection_plans_are_cached():
+    assert projection.codec(("id",)) is projection.codec(("id",))
+
+
+select_fields = field_selection(Row)
+
+
+def test_field_selection_returns_model_order():
+    assert select_fields("updated, id,id") == ("id", "updated")
+
+
+def test_field_selection_without_fields_means_all():
+    assert select_fields(None) is None
+    assert select_fields("") is None
+    assert select_fields(" , ") is None
+
+
+def test_field_selection_rejects_unknown_fields():
+    with pytest.raises(HTTPException) as error:
+        select_fields("id,age,email")
+    assert error.value.status_code == 400
+    assert error.value.detail == "Unknown fields: age, email"
@@ -0,0 +1,109 @@
+"""
+Response compression
+"""
+
+import gzip
+import httpx
+import pytest
+from fastapi import FastAPI, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from app.core import compression
+from app.core.compression import CompressionMiddleware, Precompressed, choose_encoding
+
+
+@pytest.fixture
+def with_brotli(monkeypatch):
+    # Negotiation only checks that the package is there
+    monkeypatch.setattr(compression, "brotli", object())
+
+
+@pytest.fixture
+def without_brotli(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("gzip, deflate, br", "br"),
+    ("gzip;q=1.0, br;q=0.5", "br"),  # brotli is preferred whenever accepted
+    ("BR", "br"),
+    ("gzip, br;q=0", "gzip"),
+    ("br;q=bad, gzip", "gzip"),
+    ("*", "br"),
+    ("*;q=0, gzip", "gzip"),
+    ("deflate", None),
+    ("identity", None),
+    ("", None),
+])
+def test_choose_encoding(with_brotli, accept_encoding, expected):
+    assert choose_encoding(accept_encoding) == expected
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("br", None),
+    ("gzip, br", "gzip"),
+    ("*", "gzip"),
+])
+def test_choose_encoding_without_brotli(without_brotli, accept_encoding, expected):
+    assert choose_encoding(accept_encoding) == expected
+
+
+def test_precompressed_compresses_each_encoding_once(without_brotli):
+    payload = Precompressed(b"[" + b'{"id":1},' * 200 + b"{}]")
+    first = payload.encoded("gzip")
+    assert payload.encoded("gzip") is first
+    assert gzip.decompress(first) == payload.body
+    assert payload.nbytes == len(payload.body) + len(first)
+
+
+app = FastAPI()
+app.add_middleware(CompressionMiddleware, minimum_size=100)
+BODY = "row\n" * 100
+
+
+@app.get("/text")
+def text():
+    return PlainTextResponse(BODY)
+
+
+@app.get("/short")
+def short():
+    return PlainTextResponse("row")
+
+
+@app.get("/stream")
+def stream():
+    return StreamingResponse(iter([BODY, BODY]), media_type="text/plain")
+
+
+@app.get("/image")
+def image():
+    return Response(b"\x89PNG" * 100, media_type="image/png")
+
+
+def client():
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://t")
+
+
+@pytest.mark.asyncio
+async def test_middleware_compresses_large_textual_responses(without_brotli):
+    async with client() as http:
+        response = await http.get("/text", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert response.text == BODY
+
+        response = await http.get("/stream", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.text == BODY * 2
+
+
+@pytest.mark.asyncio
+async def test_middleware_leaves_small_and_binary_responses(without_brotli):
+    async with client() as http:
+        response = await http.get("/short", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in response.headers
+        assert response.headers["vary"] == "Accept-Encoding"
+        response = await http.get("/image", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in response.headers
+        response = await http.get("/text", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in response.headers
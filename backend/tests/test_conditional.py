@@ -0,0 +1,73 @@
+"""
+Conditional GET validators
+"""
+
+from datetime import datetime, timedelta, timezone
+import pytest
+from fastapi import Request
+from app.core.conditional import content_validators, is_not_modified, make_validators, not_modified
+
+UPDATED = datetime(2024, 6, 1, 9, 30, 15, 250000)
+VALIDATORS = make_validators(3, 42, UPDATED, ("id", "name"))
+TAG = VALIDATORS.etag
+
+
+def request(**headers):
+    raw = [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+
+def test_validators_follow_every_part():
+    assert make_validators(3, 42, UPDATED, ("id", "name")) == VALIDATORS
+    assert make_validators(4, 42, UPDATED, ("id", "name")).etag != TAG
+    assert make_validators(3, 42, UPDATED, ("id",)).etag != TAG
+    assert VALIDATORS.last_modified == UPDATED
+    assert content_validators(b"[]") == content_validators(b"[]")
+    assert content_validators(b"[]").last_modified is None
+
+
+def test_aware_datetimes_are_kept_in_utc():
+    aware = datetime(2024, 6, 1, 15, 0, tzinfo=timezone(timedelta(hours=5, minutes=30)))
+    assert make_validators(aware).last_modified == datetime(2024, 6, 1, 9, 30)
+
+
+@pytest.mark.parametrize("if_none_match, expected", [
+    (TAG, True),
+    (TAG[2:], True),  # strong form of the weak tag
+    (f'"other", {TAG}', True),
+    (f'W/"other",{TAG[2:]}', True),
+    ("*", True),
+    (' * ', True),
+    ('W/"other"', False),
+    ("", False),
+])
+def test_if_none_match(if_none_match, expected):
+    assert is_not_modified(request(if_none_match=if_none_match), VALIDATORS) is expected
+
+
+@pytest.mark.parametrize("since, expected", [
+    ("Sat, 01 Jun 2024 09:30:15 GMT", True),  # whole seconds, the fraction is ignored
+    ("Sat, 01 Jun 2024 09:31:00 GMT", True),
+    ("Sat, 01 Jun 2024 09:30:14 GMT", False),
+    ("not a date", False),
+])
+def test_if_modified_since(since, expected):
+    assert is_not_modified(request(if_modified_since=since), VALIDATORS) is expected
+
+
+def test_if_none_match_takes_precedence():
+    fresh = "Sat, 01 Jun 2024 10:00:00 GMT"
+    assert not is_not_modified(request(if_none_match='"other"', if_modified_since=fresh), VALIDATORS)
+
+
+def test_no_validators_in_the_request():
+    assert not is_not_modified(request(), VALIDATORS)
+    assert not is_not_modified(request(if_modified_since="Sat, 01 Jun 2024 10:00:00 GMT"), content_validators(b"[]"))
+
+
+def test_not_modified_response_carries_the_validators():
+    response = not_modified(request(if_none_match=TAG), VALIDATORS)
+    assert response.status_code == 304
+    assert response.headers["etag"] == TAG
+    assert response.headers["last-modified"] == "Sat, 01 Jun 2024 09:30:15 GMT"
+    assert not_modified(request(), VALIDATORS) is None
@@ -0,0 +1,65 @@
+"""
+Write-behind intake
+
+The database tests run against the database (see conftest.py).
+"""
+
+import httpx
+import pytest
+from sqlalchemy import delete
+from app.core.security import create_access_token
+from app.main import app
+from app.models.application import Application
+from app.models.role import RoleEnum
+from app.models.user import User
+from app.services.intake import ACCEPTED, REJECTED, insert_submissions, issue_ticket, verify_ticket
+
+
+def test_tickets_are_bound_to_their_applicant():
+    ticket = issue_ticket(7)
+    assert verify_ticket(ticket, 7)
+    assert not verify_ticket(ticket, 8)
+    assert not verify_ticket(ticket.partition(".")[0], 7)
+
+
+@pytest.mark.asyncio
+async def test_outcomes_are_durable_and_replay_safe(seed):
+    centre = await seed.centre()
+    session = await seed.session(centre)
+    applicant = await seed.applicant(centre)
+    user = await seed.add(User(
+        email=applicant.email_id, password_hash="-", role=RoleEnum.APPLICANT.value,
+        applicant_id=applicant.applicant_id,
+    ))
+    await seed.db.commit()
+
+    data = {
+        "session_id": session.session_id, "enroll_id": session.enrollment.enroll_id,
+        "qualification_id": centre.qualification.qualification_id, "stream_id": centre.stream.stream_id,
+        "marks": "80", "marks_scale": "percent", "role_id": centre.role.role_id,
+    }
+    accepted, duplicate = issue_ticket(applicant.applicant_id), issue_ticket(applicant.applicant_id)
+    records = [
+        {"ticket": accepted, "applicant_id": applicant.applicant_id, "data": data},
+        {"ticket": duplicate, "applicant_id": applicant.applicant_id, "data": data},
+    ]
+    try:
+        outcomes = await insert_submissions(records)
+        assert outcomes[accepted][0] == ACCEPTED
+        assert outcomes[duplicate] == (REJECTED, None, "You have already applied to this session")
+
+        # The journal is replayed at least once; a replay changes nothing
+        assert await insert_submissions(records) == outcomes
+
+        # No worker remembers the outcomes here, as after a restart
+        headers = {"Authorization": f"Bearer {create_access_token({'sub': user.id})}"}
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as client:
+            response = await client.get(f"/applicant/applications/intake/{duplicate}", headers=headers)
+            assert response.json()["status"] == REJECTED
+            assert response.json()["detail"] == "You have already applied to this session"
+            response = await client.get(f"/applicant/applications/intake/{accepted}", headers=headers)
+            assert response.json()["status"] == ACCEPTED
+    finally:
+        await seed.db.execute(delete(Application).where(Application.applicant_id == applicant.applicant_id))
+        await seed.db.commit()
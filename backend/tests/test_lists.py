@@ -0,0 +1,76 @@
+"""
+Column-projected list loaders
+
+These run against the database (see conftest.py).
+"""
+
+from datetime import datetime, timedelta
+import pytest
+from app.models.application import Application
+from app.models.enrollment_news import EnrollmentNews
+from app.routers.applicant import _load_applications, _load_sessions
+from app.routers.center import _load_center_applications
+
+
+async def apply(seed, centre, applicant, session, updated, **values):
+    return await seed.add(Application(
+        applicant_id=applicant.applicant_id, enroll_id=session.enrollment.enroll_id,
+        session_id=session.session_id, center_id=centre.center.center_id,
+        applicant_email_id=applicant.email_id, qualification_id=centre.qualification.qualification_id,
+        stream_id=centre.stream.stream_id, marks="80", marks_numeric=80.0, role_id=centre.role.role_id,
+        updated_date=updated, **values,
+    ))
+
+
+@pytest.mark.asyncio
+async def test_application_lists(seed):
+    centre = await seed.centre()
+    first, second = await seed.session(centre, 0), await seed.session(centre, 1)
+    applicant = await seed.applicant(centre)
+    applicant.middle_name = "K"
+    now = datetime.utcnow()
+    older = await apply(seed, centre, applicant, first, now - timedelta(days=1), enrollment_status="W")
+    newer = await apply(seed, centre, applicant, second, now, payment_status="Y", reg_id="REG1")
+
+    mine = await _load_applications(seed.db, applicant.applicant_id)
+    assert [a.application_id for a in mine] == [newer.application_id, older.application_id]
+    assert mine[0].model_dump() == {
+        "application_id": newer.application_id, "session_name": second.session_name,
+        "center_name": centre.center.center_name, "application_status": "Submitted",
+        "payment_status": "Paid", "certificate_status": "Not Issued", "updated_date": now, "reg_id": "REG1",
+    }
+
+    rows = await _load_center_applications(seed.db, centre.center.center_id)
+    assert rows[1] == {
+        "application_id": older.application_id, "applicant_name": "Test K Applicant 0",
+        "applicant_email": applicant.email_id, "session_name": first.session_name,
+        "application_status": "Waitlisted", "payment_status": "Unpaid", "certificate_status": "Not Issued",
+        "reg_id": None, "updated_date": now - timedelta(days=1),
+    }
+    assert await _load_center_applications(seed.db, centre.center.center_id, ("application_id", "applicant_name")) == [
+        {"application_id": newer.application_id, "applicant_name": "Test K Applicant 0"},
+        {"application_id": older.application_id, "applicant_name": "Test K Applicant 0"},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_sessions_carry_their_first_active_enrollment(seed):
+    centre = await seed.centre()
+    session = await seed.session(centre)
+    closed = await seed.session(centre, 1)
+    closed.enrollment.active_status = "N"
+    for days, active in ((-1, "N"), (1, "Y")):
+        await seed.add(EnrollmentNews(
+            enroll_title=f"Other {days}", enroll_desc="Enrollment",
+            enroll_start_date=session.enrollment.enroll_start_date + timedelta(days=days),
+            enroll_end_date=session.enrollment.enroll_end_date, center_id=centre.center.center_id,
+            session_id=session.session_id, updated_by=centre.employee.employee_id, active_status=active,
+        ))
+
+    rows = {row["session_id"]: row for row in await _load_sessions(seed.db)}
+    assert rows[session.session_id]["enroll_id"] == session.enrollment.enroll_id
+    assert rows[session.session_id]["session_name"] == session.session_name
+    assert rows[closed.session_id]["enroll_id"] is None
+
+    selected = await _load_sessions(seed.db, ("session_id", "enroll_id"))
+    assert {"session_id": session.session_id, "enroll_id": session.enrollment.enroll_id} in selected
@@ -0,0 +1,23 @@
+"""
+Route priorities for load shedding
+"""
+
+import pytest
+from app.core.load_shedding import CRITICAL, EXEMPT, LOW, NORMAL, route_class
+
+
+@pytest.mark.parametrize("method, path, expected", [
+    ("POST", "/auth/login", CRITICAL),
+    ("POST", "/applicant/applications", CRITICAL),
+    ("POST", "/applicant/applications/intake", CRITICAL),
+    ("PUT", "/applicant/applications/12/documents/marksheet", NORMAL),
+    ("POST", "/applicant/applications/12/decline", NORMAL),
+    ("GET", "/applicant/applications/intake/abc", NORMAL),
+    ("PATCH", "/applicant/uploads/abc", NORMAL),
+    ("GET", "/applicant/applications", LOW),
+    ("GET", "/applicant/events", EXEMPT),
+    ("GET", "/health", EXEMPT),
+    ("GET", "/", EXEMPT),
+])
+def test_route_class(method, path, expected):
+    assert route_class(method, path) == expected
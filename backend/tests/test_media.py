@@ -0,0 +1,51 @@
+"""
+Image variants
+"""
+
+import hashlib
+import httpx
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI
+from app.routers import media
+from app.services.images import ImagePipeline, master_key
+from app.services.storage import LocalStorage
+
+STORED = hashlib.sha256(b"stored").hexdigest()
+UNKNOWN = hashlib.sha256(b"unknown").hexdigest()
+TAG = f'"{STORED[:16]}-thumb-webp"'
+
+app = FastAPI()
+app.include_router(media.router, prefix="/media")
+
+
+@pytest_asyncio.fixture
+async def client(tmp_path, monkeypatch):
+    backend = LocalStorage(str(tmp_path))
+    await backend.save(master_key(STORED), b"master")
+    monkeypatch.setattr(media, "storage", backend)
+    monkeypatch.setattr(media, "images", ImagePipeline(backend))
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://t") as client:
+        yield client
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("if_none_match", [TAG, f"W/{TAG}", f'"other", {TAG}', "*"])
+async def test_matching_tag_is_not_modified(client, if_none_match):
+    response = await client.get(f"/media/images/{STORED}/thumb.webp", headers={"If-None-Match": if_none_match})
+    assert response.status_code == 304
+    assert response.headers["etag"] == TAG
+    assert response.headers["cache-control"] == "public, max-age=31536000, immutable"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("if_none_match", [f'"{UNKNOWN[:16]}-thumb-webp"', "*"])
+async def test_unknown_image_is_not_found_even_when_the_tag_matches(client, if_none_match):
+    response = await client.get(f"/media/images/{UNKNOWN}/thumb.webp", headers={"If-None-Match": if_none_match})
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_unknown_variant_is_not_found(client):
+    response = await client.get(f"/media/images/{STORED}/huge.webp", headers={"If-None-Match": "*"})
+    assert response.status_code == 404
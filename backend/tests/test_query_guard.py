@@ -0,0 +1,190 @@
+"""
+Query budgets and N+1 detection
+
+The unit tests need nothing else. The endpoint tests call every endpoint
+declaring a `@query_budget` with QUERY_GUARD=raise against the database in
+DATABASE_URL (see conftest.py) and are skipped when it cannot be reached.
+"""
+
+from types import SimpleNamespace
+import httpx
+import pytest
+import pytest_asyncio
+from app.core.config import settings
+from app.core.query_guard import QueryBudgetExceeded, expect_queries, violations
+from app.core.security import create_access_token
+from app.db.events import QueryStats, _statement_finished, statement_shape, track_queries
+from app.main import app
+from app.models.application import Application
+from app.models.role import RoleEnum
+from app.models.user import User
+
+SESSIONS = 6  # more than QUERY_REPEAT_THRESHOLD, so a query per session shows up
+
+
+def execute(statement: str) -> None:
+    """Report a statement to the engine listener as if it had just run"""
+    context = SimpleNamespace(_query_started=0.0)
+    _statement_finished(None, None, statement, (), context, False)
+
+
+# statement_shape
+
+
+def test_statement_shape_normalises_whitespace():
+    assert statement_shape("SELECT a,\n       b\n  FROM t") == "SELECT a, b FROM t"
+
+
+def test_statement_shape_collapses_parameter_lists():
+    one = statement_shape("SELECT * FROM t WHERE id IN ($1)")
+    many = statement_shape("SELECT * FROM t WHERE id IN ($1, $2,$3)")
+    assert one == many == "SELECT * FROM t WHERE id IN (?)"
+
+
+def test_statement_shape_keeps_separate_parameters_apart():
+    shape = statement_shape("SELECT * FROM t WHERE a = $1 AND b = $2")
+    assert shape == "SELECT * FROM t WHERE a = ? AND b = ?"
+
+
+# violations
+
+
+def stats_with(shapes, count=None):
+    stats = QueryStats(shapes=True)
+    stats.shapes = dict(shapes)
+    stats.count = sum(shapes.values()) if count is None else count
+    return stats
+
+
+def test_violations_within_budget():
+    assert violations(stats_with({"SELECT 1": 1, "SELECT 2": 1}), at_most=2) == []
+
+
+def test_violations_over_budget():
+    assert violations(stats_with({"SELECT 1": 1, "SELECT 2": 1}), at_most=1) == ["2 statements, budget 1"]
+
+
+def test_violations_without_budget_only_checks_repeats():
+    assert violations(stats_with({"SELECT 1": 4}, count=100), repeats=5) == []
+
+
+def test_violations_repeated_shape():
+    found = violations(stats_with({"SELECT * FROM t WHERE id = ?": 5}), repeats=5)
+    assert found == ["5 executions of: SELECT * FROM t WHERE id = ?"]
+
+
+def test_violations_default_repeat_threshold(monkeypatch):
+    monkeypatch.setattr(settings, "QUERY_REPEAT_THRESHOLD", 3)
+    assert violations(stats_with({"SELECT 1": 2})) == []
+    assert violations(stats_with({"SELECT 1": 3})) == ["3 executions of: SELECT 1"]
+
+
+# QueryStats
+
+
+def test_statements_outside_tracking_are_ignored():
+    execute("SELECT 1")
+    with track_queries() as stats:
+        pass
+    assert stats.count == 0
+
+
+def test_nested_stats_count_every_statement():
+    with track_queries(shapes=True) as outer:
+        execute("SELECT 1")
+        with track_queries() as inner:
+            execute("SELECT * FROM t WHERE id IN ($1, $2)")
+            execute("SELECT * FROM t WHERE id IN ($1)")
+        execute("SELECT 2")
+    assert inner.count == 2
+    assert inner.shapes is None
+    assert [statement for statement, _ in inner.statements] == [
+        "SELECT * FROM t WHERE id IN ($1, $2)",
+        "SELECT * FROM t WHERE id IN ($1)",
+    ]
+    assert outer.count == 4
+    assert outer.shapes == {"SELECT 1": 1, "SELECT * FROM t WHERE id IN (?)": 2, "SELECT 2": 1}
+
+
+def test_leaving_a_block_restores_the_outer_stats():
+    with track_queries() as outer:
+        with track_queries():
+            pass
+        execute("SELECT 1")
+    assert outer.count == 1
+
+
+def test_expect_queries_raises_over_budget():
+    with pytest.raises(QueryBudgetExceeded, match="3 statements, budget 2"):
+        with expect_queries(at_most=2):
+            for n in range(3):
+                execute(f"SELECT {n}")
+
+
+def test_expect_queries_raises_on_repeats():
+    with pytest.raises(QueryBudgetExceeded, match="executions of"):
+        with expect_queries(repeats=3):
+            for n in range(3):
+                execute(f"SELECT * FROM t WHERE id = ${n + 1}")
+
+
+# Budgeted endpoints
+
+
+@pytest_asyncio.fixture
+async def seeded(seed, monkeypatch):
+    """An applicant with an application per session of one centre, and that centre's user"""
+    monkeypatch.setattr(settings, "QUERY_GUARD", "raise")
+    centre = await seed.centre()
+    applicant = await seed.applicant(centre)
+    for n in range(SESSIONS):
+        session = await seed.session(centre, n)
+        await seed.add(Application(
+            applicant_id=applicant.applicant_id, enroll_id=session.enrollment.enroll_id,
+            session_id=session.session_id, center_id=centre.center.center_id,
+            applicant_email_id=applicant.email_id, qualification_id=centre.qualification.qualification_id,
+            stream_id=centre.stream.stream_id, marks="80", marks_numeric=80.0, role_id=centre.role.role_id,
+            preference=n + 1,
+        ))
+    applicant_user = await seed.add(User(
+        email=applicant.email_id, password_hash="-", role=RoleEnum.APPLICANT.value,
+        applicant_id=applicant.applicant_id,
+    ))
+    centre_user = await seed.add(User(
+        email=centre.employee.emp_email_id, password_hash="-", role=RoleEnum.CENTRE.value,
+        center_id=centre.center.center_id, employee_id=centre.employee.employee_id,
+    ))
+    await seed.db.commit()
+
+    def bearer(user_id):
+        return {"Authorization": f"Bearer {create_access_token({'sub': user_id})}"}
+
+    return {RoleEnum.APPLICANT: bearer(applicant_user.id), RoleEnum.CENTRE: bearer(centre_user.id)}
+
+
+BUDGETED = [
+    (RoleEnum.APPLICANT, "/applicant/profile"),
+    (RoleEnum.APPLICANT, "/applicant/applications"),
+    (RoleEnum.APPLICANT, "/applicant/sessions"),
+    (RoleEnum.APPLICANT, "/applicant/dashboard"),
+    (RoleEnum.CENTRE, "/center/applications"),
+    (RoleEnum.CENTRE, "/center/sessions"),
+]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("role, path", BUDGETED)
+async def test_endpoint_within_query_budget(seeded, role, path):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://t") as client:
+        # Raises QueryBudgetExceeded on a violation
+        response = await client.get(path, headers=seeded[role])
+    assert response.status_code == 200, response.text
+
+
+def test_every_budgeted_endpoint_is_tested():
+    declared = {
+        route.path for route in app.routes
+        if getattr(getattr(route, "endpoint", None), "query_budget", None) is not None
+    }
+    assert declared == {path for _, path in BUDGETED}
@@ -0,0 +1,90 @@
+"""
+Marks normalisation and merit lists
+"""
+
+import math
+import numpy as np
+import pytest
+from app.services.marks import ambiguous_marks, normalise_marks
+from app.services.ranking import compute_merit_list
+
+
+@pytest.mark.parametrize("raw, scale, expected", [
+    ("78", "percent", 78.0),
+    (" 78.456% ", "percent", 78.46),
+    ("9.5%", "percent", 9.5),
+    ("9.5", "percent", None),  # may be a CGPA
+    ("101", "percent", None),
+    ("8.2", "cgpa", 82.0),
+    ("10", "cgpa", 100.0),
+    ("11", "cgpa", None),
+    ("abc", "percent", None),
+    ("-5", "percent", None),
+    ("nan", "percent", None),
+    (None, "percent", None),
+])
+def test_normalise_marks(raw, scale, expected):
+    assert normalise_marks(raw, scale) == expected
+
+
+def test_ambiguous_marks():
+    assert ambiguous_marks("7")
+    assert not ambiguous_marks("7%")
+    assert not ambiguous_marks("7", "cgpa")
+    assert not ambiguous_marks("70")
+
+
+def merit(marks, dob_days=None, submitted=None, castes=None, **options):
+    n = len(marks)
+    return compute_merit_list(
+        np.arange(1, n + 1),
+        np.array([math.nan if m is None else m for m in marks], dtype=np.float64),
+        np.zeros(n, dtype=np.int64) if dob_days is None else dob_days,
+        np.zeros(n, dtype=np.int64) if submitted is None else submitted,
+        np.ones(n, dtype=np.int64) if castes is None else castes,
+        **options,
+    )
+
+
+def test_higher_marks_rank_first_and_missing_marks_last():
+    assert merit([70, None, 90, 80])["merit_rank"].tolist() == [3, 4, 1, 2]
+
+
+def test_ties_go_to_the_older_applicant_then_the_earlier_submission():
+    ranking = merit([80, 80, 80], dob_days=[200, 100, 100], submitted=[1, 9, 5])
+    assert ranking["merit_rank"].tolist() == [3, 2, 1]
+
+
+def test_submission_time_breaks_ties_not_application_id():
+    # Write-behind batches insert later submissions with lower ids
+    ranking = merit([80, 80], submitted=[20, 10], tie_breakers=("submitted",))
+    assert ranking["merit_rank"].tolist() == [2, 1]
+
+
+def test_application_id_is_the_last_tie_breaker():
+    assert merit([80, 80], tie_breakers=())["merit_rank"].tolist() == [1, 2]
+
+
+def test_unknown_tie_breaker():
+    with pytest.raises(ValueError):
+        merit([80], tie_breakers=("age",))
+
+
+def test_category_ranks_count_within_each_caste():
+    ranking = merit([90, 80, 70, 60], castes=[1, 2, 1, 2])
+    assert ranking["category_rank"].tolist() == [1, 1, 2, 2]
+
+
+def test_quota_seats_go_to_the_best_of_the_caste_after_open_merit():
+    ranking = merit([90, 85, 80, 50, 40], castes=[1, 1, 1, 2, 2], seats=3, quotas={2: 1})
+    # Two open seats by merit, one quota seat for caste 2
+    assert ranking["selected"].tolist() == [True, True, False, True, False]
+
+
+def test_unfilled_quota_seats_roll_over_to_general_merit():
+    ranking = merit([90, 85, 80, 75], castes=[1, 1, 1, 1], seats=3, quotas={2: 2})
+    assert ranking["selected"].tolist() == [True, True, True, False]
+
+
+def test_no_seats_selects_nobody():
+    assert not merit([90, 80])["selected"].any()
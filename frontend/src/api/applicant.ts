@@ -1,4 +1,5 @@
-import apiClient from './client'
+import apiClient, { API_BASE_URL } from './client'
+import { useAuthStore } from '../store/authStore'
 
 export interface ApplicantProfile {
   applicant_id: number
@@ -77,12 +78,28 @@ export interface ApplicationCreate {
   qualification_id: number
   stream_id: number
   marks: string
+  marks_scale?: 'percent' | 'cgpa'
   dob_image?: string
   marksheet_image?: string
   role_id?: number
 }
 
+export interface ApplicantDashboard {
+  profile?: ApplicantProfile | null
+  applications?: Application[]
+  news?: NewsItem[]
+  sessions?: Session[]
+}
+
+export type DashboardSection = 'profile' | 'applications' | 'news' | 'sessions'
+
 export const applicantAPI = {
+  getDashboard: async (sections?: DashboardSection[]): Promise<ApplicantDashboard> => {
+    const response = await apiClient.get<ApplicantDashboard>('/applicant/dashboard', {
+      params: sections ? { sections: sections.join(',') } : undefined,
+    })
+    return response.data
+  },
   createProfile: async (data: ApplicantCreate): Promise<ApplicantProfile> => {
     const response = await apiClient.post<ApplicantProfile>('/applicant/profile', data)
     return response.data
@@ -112,14 +129,75 @@ export const applicantAPI = {
     return response.data
   },
   uploadProfilePhoto: async (file: File): Promise<ApplicantProfile> => {
-    const formData = new FormData()
-    formData.append('profile_photo', file)
-    const response = await apiClient.patch<ApplicantProfile>('/applicant/profile/photo', formData, {
+    // Raw body: the server streams it and enforces the size limit as it arrives
+    const response = await apiClient.patch<ApplicantProfile>('/applicant/profile/photo', file, {
       headers: {
-        'Content-Type': 'multipart/form-data',
+        'Content-Type': file.type || 'application/octet-stream',
       },
     })
     return response.data
   },
 }
 
+/**
+ * Follow the server-sent application updates (GET /applicant/events).
+ * EventSource cannot send the bearer token, so the stream is read with fetch.
+ * Reconnects after the server's retry delay; returns a function that stops it.
+ */
+export function subscribeApplications(onApplications: (applications: Application[]) => void): () => void {
+  const controller = new AbortController()
+  let retryMs = 5000
+
+  const handle = (block: string) => {
+    let event = 'message'
+    const data: string[] = []
+    for (const line of block.split('\n')) {
+      if (line.startsWith('event:')) event = line.slice(6).trim()
+      else if (line.startsWith('data:')) data.push(line.slice(5).trimStart())
+      else if (line.startsWith('retry:')) retryMs = Number(line.slice(6)) || retryMs
+    }
+    if (event === 'applications' && data.length) {
+      onApplications(JSON.parse(data.join('\n')))
+    }
+  }
+
+  const run = async () => {
+    while (!controller.signal.aborted) {
+      try {
+        const { accessToken } = useAuthStore.getState()
+        const response = await fetch(`${API_BASE_URL}/applicant/events`, {
+          headers: { Authorization: `Bearer ${accessToken?.trim() ?? ''}`, Accept: 'text/event-stream' },
+          signal: controller.signal,
+        })
+        if (response.status === 404) return // no applicant profile yet
+        if (response.status === 401) {
+          // Any API call refreshes an expired token through the client interceptor
+          onApplications(await applicantAPI.getApplications())
+          continue
+        }
+        if (!response.ok || !response.body) throw new Error(`Event stream failed: ${response.status}`)
+
+        const reader = response.body.pipeThrough(new TextDecoderStream()).getReader()
+        let buffer = ''
+        for (;;) {
+          const { value, done } = await reader.read()
+          if (done) break
+          buffer += value
+          let end: number
+          while ((end = buffer.indexOf('\n\n')) >= 0) {
+            handle(buffer.slice(0, end))
+            buffer = buffer.slice(end + 2)
+          }
+        }
+      } catch (err) {
+        if (controller.signal.aborted) return
+        console.error('Application event stream error:', err)
+      }
+      await new Promise((resolve) => setTimeout(resolve, retryMs))
+    }
+  }
+
+  run()
+  return () => controller.abort()
+}
+
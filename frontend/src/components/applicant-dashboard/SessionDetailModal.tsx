@@ -21,8 +21,12 @@ const applicationSchema = z.object({
   qualification_id: z.number().min(1, 'Qualification is required'),
   stream_id: z.number().min(1, 'Stream is required'),
   marks: z.string().min(1, 'Marks are required').max(5, 'Marks must be 5 characters or less'),
+  marks_scale: z.enum(['percent', 'cgpa']),
   role_id: z.number().optional(),
-})
+}).refine(
+  (data) => data.marks_scale === 'cgpa' || data.marks.trim().endsWith('%') || !(parseFloat(data.marks) <= 10),
+  { message: 'Add a % sign to marks of 10 or less, or choose CGPA', path: ['marks'] }
+)
 
 type ApplicationFormData = z.infer<typeof applicationSchema>
 
@@ -45,6 +49,7 @@ export default function SessionDetailModal({ isOpen, onClose, onSuccess, session
       qualification_id: 0,
       stream_id: 0,
       marks: '',
+      marks_scale: 'percent',
       role_id: 4,
     },
   })
@@ -58,6 +63,7 @@ export default function SessionDetailModal({ isOpen, onClose, onSuccess, session
         qualification_id: 0,
         stream_id: 0,
         marks: '',
+        marks_scale: 'percent',
         role_id: 4,
       })
       setError(null)
@@ -120,6 +126,7 @@ export default function SessionDetailModal({ isOpen, onClose, onSuccess, session
         qualification_id: data.qualification_id,
         stream_id: data.stream_id,
         marks: data.marks,
+        marks_scale: data.marks_scale,
         role_id: data.role_id || 4,
       }
 
@@ -283,15 +290,24 @@ export default function SessionDetailModal({ isOpen, onClose, onSuccess, session
                   <label className="block text-sm font-medium text-gray-700 mb-2">
                     Marks <span className="text-red-500">*</span>
                   </label>
-                  <input
-                    {...register('marks')}
-                    type="text"
-                    className={`w-full px-4 py-3 border rounded-lg focus:ring-2 focus:ring-indigo-500 focus:border-transparent transition text-gray-900 ${
-                      errors.marks ? 'border-red-300' : 'border-gray-300'
-                    }`}
-                    placeholder="e.g., 85.5"
-                    maxLength={5}
-                  />
+                  <div className="flex gap-3">
+                    <input
+                      {...register('marks')}
+                      type="text"
+                      className={`flex-1 px-4 py-3 border rounded-lg focus:ring-2 focus:ring-indigo-500 focus:border-transparent transition text-gray-900 ${
+                        errors.marks ? 'border-red-300' : 'border-gray-300'
+                      }`}
+                      placeholder="e.g., 85.5"
+                      maxLength={5}
+                    />
+                    <select
+                      {...register('marks_scale')}
+                      className="px-4 py-3 border border-gray-300 rounded-lg focus:ring-2 focus:ring-indigo-500 focus:border-transparent transition text-gray-900"
+                    >
+                      <option value="percent">Percentage</option>
+                      <option value="cgpa">CGPA (out of 10)</option>
+                    </select>
+                  </div>
                   {errors.marks && (
                     <p className="mt-1 text-sm text-red-600">{errors.marks.message}</p>
                   )}
@@ -7,7 +7,7 @@ import { useState, useEffect } from 'react'
 import { motion, AnimatePresence } from 'framer-motion'
 import { useNavigate } from 'react-router-dom'
 import { useAuthStore } from '../store/authStore'
-import { applicantAPI, Application, NewsItem, ApplicantProfile, Session } from '../api/applicant'
+import { applicantAPI, subscribeApplications, Application, NewsItem, ApplicantProfile, Session } from '../api/applicant'
 import DashboardSidebar, { DashboardSection } from '../components/applicant-dashboard/DashboardSidebar'
 import ApplicationsCard from '../components/applicant-dashboard/ApplicationsCard'
 import SessionsCard from '../components/applicant-dashboard/SessionsCard'
@@ -31,18 +31,20 @@ export default function ApplicantDashboard() {
     loadDashboardData()
   }, [])
 
+  // Status changes are pushed by the server; no polling needed
+  useEffect(() => subscribeApplications(setApplications), [])
+
   const loadDashboardData = async () => {
     try {
       setLoading(true)
       setError(null)
 
-      // Load all data in parallel
-      const [applicationsData, sessionsData, newsData, profileData] = await Promise.all([
-        applicantAPI.getApplications().catch(() => []),
-        applicantAPI.getSessions().catch(() => []),
-        applicantAPI.getNews().catch(() => []),
-        applicantAPI.getProfile().catch(() => null),
-      ])
+      // Load everything in one request; the server runs the queries in parallel
+      const dashboard = await applicantAPI.getDashboard()
+      const applicationsData = dashboard.applications ?? []
+      const sessionsData = dashboard.sessions ?? []
+      const newsData = dashboard.news ?? []
+      const profileData = dashboard.profile ?? null
 
       setApplications(applicationsData)
       setSessions(sessionsData)